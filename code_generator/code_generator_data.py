@@ -1,8 +1,9 @@
 import asyncio
-import copy
+import hashlib
+import heapq
 import logging
 import os
-import shutil
+import stat
 import subprocess
 from collections import defaultdict
 from typing import Tuple
@@ -10,15 +11,24 @@ from typing import Tuple
 import xmlformatter
 from code_writer import CodeWriter
 
+from .code_generator_storage import FileSystemStorage
+from .formatter_cache import FormatterCache
+from .formatter_service import PYTHON_CONFIG, FormatterService
+
 _logger = logging.getLogger(__name__)
 
 
 class CodeGeneratorData:
-    def __init__(self, module, path):
+    def __init__(self, module, path, storage=None):
+        # Storage of generated files, default on disk
+        self._storage = storage if storage is not None else FileSystemStorage()
+        self._formatter_cache = FormatterCache()
         self._lst_models_init_imports = []
         self._lst_wizards_init_imports = []
         self._lst_controllers_init_imports = []
         self._lst_path_file = set()
+        # Permission bits of copied files, absolute path -> mode
+        self._dct_file_mode = {}
         self._dct_data_depend = defaultdict(list)
         self._dct_data_metadata_file = defaultdict(list)
         self._path = path
@@ -79,6 +89,10 @@ class CodeGeneratorData:
         """
         os.makedirs(path, exist_ok=exist_ok)
 
+    @property
+    def storage(self):
+        return self._storage
+
     @property
     def lst_path_file(self):
         return list(self._lst_path_file)
@@ -183,66 +197,119 @@ class CodeGeneratorData:
     def add_module_init_path(self, component, import_line):
         self._dct_extra_module_init_path[component].append(import_line)
 
-    def _get_lst_files_data_depends(self, lst_meta):
+    def _get_dct_xml_id_file(self):
+        """
+        Reverse index of dct_data_metadata_file, the first file declaring
+        a xml_id define it
+        :return: dict xml_id -> file name
+        """
+        dct_xml_id_file = {}
+        for file_name, lst_key in self.dct_data_metadata_file.items():
+            for key in lst_key:
+                dct_xml_id_file.setdefault(key, file_name)
+        return dct_xml_id_file
+
+    @staticmethod
+    def _get_lst_files_data_depends(lst_meta, dct_xml_id_file):
         set_files = set()
         for meta in lst_meta:
-            for file_name, lst_key in self.dct_data_metadata_file.items():
-                if meta in lst_key:
-                    set_files.add(file_name)
-                    break
-            else:
+            file_name = dct_xml_id_file.get(meta)
+            if file_name is None:
                 _logger.error(f"Cannot find key {meta}.")
+            else:
+                set_files.add(file_name)
         return list(set_files)
 
     def reorder_manifest_data_files(self):
-        lst_manifest = []
-        dct_hold_file = {}
+        """
+        Topological sort of data files by dependencies of xml_id. Stable,
+        the ready file with the smallest original index is written first, an
+        order already valid is kept.
+        :return:
+        """
+        dct_xml_id_file = self._get_dct_xml_id_file()
+        dct_index = {a: i for i, a in enumerate(self._lst_manifest_data_files)}
+        # file -> number of files to write before it
+        dct_nb_depend = dict.fromkeys(self._lst_manifest_data_files, 0)
+        # file -> files depending on it
+        dct_depend_by = defaultdict(list)
         for manifest_data in self._lst_manifest_data_files:
-            if manifest_data in self.dct_data_depend.keys():
-                # find dependence and report until order is right
-                lst_meta = self.dct_data_depend.get(manifest_data)
-                lst_files_depends = self._get_lst_files_data_depends(lst_meta)
-                if manifest_data in lst_files_depends:
+            lst_meta = self.dct_data_depend.get(manifest_data)
+            if not lst_meta:
+                continue
+            for depend in self._get_lst_files_data_depends(
+                lst_meta, dct_xml_id_file
+            ):
+                if depend == manifest_data:
                     # Remove itself depends
-                    lst_files_depends.remove(manifest_data)
-                if lst_files_depends:
-                    dct_hold_file[manifest_data] = lst_files_depends
-                else:
-                    lst_manifest.append(manifest_data)
-            else:
-                lst_manifest.append(manifest_data)
-
-        i = 0
-        max_i = len(dct_hold_file) + 1
-        origin_dct_hold_file = copy.deepcopy(dct_hold_file)
-        while dct_hold_file and i < max_i:
-            i += 1
-            for new_ele, lst_depend in dct_hold_file.items():
-                final_index = -1
-                for depend in lst_depend:
-                    try:
-                        index = lst_manifest.index(depend)
-                    except ValueError:
-                        # element not in list, continue
-                        final_index = -1
-                        break
-                    if index > final_index:
-                        final_index = index
-                if final_index >= 0:
-                    lst_manifest.insert(final_index + 1, new_ele)
-                    del dct_hold_file[new_ele]
-                    # Need to break or crash on loop because dict has change
-                    break
-        if dct_hold_file:
+                    continue
+                if depend not in dct_index:
+                    _logger.error(
+                        f"Data file '{manifest_data}' depends on"
+                        f" '{depend}', missing from manifest."
+                    )
+                    continue
+                dct_nb_depend[manifest_data] += 1
+                dct_depend_by[depend].append(manifest_data)
+
+        # Kahn algorithm, the smallest original index is the next one
+        lst_heap = [dct_index[a] for a, nb in dct_nb_depend.items() if not nb]
+        heapq.heapify(lst_heap)
+        lst_manifest = []
+        while lst_heap:
+            manifest_data = self._lst_manifest_data_files[
+                heapq.heappop(lst_heap)
+            ]
+            lst_manifest.append(manifest_data)
+            for file_name in dct_depend_by[manifest_data]:
+                dct_nb_depend[file_name] -= 1
+                if not dct_nb_depend[file_name]:
+                    heapq.heappush(lst_heap, dct_index[file_name])
+
+        if len(lst_manifest) < len(self._lst_manifest_data_files):
+            set_cycle = self._get_set_files_in_cycle(
+                {a for a, nb in dct_nb_depend.items() if nb}, dct_depend_by
+            )
+            lst_cycle = sorted(set_cycle, key=lambda a: dct_index[a])
+            lst_blocked = sorted(
+                [a for a, nb in dct_nb_depend.items() if nb],
+                key=lambda a: dct_index[a],
+            )
             _logger.error(
-                f"Cannot reorder all manifest file: '{dct_hold_file}', origin"
-                f" '{origin_dct_hold_file}'"
+                "Cannot reorder all manifest file, cycle of dependencies"
+                f" between {lst_cycle}, blocking {lst_blocked}."
             )
             # Try to solve it
-            for new_ele, lst_depend in dct_hold_file.items():
-                lst_manifest.append(new_ele)
+            lst_manifest += lst_blocked
         self._lst_manifest_data_files = lst_manifest
 
+    @staticmethod
+    def _get_set_files_in_cycle(set_blocked, dct_depend_by):
+        """
+        Util function to keep the files of the cycles, remove blocked files
+        depending on a cycle without being in it
+        :param set_blocked: files not sorted by the topological sort
+        :param dct_depend_by: file -> files depending on it
+        :return: set of files
+        """
+        set_cycle = set(set_blocked)
+        # file -> its dependencies, inside blocked files
+        dct_depend = defaultdict(list)
+        for file_name in set_cycle:
+            for depend_by in dct_depend_by[file_name]:
+                if depend_by in set_cycle:
+                    dct_depend[depend_by].append(file_name)
+        lst_to_check = list(set_cycle)
+        while lst_to_check:
+            file_name = lst_to_check.pop()
+            if file_name not in set_cycle:
+                continue
+            if not any(a in set_cycle for a in dct_depend_by[file_name]):
+                # Nothing in cycle depends on it
+                set_cycle.discard(file_name)
+                lst_to_check.extend(dct_depend[file_name])
+        return set_cycle
+
     def copy_directory(self, source_directory_path, directory_path):
         """
         Copy only directory without manipulation
@@ -253,8 +320,18 @@ class CodeGeneratorData:
         absolute_path = os.path.join(
             self._path, self._module_name, directory_path
         )
-        # self.check_mkdir_and_create(absolute_path, is_file=False)
-        status = shutil.copytree(source_directory_path, absolute_path)
+        for root, dirs, files in os.walk(source_directory_path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                relative_path = os.path.relpath(
+                    file_path, source_directory_path
+                )
+                target_path = os.path.join(absolute_path, relative_path)
+                with open(file_path, "rb") as file_source:
+                    self._storage.write(target_path, file_source.read())
+                self._dct_file_mode[target_path] = stat.S_IMODE(
+                    os.stat(file_path).st_mode
+                )
 
     def copy_file(
         self,
@@ -277,6 +354,12 @@ class CodeGeneratorData:
             self.write_file_str(file_path, content, data_file=data_file)
         else:
             self.write_file_binary(file_path, content, data_file=data_file)
+        absolute_path = os.path.join(
+            self._path, self._module_name, file_path.lstrip("/")
+        )
+        self._dct_file_mode[absolute_path] = stat.S_IMODE(
+            os.stat(source_file_path).st_mode
+        )
 
     def write_file_lst_content(
         self,
@@ -367,19 +450,16 @@ class CodeGeneratorData:
 
         self._check_import_python_file(file_path)
 
-        self.check_mkdir_and_create(absolute_path)
-
-        if os.path.exists(absolute_path):
+        if self._storage.exists(absolute_path):
             actual_size = len(content)
-            old_size = os.path.getsize(absolute_path)
+            old_size = self._storage.get_size(absolute_path)
             _logger.warning(
                 f"Overwrite file {file_path}, old size {old_size} bytes, new"
                 f" size {actual_size} bytes."
             )
         else:
             _logger.info(f"Write file {file_path}")
-        with open(absolute_path, mode) as file:
-            file.write(content)
+        self._storage.write(absolute_path, content)
 
     @staticmethod
     def _split_path_all(path):
@@ -423,18 +503,80 @@ class CodeGeneratorData:
         CodeGeneratorData.os_make_dirs(path_dir)
 
     def sync_code(self, directory, name):
+        """
+        Incremental sync of the module into directory, write only files with
+        a different content and delete files not generated anymore.
+        :param directory:
+        :param name: module name
+        :return: dict of relative path list, keys added, modified and removed
+        """
+        dct_report = {"added": [], "modified": [], "removed": []}
         try:
-            # if not os.path.isdir(path_sync_code):
-            #     osmakedirs(path_sync_code)
             path_sync_code = os.path.join(directory, name)
-            if os.path.isdir(path_sync_code):
-                shutil.rmtree(path_sync_code)
             _logger.info(
                 f"Sync code from '{self._module_path}' to '{path_sync_code}'"
             )
-            shutil.copytree(self._module_path, path_sync_code)
+            set_relative_path = set()
+            for absolute_path in self._storage.list_path(self._module_path):
+                relative_path = os.path.relpath(
+                    absolute_path, self._module_path
+                )
+                set_relative_path.add(relative_path)
+                content = self._storage.read(absolute_path)
+                target_path = os.path.join(path_sync_code, relative_path)
+                # Keep permission bits of copied files, like copytree
+                mode = self._dct_file_mode.get(absolute_path)
+                if os.path.isfile(target_path):
+                    if os.path.getsize(target_path) == len(content):
+                        with open(target_path, "rb") as file:
+                            target_hash = hashlib.sha256(file.read())
+                        if (
+                            target_hash.digest()
+                            == hashlib.sha256(content).digest()
+                        ):
+                            self._set_file_mode(target_path, mode)
+                            continue
+                    dct_report["modified"].append(relative_path)
+                else:
+                    dct_report["added"].append(relative_path)
+                self.check_mkdir_and_create(target_path)
+                with open(target_path, "wb") as file:
+                    file.write(content)
+                self._set_file_mode(target_path, mode)
+
+            # Remove files not generated anymore
+            for root, dirs, files in os.walk(path_sync_code, topdown=False):
+                for file in files:
+                    target_path = os.path.join(root, file)
+                    relative_path = os.path.relpath(
+                        target_path, path_sync_code
+                    )
+                    if relative_path not in set_relative_path:
+                        os.remove(target_path)
+                        dct_report["removed"].append(relative_path)
+                if root != path_sync_code and not os.listdir(root):
+                    os.rmdir(root)
+            _logger.info(
+                f"Sync code '{name}': {len(dct_report['added'])} added,"
+                f" {len(dct_report['modified'])} modified,"
+                f" {len(dct_report['removed'])} removed."
+            )
         except Exception as e:
             _logger.error(e)
+        return dct_report
+
+    @staticmethod
+    def _set_file_mode(path_file, mode):
+        """
+        Util function to change permission bits of a file when different
+        :param path_file:
+        :param mode: None to keep the actual mode
+        :return:
+        """
+        if mode is None:
+            return
+        if stat.S_IMODE(os.stat(path_file).st_mode) != mode:
+            os.chmod(path_file, mode)
 
     async def execute_async_subprocess(self, cmd) -> Tuple[str, int]:
         process = await asyncio.create_subprocess_shell(
@@ -492,6 +634,7 @@ class CodeGeneratorData:
         flake8_bin = os.path.join(workspace_path, ".venv", "bin", "flake8")
         config_path = os.path.join(workspace_path, ".flake8")
         cpu_count = os.cpu_count()
+        self._storage.materialize(self.module_path)
         try:
             out = subprocess.check_output(
                 [
@@ -505,6 +648,8 @@ class CodeGeneratorData:
             result = out
         except subprocess.CalledProcessError as e:
             result = e.output.decode()
+        finally:
+            self._storage.reload(self.module_path)
 
         if result:
             _logger.warning(result)
@@ -514,6 +659,7 @@ class CodeGeneratorData:
             os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
         )
         cpu_count = os.cpu_count()
+        self._storage.materialize(self.module_path)
         try:
             out = subprocess.check_output(
                 [
@@ -529,6 +675,8 @@ class CodeGeneratorData:
             result = out
         except subprocess.CalledProcessError as e:
             result = e.output.decode()
+        finally:
+            self._storage.reload(self.module_path)
 
         if result:
             _logger.warning(result)
@@ -543,33 +691,37 @@ class CodeGeneratorData:
         use_format_black = True  # Else, oca-autopep8
         use_clean_import_isort = True
         enable_xml_formatter = False  # Else, prettier-xml
-        # Manual format with def with programmer style
+        # Content formatted in memory by the formatter service
+        lst_job = []
+        # Legacy formatters work on disk
         lst_cmd = []
         for path_file in self.lst_path_file:
             relative_path = path_file[len(self.module_path) + 1 :]
             if path_file.endswith(".py"):
+                if use_format_black or use_clean_import_isort:
+                    lst_job.append((path_file, PYTHON_CONFIG))
                 # TODO not optimal, too many write for nothing
                 if not use_format_black:
                     lst_line_write = []
                     has_change = False
-                    with open(path_file, "r") as source:
-                        for line in source.readlines():
-                            if (
-                                line.lstrip().startswith("def ")
-                                or line.lstrip().startswith("return ")
-                            ) and len(line) > max_col - 1:
-                                has_change = True
-                                next_tab_space = line.find("(") + 1
-                                first_cut = max_col
-                                first_cut = line.rfind(", ", 0, first_cut) + 1
-                                first_part = line[:first_cut]
-                                last_part = line[first_cut:].lstrip()
-                                str_line = (
-                                    f"{first_part}\n{' ' * next_tab_space}{last_part}"
-                                )
-                                lst_line_write.append(str_line[:-1])
-                            else:
-                                lst_line_write.append(line[:-1])
+                    source = self._storage.read(path_file).decode("utf-8")
+                    for line in source.splitlines(keepends=True):
+                        if (
+                            line.lstrip().startswith("def ")
+                            or line.lstrip().startswith("return ")
+                        ) and len(line) > max_col - 1:
+                            has_change = True
+                            next_tab_space = line.find("(") + 1
+                            first_cut = max_col
+                            first_cut = line.rfind(", ", 0, first_cut) + 1
+                            first_part = line[:first_cut]
+                            last_part = line[first_cut:].lstrip()
+                            str_line = (
+                                f"{first_part}\n{' ' * next_tab_space}{last_part}"
+                            )
+                            lst_line_write.append(str_line[:-1])
+                        else:
+                            lst_line_write.append(line[:-1])
                     if has_change:
                         self.write_file_lst_content(
                             relative_path, lst_line_write
@@ -577,8 +729,7 @@ class CodeGeneratorData:
 
             elif path_file.endswith(".js"):
                 if use_prettier:
-                    cmd = f"prettier --write --tab-width 4 {path_file}"
-                    lst_cmd.append(cmd)
+                    lst_job.append((path_file, "js"))
                 else:
                     cmd = (
                         f"cd {workspace_path};."
@@ -586,21 +737,13 @@ class CodeGeneratorData:
                     )
                     lst_cmd.append(cmd)
 
-            elif path_file.endswith(".scss") or path_file.endswith(".css"):
-                if use_prettier:
-                    cmd = f"prettier --write {path_file}"
-                    lst_cmd.append(cmd)
-                else:
-                    cmd = (
-                        f"cd {workspace_path};."
-                        f" .venv/bin/activate;css-html-prettify.py {path_file}"
-                    )
-                    lst_cmd.append(cmd)
-
-            elif path_file.endswith(".html"):
+            elif (
+                path_file.endswith(".scss")
+                or path_file.endswith(".css")
+                or path_file.endswith(".html")
+            ):
                 if use_prettier:
-                    cmd = f"prettier --write {path_file}"
-                    lst_cmd.append(cmd)
+                    lst_job.append((path_file, "default"))
                 else:
                     cmd = (
                         f"cd {workspace_path};."
@@ -611,35 +754,82 @@ class CodeGeneratorData:
             elif path_file.endswith(".xml"):
                 if use_prettier and not enable_xml_formatter:
                     if "/data/" in path_file:
-                        # Super size --print-width, because wrapping data break information for translation and
-                        # visual data
-                        cmd = (
-                            "prettier --xml-whitespace-sensitivity ignore"
-                            " --prose-wrap always --tab-width 4"
-                            " --no-bracket-spacing --print-width 999999999"
-                            f" --write {path_file}"
-                        )
+                        lst_job.append((path_file, "xml_data"))
                     else:
-                        cmd = (
-                            "prettier --xml-whitespace-sensitivity ignore"
-                            " --prose-wrap always --tab-width 4"
-                            " --no-bracket-spacing --print-width 120 --write"
-                            f" {path_file}"
-                        )
-
-                    lst_cmd.append(cmd)
-
-        if parallel:
-            # Run in parallel prettier for more speed
+                        lst_job.append((path_file, "xml"))
+
+        if use_format_black or use_clean_import_isort:
+            # Like the old isort and black commands on module_path, format
+            # also python files copied without write_file_*
+            set_path_file = set(self.lst_path_file)
+            for path_file in self._storage.list_path(self.module_path):
+                if (
+                    path_file.endswith(".py")
+                    and path_file not in set_path_file
+                ):
+                    lst_job.append((path_file, PYTHON_CONFIG))
+
+        # Formatters keep their workers alive across generations
+        formatter_service = FormatterService.get_instance()
+        lst_job_source = []
+        dct_cache_key = {}
+        nb_cache_hit = 0
+        for path_file, config_name in lst_job:
             try:
-                if asyncio.get_event_loop().is_closed():
-                    asyncio.set_event_loop(asyncio.new_event_loop())
-            except Exception as e:
-                _logger.error(e)
-                parallel = False
+                source = self._storage.read(path_file).decode("utf-8")
+            except UnicodeDecodeError:
+                _logger.warning(f"Cannot format not utf-8 file {path_file}")
+                continue
+            # Skip formatter when same content was already formatted
+            cache_key = self._formatter_cache.get_key(
+                source,
+                formatter_service.get_config_signature(
+                    config_name,
+                    line_length=max_col,
+                    use_isort=use_clean_import_isort,
+                    use_black=use_format_black,
+                    workspace_path=workspace_path,
+                ),
+            )
+            formatted = self._formatter_cache.get(cache_key)
+            if formatted is not None:
+                nb_cache_hit += 1
+                if formatted != source:
+                    self._storage.write(path_file, formatted)
+                continue
+            dct_cache_key[path_file] = cache_key
+            lst_job_source.append((path_file, source, config_name))
+        _logger.info(
+            f"Formatter cache hit {nb_cache_hit}/"
+            f"{nb_cache_hit + len(lst_job_source)} files."
+        )
+        dct_formatted = formatter_service.format_batch(
+            lst_job_source,
+            line_length=max_col,
+            use_isort=use_clean_import_isort,
+            use_black=use_format_black,
+            workspace_path=workspace_path,
+        )
+        for path_file, source, _ in lst_job_source:
+            formatted = dct_formatted.get(path_file)
+            if formatted is None:
+                continue
+            self._formatter_cache.set(dct_cache_key[path_file], formatted)
+            if formatted != source:
+                self._storage.write(path_file, formatted)
+        self._formatter_cache.prune()
+
+        if not lst_cmd and use_format_black and not enable_xml_formatter:
+            _logger.info("End of auto_format")
+            return
+
+        # Legacy formatters work on disk
+        self._storage.materialize(self.module_path)
 
         if parallel:
-            loop = asyncio.get_event_loop()
+            # Run in parallel css-html-prettify for more speed
+            # New loop, auto_format can be called from a worker thread
+            loop = asyncio.new_event_loop()
             task_list = [self.execute_async_subprocess(a) for a in lst_cmd]
             tpl_result = {}
             try:
@@ -648,42 +838,14 @@ class CodeGeneratorData:
             finally:
                 loop.close()
             for result in tpl_result:
-                _logger.info("prettier " + result[0])
+                _logger.info("css-html-prettify " + result[0])
         else:
             for cmd in lst_cmd:
                 result = self.subprocess_cmd(cmd)
                 if result:
-                    if use_prettier:
-                        _logger.info(f"prettier {result.decode()}")
-                    else:
-                        _logger.info(f"css-html-prettify {result.decode()}")
-
-        # Optimize import python
-        if use_clean_import_isort:
-            cmd = (
-                f"cd {workspace_path};./.venv/bin/isort --profile black -l 79"
-                f" {self.module_path}"
-            )
-            result = self.subprocess_cmd(cmd)
+                    _logger.info(f"css-html-prettify {result.decode()}")
 
-            if result:
-                _logger.info(f"isort {result.decode()}")
-            else:
-                _logger.info("isort no result.")
-
-        # Automatic format
-        # TODO check diff before and after format to auto improvement of generation
-        if use_format_black:
-            cmd = (
-                f"cd {workspace_path};./.venv/bin/black -l"
-                f" {max_col} --preview -t py37"
-                f" {self.module_path}"
-            )
-            result = self.subprocess_cmd(cmd)
-
-            if result:
-                _logger.warning(result)
-        else:
+        if not use_format_black:
             maintainer_path = os.path.join(
                 workspace_path, "script", "OCA_maintainer-tools"
             )
@@ -713,4 +875,5 @@ class CodeGeneratorData:
                     self.write_file_binary(
                         relative_path, formatter.format_file(path_file)
                     )
+        self._storage.reload(self.module_path)
         _logger.info("End of auto_format")
@@ -0,0 +1,213 @@
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+_logger = logging.getLogger(__name__)
+
+# Memory storages kept by the registry, the oldest one is dropped over it
+MAX_REGISTRY_STORAGE = 8
+
+
+class CodeGeneratorStorage:
+    """
+    Storage of generated files, keyed by absolute path
+    """
+
+    def write(self, absolute_path, content):
+        raise NotImplementedError
+
+    def read(self, absolute_path):
+        raise NotImplementedError
+
+    def exists(self, absolute_path):
+        raise NotImplementedError
+
+    def get_size(self, absolute_path):
+        raise NotImplementedError
+
+    def list_path(self, directory):
+        """
+        Get all path of files into directory
+        :param directory:
+        :return:
+        """
+        raise NotImplementedError
+
+    def materialize(self, directory):
+        """
+        Write files of directory on disk, to be used by external tools
+        :param directory:
+        :return:
+        """
+        pass
+
+    def reload(self, directory):
+        """
+        Read back files of directory from disk, after external tools
+        :param directory:
+        :return:
+        """
+        pass
+
+    @staticmethod
+    def _to_bytes(content):
+        if type(content) is str:
+            return content.encode("utf-8")
+        return content
+
+    @staticmethod
+    def _is_in_directory(absolute_path, directory):
+        return absolute_path.startswith(os.path.join(directory, ""))
+
+    @staticmethod
+    def _write_on_disk(absolute_path, content):
+        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+        with open(absolute_path, "wb") as file:
+            file.write(content)
+
+
+class FileSystemStorage(CodeGeneratorStorage):
+    """
+    Write files directly on disk
+    """
+
+    def write(self, absolute_path, content):
+        self._write_on_disk(absolute_path, self._to_bytes(content))
+
+    def read(self, absolute_path):
+        with open(absolute_path, "rb") as file:
+            return file.read()
+
+    def exists(self, absolute_path):
+        return os.path.isfile(absolute_path)
+
+    def get_size(self, absolute_path):
+        return os.path.getsize(absolute_path)
+
+    def list_path(self, directory):
+        lst_path = []
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                lst_path.append(os.path.join(root, file))
+        return lst_path
+
+
+class MemoryStorage(CodeGeneratorStorage):
+    """
+    Keep bytes of each file in memory, disk is only used by external tools
+    between materialize and reload.
+    Modules can be formatted in a worker thread while next one is written.
+    """
+
+    def __init__(self):
+        self._dct_file = {}
+        self._set_materialized_directory = set()
+        self._lock = threading.Lock()
+
+    def write(self, absolute_path, content):
+        content = self._to_bytes(content)
+        with self._lock:
+            self._dct_file[absolute_path] = content
+            lst_directory = list(self._set_materialized_directory)
+        # Write through when external tools work on disk
+        for directory in lst_directory:
+            if self._is_in_directory(absolute_path, directory):
+                self._write_on_disk(absolute_path, content)
+                break
+
+    def read(self, absolute_path):
+        return self._dct_file[absolute_path]
+
+    def exists(self, absolute_path):
+        return absolute_path in self._dct_file
+
+    def get_size(self, absolute_path):
+        return len(self._dct_file[absolute_path])
+
+    def list_path(self, directory):
+        with self._lock:
+            lst_path = list(self._dct_file)
+        return [a for a in lst_path if self._is_in_directory(a, directory)]
+
+    def materialize(self, directory):
+        lst_path = self.list_path(directory)
+        _logger.info(f"Materialize {len(lst_path)} files in '{directory}'.")
+        for absolute_path in lst_path:
+            self._write_on_disk(absolute_path, self._dct_file[absolute_path])
+        with self._lock:
+            self._set_materialized_directory.add(directory)
+
+    def reload(self, directory):
+        for absolute_path in self.list_path(directory):
+            if os.path.isfile(absolute_path):
+                with open(absolute_path, "rb") as file:
+                    self._dct_file[absolute_path] = file.read()
+        with self._lock:
+            self._set_materialized_directory.discard(directory)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def get_dct_content(self, directory):
+        """
+        Content of generated files, to compare generations without disk
+        :param directory:
+        :return: dict relative path -> bytes
+        """
+        return {
+            os.path.relpath(a, directory): self._dct_file[a]
+            for a in self.list_path(directory)
+        }
+
+    @staticmethod
+    def compare(dct_content, dct_other_content):
+        """
+        Util function to compare 2 results of get_dct_content
+        :param dct_content: reference
+        :param dct_other_content:
+        :return: dict of relative path list, keys added, modified and removed
+        """
+        return {
+            "added": sorted(set(dct_other_content) - set(dct_content)),
+            "modified": sorted(
+                a
+                for a, content in dct_content.items()
+                if a in dct_other_content and dct_other_content[a] != content
+            ),
+            "removed": sorted(set(dct_content) - set(dct_other_content)),
+        }
+
+
+class StorageRegistry:
+    """
+    Storages of generations by key, like (dbname, writer id). A storage
+    stays reachable from any recordset of the writer, until release.
+    """
+
+    def __init__(self, max_storage=MAX_REGISTRY_STORAGE):
+        self._max_storage = max_storage
+        self._dct_storage = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, key, storage):
+        with self._lock:
+            self._dct_storage[key] = storage
+            self._dct_storage.move_to_end(key)
+            while len(self._dct_storage) > self._max_storage:
+                old_key, _ = self._dct_storage.popitem(last=False)
+                _logger.warning(f"Drop storage of generation {old_key}.")
+
+    def get(self, key):
+        """
+        :param key:
+        :return: storage, None when missing
+        """
+        with self._lock:
+            return self._dct_storage.get(key)
+
+    def release(self, key):
+        with self._lock:
+            self._dct_storage.pop(key, None)
+
+
+storage_registry = StorageRegistry()
@@ -1,10 +1,16 @@
 import io
+import logging
 import shutil
-from zipfile import ZIP_DEFLATED, ZipFile
+import time
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 
 from odoo import http
 from odoo.http import content_disposition, request
 
+_logger = logging.getLogger(__name__)
+
+DEFAULT_ZIP_COMPRESS_LEVEL = 6
+
 
 def _get_l_map(fn, collection):
     """
@@ -17,21 +23,38 @@ def _get_l_map(fn, collection):
     return list(map(fn, collection))
 
 
-class CodeGeneratorZipFile(ZipFile):
+class CodeGeneratorZipStream(io.RawIOBase):
     """
-    Code Generator ZipFile class
+    Unseekable file object for ZipFile, keep written bytes until pop
     """
 
-    def write_end_record_without_closing(self):
+    def __init__(self, debug_buffer=None):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+        self._debug_buffer = debug_buffer
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buffer += b
+        self._position += len(b)
+        if self._debug_buffer is not None:
+            self._debug_buffer.write(b)
+        return len(b)
+
+    def tell(self):
+        return self._position
+
+    def pop(self):
         """
-        Util function to write the 'end records' of a  Zip file without call the close method
+        Util function to get written bytes since last call
         :return:
         """
-
-        with self._lock:
-            if self._seekable:
-                self.fp.seek(self.start_dir)
-            self._write_end_record()
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
 
 
 class CodeGeneratorController(http.Controller):
@@ -57,28 +80,33 @@ class CodeGeneratorController(http.Controller):
             value
         )
 
-        bytesio = io.BytesIO()
-        zipy = CodeGeneratorZipFile(
-            bytesio, mode="w", compression=ZIP_DEFLATED
-        )
-
         # Parameter
         lst_path_file = code_generator_writer.get_list_path_file()
         rootdir = code_generator_writer.rootdir
         basename = code_generator_writer.basename
-
-        # Create ZIP
-        for path_file in lst_path_file:
-            zipy.write(path_file)
-
-        assert zipy.testzip() is None
-
-        bytesio.seek(0)
-
-        zipy.write_end_record_without_closing()
+        storage = code_generator_writer.get_code_generator_storage()
+        parameters = request.env["ir.config_parameter"].sudo()
+        # 0 is store only, fast for LAN download
+        compress_level = parameters.get_param(
+            "code_generator.zip_compress_level",
+            default=DEFAULT_ZIP_COMPRESS_LEVEL,
+        )
+        try:
+            compress_level = min(max(int(compress_level), 0), 9)
+        except ValueError:
+            _logger.warning(
+                f"Wrong zip compression level '{compress_level}', use"
+                f" {DEFAULT_ZIP_COMPRESS_LEVEL}."
+            )
+            compress_level = DEFAULT_ZIP_COMPRESS_LEVEL
+        debug_testzip = bool(
+            parameters.get_param("code_generator.zip_debug_testzip")
+        )
 
         response = request.make_response(
-            zipy.fp.getvalue(),
+            self._iter_zip_chunks(
+                lst_path_file, storage, compress_level, debug_testzip
+            ),
             headers=[
                 ("Access-Control-Allow-Origin", "*"),
                 ("Access-Control-Allow-Methods", "GET"),
@@ -90,8 +118,58 @@ class CodeGeneratorController(http.Controller):
             ],
         )
 
-        zipy.close()
+        def cleanup():
+            shutil.rmtree(rootdir, ignore_errors=True)
+            code_generator_writer.release_code_generator_storage()
 
-        shutil.rmtree(rootdir, ignore_errors=True)
+        # Called at the end of the response, even when the client is
+        # disconnected before the zip is iterated
+        response.call_on_close(cleanup)
 
         return response
+
+    @staticmethod
+    def _iter_zip_chunks(
+        lst_path_file, storage, compress_level, debug_testzip
+    ):
+        """
+        Generator of zip chunks, yield after each file is deflated.
+        No ORM access, it's executed after the request cursor is closed.
+        :param lst_path_file:
+        :param storage: storage of generated files
+        :param compress_level: 0 to store only, else deflate level 1 to 9
+        :param debug_testzip: check the archive with testzip at the end
+        :return:
+        """
+        if compress_level > 0:
+            compression = ZIP_DEFLATED
+        else:
+            compression = ZIP_STORED
+            compress_level = None
+        debug_buffer = io.BytesIO() if debug_testzip else None
+        stream = CodeGeneratorZipStream(debug_buffer=debug_buffer)
+        with ZipFile(
+            stream,
+            mode="w",
+            compression=compression,
+            compresslevel=compress_level,
+        ) as zipy:
+            for path_file in lst_path_file:
+                zip_info = ZipInfo(
+                    path_file.lstrip("/"), date_time=time.localtime()[:6]
+                )
+                zip_info.compress_type = compression
+                zip_info.external_attr = 0o644 << 16
+                zipy.writestr(
+                    zip_info,
+                    storage.read(path_file),
+                    compresslevel=compress_level,
+                )
+                yield stream.pop()
+        yield stream.pop()
+
+        if debug_buffer is not None:
+            with ZipFile(debug_buffer) as zip_check:
+                bad_file = zip_check.testzip()
+            if bad_file is not None:
+                _logger.error(f"Corrupted file '{bad_file}' in zip.")
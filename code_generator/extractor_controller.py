@@ -8,6 +8,10 @@ from pyjsparser import parse
 
 _logger = logging.getLogger(__name__)
 
+# Parsed javascript shared by all extractions, path -> (mtime, token_js,
+# set of field name found)
+_dct_js_cache = {}
+
 
 class ExtractorController:
     def __init__(self, module, model_model, model_extractor):
@@ -96,26 +100,20 @@ class ExtractorController:
                     )
                     lst_js_file = glob.glob(path_generated_module)
                     is_in_list = False
-                    # TODO optimize, this is call for each model, but it's a unique result
+                    set_field_name = set(lst_field_name)
                     for js_file in lst_js_file:
-                        with open(js_file, "r") as f:
-                            js_code = f.read()
-                            token_js = parse(js_code)
-                            lst_field_founded_name = []
-                            self.recursive_search_field_text(
-                                token_js, lst_field_founded_name
-                            )
-                            # validate all the field exist in this model. If true, we find it! Suppose by default yes
-                            is_in_list = bool(
-                                lst_field_founded_name and lst_field_name
-                            )
-                            # This can detect controller_feature model_show_item_individual
-                            for field_name in lst_field_founded_name:
-                                if field_name == module.template_module_name:
-                                    continue
-                                if field_name not in lst_field_name:
-                                    is_in_list = False
-                                    break
+                        set_field_founded_name = self._get_js_field_name(
+                            js_file
+                        )
+                        # validate all the field exist in this model. If true, we find it! Suppose by default yes
+                        # This can detect controller_feature model_show_item_individual
+                        is_in_list = bool(
+                            set_field_founded_name and set_field_name
+                        ) and (
+                            set_field_founded_name
+                            - {module.template_module_name}
+                            <= set_field_name
+                        )
                     if is_in_list:
                         if (
                             module.template_generate_website_snippet_generic_model
@@ -137,6 +135,26 @@ class ExtractorController:
             else:
                 _logger.warning("Not support extraction multiple snippet.")
 
+    def _get_js_field_name(self, js_file):
+        """
+        Parse the javascript file once, it's the same result for each model.
+        Parsed again when the mtime change.
+        :param js_file:
+        :return: frozenset of field name found in the javascript
+        """
+        mtime = os.stat(js_file).st_mtime_ns
+        cache = _dct_js_cache.get(js_file)
+        if cache and cache[0] == mtime:
+            return cache[2]
+        with open(js_file, "r") as f:
+            js_code = f.read()
+        token_js = parse(js_code)
+        lst_field_founded_name = []
+        self.recursive_search_field_text(token_js, lst_field_founded_name)
+        set_field_founded_name = frozenset(lst_field_founded_name)
+        _dct_js_cache[js_file] = (mtime, token_js, set_field_founded_name)
+        return set_field_founded_name
+
     def recursive_search_field_text(self, token, lst_field_name):
         if not token:
             return
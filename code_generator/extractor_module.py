@@ -4,12 +4,15 @@ import logging
 import os
 
 from .extractor_module_file import ExtractorModuleFile
+from .extractor_module_index import ExtractorModuleIndex
 
 _logger = logging.getLogger(__name__)
 
 
 class ExtractorModule:
-    def __init__(self, module, model_model, view_file_sync_model):
+    def __init__(
+        self, module, model_model, view_file_sync_model, module_index=None
+    ):
         self.is_enabled = False
         self.working_directory = module.path_sync_code
         self.view_file_sync_model = view_file_sync_model
@@ -146,57 +149,34 @@ class ExtractorModule:
                 f"Find no python file with pattern '{path_generated_module}'"
             )
             return
+        if module_index is None:
+            module_index = ExtractorModuleIndex()
         for py_file in lst_py_file:
             filename = py_file.split("/")[-1]
             if filename == "__init__.py":
                 continue
-            with open(py_file, "r") as source:
-                f_lines = source.read()
-                # TODO use ast.parse(f_lines, type_comments=True), need python 3.8
-                f_ast = ast.parse(f_lines)
-                class_model_ast, next_model_ast = self.search_class_model(
-                    f_ast
+            class_model = module_index.get_class_model(py_file, self.model)
+            if class_model:
+                (
+                    f_lines,
+                    class_model_ast,
+                    next_model_ast,
+                    lst_comment,
+                    lst_line_offset,
+                ) = class_model
+                extract_file = ExtractorModuleFile(
+                    module,
+                    filename,
+                    f_lines,
+                    class_model_ast,
+                    self.dct_model,
+                    self.model,
+                    self.view_file_sync_model,
+                    self.model_id,
+                    next_model_ast,
+                    lst_comment,
+                    lst_line_offset,
                 )
-                if class_model_ast:
-                    extract_file = ExtractorModuleFile(
-                        module,
-                        filename,
-                        f_lines,
-                        class_model_ast,
-                        self.dct_model,
-                        self.model,
-                        self.view_file_sync_model,
-                        self.model_id,
-                        next_model_ast,
-                    )
-                    extract_file.extract()
+                extract_file.extract()
 
         self.is_enabled = True
-
-    def search_class_model(self, f_ast):
-        find_children = None
-        for children in f_ast.body:
-            if find_children:
-                # children are next node
-                return find_children, children
-            # TODO check bases of class if equal models.Model for better performance
-            # TODO check multiple class
-            if type(children) == ast.ClassDef:
-                # Detect good _name
-                for node in children.body:
-                    if (
-                        type(node) is ast.Assign
-                        and node.targets
-                        and type(node.targets[0]) is ast.Name
-                        and node.targets[0].id in ("_name", "_inherit")
-                    ):
-                        if (
-                            type(node.value) is ast.Str
-                            and node.value.s == self.model
-                            or type(node.value) is ast.List
-                            and self.model in [a.s for a in node.value.elts]
-                        ):
-                            find_children = children
-                            break
-
-        return find_children, None
@@ -1,4 +1,5 @@
 import ast
+import bisect
 import logging
 
 import astor
@@ -18,10 +19,18 @@ class ExtractorModuleFile:
         view_file_sync_model,
         model_id,
         next_model_ast,
+        lst_comment,
+        lst_line_offset,
     ):
+        """
+        :param lst_comment: list of tuple (lineno, comment) from
+            ExtractorModuleIndex, comments alone on their line
+        :param lst_line_offset: offset of each line in f_lines
+        """
         self.module = module
         self.py_filename = filename
-        self.lst_line = f_lines.split("\n")
+        self.f_lines = f_lines
+        self.lst_line_offset = lst_line_offset
         self.class_model_ast = class_model_ast
         self.dct_model = dct_model
         self.model = model
@@ -29,35 +38,31 @@ class ExtractorModuleFile:
         self.model_id = model_id
         self.next_model_ast = next_model_ast
         self.lst_comment = []
-        self._extract_comment()
+        # line of each item of lst_comment, to search by line with bisect
+        self.lst_comment_line = []
+        self.set_comment_line = set()
+        self._extract_comment(lst_comment)
 
-    def _extract_comment(self):
-        # structure of comment
-        last_comment = ""
-        last_i = -1
+    def _extract_comment(self, lst_comment):
+        # structure of comment, consecutive comment lines are regrouped
+        last_lineno = -1
         obj = {}
-        for i, line in enumerate(self.lst_line):
-            strip_line = line.strip()
-            # TODO support when # is not a real comment, but a char in string
-            # Trick, check in AST if # in string and ignore it
-            # TODO missing support when comment is at the end of code, or inside statement
-            if strip_line and strip_line[0] == "#":
-                if last_i != -1:
-                    # Update last comment
-                    last_comment += "\n" + strip_line.lstrip("#").lstrip()
-                    obj["comment"] = last_comment
-                else:
-                    last_comment = strip_line.lstrip("#").lstrip()
-                    obj = {
-                        "use": False,
-                        "line": i + 1,
-                        "column": 0,
-                        "comment": last_comment,
-                    }
-                    self.lst_comment.append(obj)
-                last_i = i
+        for lineno, comment in lst_comment:
+            str_comment = comment.strip().lstrip("#").lstrip()
+            if lineno == last_lineno + 1:
+                # Update last comment
+                obj["comment"] += "\n" + str_comment
             else:
-                last_i = -1
+                obj = {
+                    "use": False,
+                    "line": lineno,
+                    "column": 0,
+                    "comment": str_comment,
+                }
+                self.lst_comment.append(obj)
+                self.lst_comment_line.append(lineno)
+            self.set_comment_line.add(lineno)
+            last_lineno = lineno
         _logger.info(
             f"Detect {len(self.lst_comment)} comment in file"
             f" {self.py_filename}"
@@ -70,10 +75,70 @@ class ExtractorModuleFile:
         self.search_method()
 
     def extract_lambda(self, node):
-        result = astor.to_source(node).strip().replace("\n", "")
-        if result[0] == "(" and result[-1] == ")":
-            result = result[1:-1]
-        return result
+        if getattr(node, "end_col_offset", None) is None:
+            # TODO remove with python 3.7, end position is missing in ast
+            result = astor.to_source(node).strip().replace("\n", "")
+            if result[0] == "(" and result[-1] == ")":
+                result = result[1:-1]
+            return result
+        return " ".join([a.strip() for a in self._get_source_segment(node)])
+
+    def _get_lines(self, no_line_min, no_line_max):
+        """
+        Get lines of source without splitting all the file
+        :param no_line_min: first line, start at 1
+        :param no_line_max: last line, included
+        :return: list of line
+        """
+        start = self.lst_line_offset[no_line_min - 1]
+        if no_line_max < len(self.lst_line_offset):
+            # Ignore the \n of the last line
+            end = self.lst_line_offset[no_line_max] - 1
+        else:
+            end = len(self.f_lines)
+        return self.f_lines[start:end].split("\n")
+
+    def _get_source_segment(self, node):
+        """
+        Same result of ast.get_source_segment, without splitting all the file
+        for each node
+        :param node: ast node with end position
+        :return: list of line of the node
+        """
+        lst_line = self._get_lines(node.lineno, node.end_lineno)
+        # col_offset is the offset in utf-8 bytes
+        lst_line[-1] = lst_line[-1].encode()[: node.end_col_offset].decode()
+        lst_line[0] = lst_line[0].encode()[node.col_offset :].decode()
+        return lst_line
+
+    @staticmethod
+    def _get_start_lineno(node):
+        # Since python 3.8, lineno of a function is the line of def
+        lineno = min(
+            [a.lineno for a in getattr(node, "decorator_list", [])]
+            + [node.lineno]
+        )
+        if (
+            getattr(node, "end_lineno", None) is None
+            and type(node) is ast.Expr
+            and type(node.value) is ast.Str
+        ):
+            # TODO remove with python 3.7, lineno of string is its last line
+            lineno -= node.value.s.count("\n")
+        return lineno
+
+    @staticmethod
+    def _get_end_lineno(node):
+        end_lineno = getattr(node, "end_lineno", None)
+        if end_lineno is None:
+            # TODO remove with python 3.7, end position is missing in ast
+            # This can be broken when finish by multiple line with not ast
+            # char like ')'
+            end_lineno = (
+                max([a.lineno for a in ast.walk(node) if hasattr(a, "lineno")])
+                + 1
+            )
+        return end_lineno
 
     def _fill_search_field(self, ast_obj, var_name=""):
         ast_obj_type = type(ast_obj)
@@ -188,13 +253,11 @@ class ExtractorModuleFile:
         # node is ast of field
         # class_line is int, ignore comment before, because comment is outside class
         # Will update directly dict of field with comment information
-        lst_comment = list(
-            filter(
-                lambda x: x.get("use") is False
-                and class_line < x.get("line") < node.lineno,
-                self.lst_comment,
-            )
-        )
+        i_min = bisect.bisect_right(self.lst_comment_line, class_line)
+        i_max = bisect.bisect_left(self.lst_comment_line, node.lineno)
+        lst_comment = [
+            a for a in self.lst_comment[i_min:i_max] if a.get("use") is False
+        ]
         if lst_comment:
             lst_str_comment = []
             for cmt in lst_comment:
@@ -203,13 +266,10 @@ class ExtractorModuleFile:
             comment = "\n".join(lst_str_comment)
             d["comment_before"] = comment
         if is_last_item_of_class:
-            lst_comment = list(
-                filter(
-                    lambda x: x.get("use") is False
-                    and x.get("line") > node.lineno,
-                    self.lst_comment,
-                )
-            )
+            i_min = bisect.bisect_right(self.lst_comment_line, node.lineno)
+            lst_comment = [
+                a for a in self.lst_comment[i_min:] if a.get("use") is False
+            ]
             if lst_comment:
                 lst_str_comment = []
                 for cmt in lst_comment:
@@ -310,155 +370,35 @@ class ExtractorModuleFile:
                 str_args += self._write_exact_argument(value)
         return str_args
 
-    def _get_nb_line_multiple_string(
-        self, item, lst_line, i_lineno, extra_size=2
-    ):
-        str_size = len(item.s)
-        line_size = len(lst_line[i_lineno - 1].strip())
-        if line_size != str_size + extra_size:
-            # Try detect multiline string with pending technique like
-            # """test1"""
-            # """test2"""
-            # This will be """test1test2"""
-            # or
-            # "test1"
-            # "test2"
-            # This will be "test1test2"
-            # So if next line is bigger size then full string, it's the end of multiple string line
-            i = 0
-            line_size += len(lst_line[i_lineno + i].strip())
-            while line_size < str_size + extra_size:
-                i += 1
-                line_size += len(lst_line[i_lineno + i].strip())
-            i_lineno += i + 1
-        return i_lineno
-
-    def _get_recursive_lineno(self, item, set_lineno, lst_line):
-        if hasattr(item, "lineno"):
-            lineno = getattr(item, "lineno")
-            if lineno:
-                i_lineno = item.lineno
-                if type(item) is ast.Str:
-                    if "\n" in item.s:
-                        # -1 to ignore last \n
-                        i_lineno = item.lineno - item.s.count("\n")
-                    elif lst_line[i_lineno - 1][-3:] == '"""':
-                        i_lineno = self._get_nb_line_multiple_string(
-                            item, lst_line, i_lineno, extra_size=6
-                        )
-                    elif lst_line[i_lineno - 1][-1] == '"':
-                        i_lineno = self._get_nb_line_multiple_string(
-                            item, lst_line, i_lineno
-                        )
-                set_lineno.add(i_lineno)
-
-        # Do recursive search, search last line of code
-        lst_attr = [
-            "body",
-            "finalbody",
-            "orelse",
-            "handlers",
-            "test",
-            "right",
-            "left",
-            "value",
-            "exc",
-            "ctx",
-            "func",
-            "args",
-            "elts",
-        ]
-        for attr in lst_attr:
-            if not hasattr(item, attr):
-                continue
-            lst_attr_item = getattr(item, attr)
-            if not lst_attr_item:
-                continue
-            if type(lst_attr_item) is list:
-                for attr_item in lst_attr_item:
-                    if attr_item:
-                        self._get_recursive_lineno(
-                            attr_item, set_lineno, lst_line
-                        )
-            elif type(lst_attr_item) in (
-                ast.Compare,
-                ast.Call,
-                ast.Str,
-                ast.Num,
-                ast.Attribute,
-                ast.JoinedStr,
-                ast.BinOp,
-                ast.NameConstant,
-                ast.Name,
-                ast.arguments,
-                ast.Load,
-                ast.List,
-                ast.ListComp,
-                ast.IfExp,
-                ast.Subscript,
-                ast.UnaryOp,
-                ast.BoolOp,
-                ast.Dict,
-                ast.Tuple,
-                ast.Yield,
-                bool,
-            ):
-                # Check type, but in fact, can accept all type.
-                # This check is only to understand what style of code we read
-                self._get_recursive_lineno(lst_attr_item, set_lineno, lst_line)
-            else:
-                # TODO robot study me by updating ast
-                try:
-                    self._get_recursive_lineno(
-                        lst_attr_item, set_lineno, lst_line
-                    )
-                    _logger.warning(
-                        f"From get recursive '{attr}' unknown type, add type"
-                        f" '{type(lst_attr_item)}'"
-                    )
-                except Exception as e:
-                    _logger.warning(
-                        f"From get recursive '{attr}' unknown type"
-                        f" {type(lst_attr_item)}."
-                    )
-
-    def _get_min_max_no_line(self, node, lst_line):
-        # hint node.name == ""
-        set_lineno = set()
-        lst_body = []
-        if len(node.body) > 1:
-            lst_body.append(node.body[0])
-            lst_body.append(node.body[-1])
-        else:
-            lst_body.append(node.body[0])
-        # Special case, detect comment before body, we know it's inside the method here
-        # TODO wait after python 3.8 to detect comment in AST. Else search manually
-        i = node.body[0].lineno - 2
-        last_line = lst_line[i]
-        while i >= 0 and last_line.strip().startswith("#"):
-            i -= 1
-            last_line = lst_line[i]
-        i += 1
-        if i <= node.body[0].lineno - 2:
-            set_lineno.add(i + 1)
-        for body in lst_body:
-            self._get_recursive_lineno(body, set_lineno, lst_line)
-        return min(set_lineno), max(set_lineno)
+    def _get_body_span(self, node):
+        """
+        Get first and last line of the body of a function, comments before
+        the first statement are included
+        :param node:
+        :return: tuple (no_line_min, no_line_max)
+        """
+        no_line_min = self._get_start_lineno(node.body[0])
+        while (
+            no_line_min - 1 > node.lineno
+            and no_line_min - 1 in self.set_comment_line
+        ):
+            no_line_min -= 1
+        return no_line_min, self._get_end_lineno(node.body[-1])
 
     def search_import(self):
         # get all line until meet "class "
-        i = 0
-        for line in self.lst_line:
-            if line.startswith("class "):
-                break
-            i += 1
+        if self.f_lines.startswith("class "):
+            i = 0
         else:
-            _logger.warning(
-                "Don't know what to do when missing class in python file..."
-            )
+            i = self.f_lines.find("\nclass ")
+            if i == -1:
+                _logger.warning(
+                    "Don't know what to do when missing class in python"
+                    " file..."
+                )
+                i = len(self.f_lines)
 
-        str_code = "\n".join(self.lst_line[:i])
-        str_code = str_code.strip()
+        str_code = self.f_lines[:i].strip()
         if "'''" in str_code:
             str_code = str_code.replace("'''", "\\'''")
         if "\\n" in str_code:
@@ -567,37 +507,27 @@ class ExtractorModuleFile:
                             node.decorator_list
                         )
                         d["decorator"] = str_decorator
-                    no_line_min, no_line_max = self._get_min_max_no_line(
-                        node, self.lst_line
-                    )
+                    no_line_min, no_line_max = self._get_body_span(node)
                     _logger.debug(
                         f"Extract code from mode '{self.model}', file"
                         f" '{self.py_filename}'"
                     )
-                    # TODO why calculate max if patch this with next node min?
-                    # Ignore this no_line_max, bug some times.
-                    no_line_min = min(
-                        min([a.lineno for a in node.body]), no_line_min
-                    )
+                    # Keep comments between this node and the next one
                     if next_node:
-                        no_line_max = next_node.lineno - 1
+                        no_line_max = self._get_start_lineno(next_node) - 1
                     elif self.next_model_ast:
-                        no_line_max = self.next_model_ast.lineno - 1
-                    else:
-                        # TODO this will bug with multiple class
-                        # This can be broken when finish by multiple line with not ast char like ')'
-                        # no_line_max = len(self.lst_line)
-                        no_line_max += 1
+                        no_line_max = (
+                            self._get_start_lineno(self.next_model_ast) - 1
+                        )
                     codes = ""
-                    if no_line_max >= len(self.lst_line):
-                        no_line_max = len(self.lst_line) - 1
-                    for line in self.lst_line[no_line_min - 1 : no_line_max]:
+                    if no_line_max >= len(self.lst_line_offset):
+                        no_line_max = len(self.lst_line_offset) - 1
+                    for line in self._get_lines(no_line_min, no_line_max):
                         if line.startswith(" " * 8):
                             str_line = line[8:]
                         else:
                             str_line = line
                         codes += f"{str_line}\n"
-                    # codes = "\n".join(self.lst_line[no_line_min - 1:no_line_max])
                 codes = (
                     codes.replace("'''", "\\'''")
                     .replace("\\n", "\\\\n")
@@ -0,0 +1,150 @@
+import ast
+import io
+import logging
+import os
+import tokenize
+
+_logger = logging.getLogger(__name__)
+
+
+class ExtractorModuleIndex:
+    """
+    Per-generation index of python files of template modules, each file is
+    parsed once and shared by all ExtractorModule. An entry is invalidated
+    when the mtime of the file change.
+    """
+
+    def __init__(self):
+        # path -> (mtime, source, dct_model, lst_comment, lst_line_offset)
+        # dct_model: model name -> (class_model_ast, next_model_ast)
+        self._dct_file = {}
+        self.nb_parse = 0
+        self.nb_hit = 0
+
+    @staticmethod
+    def _get_lst_model_name(class_ast):
+        """
+        Util function to get values of _name and _inherit of a class
+        :param class_ast:
+        :return: list of model name
+        """
+        lst_model_name = []
+        for node in class_ast.body:
+            if not (
+                type(node) is ast.Assign
+                and node.targets
+                and type(node.targets[0]) is ast.Name
+                and node.targets[0].id in ("_name", "_inherit")
+            ):
+                continue
+            if type(node.value) is ast.Str:
+                lst_model_name.append(node.value.s)
+            elif type(node.value) is ast.List:
+                lst_model_name.extend(
+                    [a.s for a in node.value.elts if type(a) is ast.Str]
+                )
+        return lst_model_name
+
+    @staticmethod
+    def _index_ast(f_ast):
+        """
+        Map model name to the first class declaring it and its next node
+        :param f_ast:
+        :return: dict model name -> (class_model_ast, next_model_ast)
+        """
+        dct_model = {}
+        lst_children = f_ast.body
+        for i, children in enumerate(lst_children):
+            # TODO check bases of class if equal models.Model
+            if type(children) is not ast.ClassDef:
+                continue
+            next_children = (
+                lst_children[i + 1] if i + 1 < len(lst_children) else None
+            )
+            for model_name in ExtractorModuleIndex._get_lst_model_name(
+                children
+            ):
+                dct_model.setdefault(model_name, (children, next_children))
+        return dct_model
+
+    @staticmethod
+    def _get_lst_comment(f_lines, py_file):
+        """
+        Tokenize the source to find comments alone on their line, a # inside
+        a string is not a comment
+        :param f_lines:
+        :param py_file:
+        :return: list of tuple (lineno, comment), ordered by lineno
+        """
+        # TODO missing support when comment is at the end of code
+        lst_comment = []
+        try:
+            for token in tokenize.generate_tokens(
+                io.StringIO(f_lines).readline
+            ):
+                if (
+                    token.type == tokenize.COMMENT
+                    and not token.line[: token.start[1]].strip()
+                ):
+                    lst_comment.append((token.start[0], token.string))
+        except (tokenize.TokenError, SyntaxError) as e:
+            _logger.warning(f"Cannot tokenize file {py_file}: {e}")
+        return lst_comment
+
+    @staticmethod
+    def _get_lst_line_offset(f_lines):
+        """
+        Index of the first character of each line of the source
+        :param f_lines:
+        :return: list of offset, line 1 is at index 0
+        """
+        lst_line_offset = [0]
+        i = f_lines.find("\n")
+        while i != -1:
+            lst_line_offset.append(i + 1)
+            i = f_lines.find("\n", i + 1)
+        return lst_line_offset
+
+    def _get_file(self, py_file):
+        """
+        Get the indexed file, parse it when unknown or modified
+        :param py_file:
+        :return: tuple (source, dct_model, lst_comment, lst_line_offset)
+        """
+        mtime = os.stat(py_file).st_mtime_ns
+        entry = self._dct_file.get(py_file)
+        if entry and entry[0] == mtime:
+            self.nb_hit += 1
+            return entry[1:]
+        with open(py_file, "r") as source:
+            f_lines = source.read()
+        # TODO use ast.parse(f_lines, type_comments=True), need python 3.8
+        f_ast = ast.parse(f_lines)
+        self.nb_parse += 1
+        dct_model = self._index_ast(f_ast)
+        lst_comment = self._get_lst_comment(f_lines, py_file)
+        lst_line_offset = self._get_lst_line_offset(f_lines)
+        self._dct_file[py_file] = (
+            mtime,
+            f_lines,
+            dct_model,
+            lst_comment,
+            lst_line_offset,
+        )
+        return f_lines, dct_model, lst_comment, lst_line_offset
+
+    def get_class_model(self, py_file, model):
+        """
+        Search class of model in a python file
+        :param py_file:
+        :param model: value of _name or _inherit
+        :return: tuple (source, class_model_ast, next_model_ast, lst_comment,
+            lst_line_offset), None when not found
+        """
+        f_lines, dct_model, lst_comment, lst_line_offset = self._get_file(
+            py_file
+        )
+        class_model = dct_model.get(model)
+        if not class_model:
+            return None
+        return (f_lines, *class_model, lst_comment, lst_line_offset)
@@ -1,11 +1,13 @@
+import copy
 import glob
 import logging
 import os
-import xml.dom.minicompat
+import sys
 from collections import defaultdict
 from xml.dom import Node, minidom
 
 import unidecode
+from lxml import etree as ET
 
 _logger = logging.getLogger(__name__)
 
@@ -163,16 +165,72 @@ class ExtractorView:
             # If need to associated
             # menu_id.m2o_module = self._module.id
 
+    @staticmethod
+    def _get_dct_element_by_tag(root):
+        """
+        Util function to index elements of a view by tag in one traversal,
+        in document order like getElementsByTagName
+        :param root: lxml root element
+        :return: dict tag -> list of elements
+        """
+        dct_element = defaultdict(list)
+        for element in root.iter(tag=ET.Element):
+            dct_element[element.tag].append(element)
+        return dct_element
+
+    @staticmethod
+    def _iter_child_node(node):
+        """
+        Util function to iterate text and element children in order, like
+        childNodes of minidom. Comments are ignored.
+        :param node: lxml element
+        :return: generator of str for text, else element
+        """
+        if node.text:
+            yield node.text
+        for child in node:
+            if type(child.tag) is str:
+                yield child
+            if child.tail:
+                yield child.tail
+
+    @staticmethod
+    def _get_xml_like_minidom(node):
+        """
+        Util function to serialize a node like toxml() of minidom, without
+        parsing it again
+        :param node: lxml element
+        :return: str
+        """
+        if sys.version_info < (3, 8):
+            # minidom sorts attributes before python 3.8
+            node = copy.deepcopy(node)
+            for element in node.iter(tag=ET.Element):
+                lst_item = sorted(element.items())
+                element.attrib.clear()
+                for key, value in lst_item:
+                    element.set(key, value)
+        node_xml = ET.tostring(node, encoding="unicode", with_tail=False)
+        # lxml escapes whitespace in attribute, minidom keeps it
+        for char_ref, char in (
+            ("&#10;", "\n"),
+            ("&#9;", "\t"),
+            ("&#13;", "\r"),
+        ):
+            node_xml = node_xml.replace(char_ref, char)
+        return node_xml
+
     def _parse_view_ids(self):
         for view_id in self.view_ids:
-            mydoc = minidom.parseString(view_id.arch_base.encode())
+            root = ET.fromstring(view_id.arch_base.encode())
+            dct_element = self._get_dct_element_by_tag(root)
 
             lst_view_item_id = []
 
             dct_view_attr = {}
 
             # Search graph
-            lst_graph_xml = mydoc.getElementsByTagName("graph")
+            lst_graph_xml = dct_element["graph"]
             if lst_graph_xml:
                 if len(lst_graph_xml) != 1:
                     _logger.warning(
@@ -181,10 +239,10 @@ class ExtractorView:
                     )
                 else:
                     graph_view = lst_graph_xml[0]
-                    dct_view_attr.update(dict(graph_view.attributes.items()))
+                    dct_view_attr.update(graph_view.attrib)
 
             # Search search
-            lst_search_xml = mydoc.getElementsByTagName("search")
+            lst_search_xml = dct_element["search"]
             if lst_search_xml:
                 if len(lst_search_xml) != 1:
                     _logger.warning(
@@ -193,10 +251,10 @@ class ExtractorView:
                     )
                 else:
                     search_view = lst_search_xml[0]
-                    dct_view_attr.update(dict(search_view.attributes.items()))
+                    dct_view_attr.update(search_view.attrib)
 
             # Search pivot
-            lst_pivot_xml = mydoc.getElementsByTagName("pivot")
+            lst_pivot_xml = dct_element["pivot"]
             if lst_pivot_xml:
                 if len(lst_pivot_xml) != 1:
                     _logger.warning(
@@ -205,10 +263,10 @@ class ExtractorView:
                     )
                 else:
                     pivot_view = lst_pivot_xml[0]
-                    dct_view_attr.update(dict(pivot_view.attributes.items()))
+                    dct_view_attr.update(pivot_view.attrib)
 
             # Search kanban
-            lst_kanban_xml = mydoc.getElementsByTagName("kanban")
+            lst_kanban_xml = dct_element["kanban"]
             if lst_kanban_xml:
                 if len(lst_kanban_xml) != 1:
                     _logger.warning(
@@ -217,10 +275,10 @@ class ExtractorView:
                     )
                 else:
                     kanban_view = lst_kanban_xml[0]
-                    dct_view_attr.update(dict(kanban_view.attributes.items()))
+                    dct_view_attr.update(kanban_view.attrib)
 
             # Search form
-            lst_form_xml = mydoc.getElementsByTagName("form")
+            lst_form_xml = dct_element["form"]
             if lst_form_xml:
                 if len(lst_form_xml) != 1:
                     _logger.warning(
@@ -229,11 +287,10 @@ class ExtractorView:
                     )
                 else:
                     form_view = lst_form_xml[0]
-                    dct_view_attr.update(dict(form_view.attributes.items()))
+                    dct_view_attr.update(form_view.attrib)
                 sequence_form = 10
-                lst_form_field_xml = mydoc.getElementsByTagName("field")
-                for field_xml in lst_form_field_xml:
-                    field_name = dict(field_xml.attributes.items()).get("name")
+                for field_xml in dct_element["field"]:
+                    field_name = field_xml.get("name")
                     if field_name in self.dct_model[view_id.model]:
                         self.dct_model[view_id.model][field_name][
                             "code_generator_form_simple_view_sequence"
@@ -245,7 +302,7 @@ class ExtractorView:
                     sequence_form += 1
 
             # Search tree
-            lst_tree_xml = mydoc.getElementsByTagName("tree")
+            lst_tree_xml = dct_element["tree"]
             if lst_tree_xml:
                 if len(lst_tree_xml) != 1:
                     _logger.warning(
@@ -254,11 +311,10 @@ class ExtractorView:
                     )
                 else:
                     tree_view = lst_tree_xml[0]
-                    dct_view_attr.update(dict(tree_view.attributes.items()))
+                    dct_view_attr.update(tree_view.attrib)
                 sequence_tree = 10
-                lst_tree_field_xml = mydoc.getElementsByTagName("field")
-                for field_xml in lst_tree_field_xml:
-                    field_name = dict(field_xml.attributes.items()).get("name")
+                for field_xml in dct_element["field"]:
+                    field_name = field_xml.get("name")
                     if field_name in self.dct_model[view_id.model]:
                         self.dct_model[view_id.model][field_name][
                             "code_generator_tree_view_sequence"
@@ -270,7 +326,7 @@ class ExtractorView:
                     sequence_tree += 1
 
             # Search timeline
-            lst_timeline_xml = mydoc.getElementsByTagName("timeline")
+            lst_timeline_xml = dct_element["timeline"]
             if lst_timeline_xml:
                 if len(lst_timeline_xml) != 1:
                     _logger.warning(
@@ -279,29 +335,19 @@ class ExtractorView:
                     )
                 else:
                     timeline_view = lst_timeline_xml[0]
-                    dct_view_attr.update(
-                        dict(timeline_view.attributes.items())
-                    )
+                    dct_view_attr.update(timeline_view.attrib)
                 for timeline_xml in lst_timeline_xml:
-                    if "date_start" in timeline_xml.attributes.keys():
+                    if "date_start" in timeline_xml.attrib:
                         del dct_view_attr["date_start"]
-                        field_name = (
-                            timeline_xml.attributes["date_start"]
-                            .childNodes[0]
-                            .data
-                        )
+                        field_name = timeline_xml.get("date_start")
                         for field_id in self.model_id.field_id:
                             if field_id.name == field_name:
                                 self.dct_field[field_name][
                                     "is_date_start_view"
                                 ] = True
-                    if "date_stop" in timeline_xml.attributes.keys():
+                    if "date_stop" in timeline_xml.attrib:
                         del dct_view_attr["date_stop"]
-                        field_name = (
-                            timeline_xml.attributes["date_stop"]
-                            .childNodes[0]
-                            .data
-                        )
+                        field_name = timeline_xml.get("date_stop")
                         for field_id in self.model_id.field_id:
                             if field_id.name == field_name:
                                 self.dct_field[field_name][
@@ -309,7 +355,7 @@ class ExtractorView:
                                 ] = True
 
             # Search diagram
-            lst_diagram_xml = mydoc.getElementsByTagName("diagram")
+            lst_diagram_xml = dct_element["diagram"]
             if lst_diagram_xml:
                 nb_iter = 0
                 for diagram_xml in lst_diagram_xml:
@@ -332,99 +378,94 @@ class ExtractorView:
                     arrow_source = None
                     arrow_destination = None
                     diagram_label_string = None
-                    for child_div in diagram_xml.childNodes:
-                        if child_div.nodeType is Node.ELEMENT_NODE:
-                            dct_att = dict(child_div.attributes.items())
-                            if child_div.nodeName == "node":
-                                find_node = True
-                                node_object = dct_att.get("object")
-                                node_xpos = dct_att.get("xpos")
-                                node_ypos = dct_att.get("ypos")
-                                node_shape = dct_att.get("shape")
-                                node_form_view_ref = dct_att.get(
-                                    "form_view_ref"
+                    for child_div in diagram_xml.iterchildren(ET.Element):
+                        dct_att = child_div.attrib
+                        if child_div.tag == "node":
+                            find_node = True
+                            node_object = dct_att.get("object")
+                            node_xpos = dct_att.get("xpos")
+                            node_ypos = dct_att.get("ypos")
+                            node_shape = dct_att.get("shape")
+                            node_form_view_ref = dct_att.get("form_view_ref")
+                            if not node_object:
+                                _logger.warning(
+                                    "Missing diagram node object for"
+                                    f" model {self.var_model}"
+                                )
+                                find_node = False
+                            if not node_xpos:
+                                _logger.warning(
+                                    "Missing diagram node xpos for"
+                                    f" model {self.var_model}"
+                                )
+                                find_node = False
+                            if not node_ypos:
+                                _logger.warning(
+                                    "Missing diagram node ypos for"
+                                    f" model {self.var_model}"
+                                )
+                                find_node = False
+                            if not node_shape:
+                                _logger.warning(
+                                    "Missing diagram node shape for"
+                                    f" model {self.var_model}"
+                                )
+                                find_node = False
+                            if not node_form_view_ref:
+                                _logger.warning(
+                                    "Missing diagram node"
+                                    " form_view_ref for model"
+                                    f" {self.var_model}"
+                                )
+                                find_node = False
+                        if child_div.tag == "arrow":
+                            find_arrow = True
+                            arrow_object = dct_att.get("object")
+                            arrow_source = dct_att.get("source")
+                            arrow_destination = dct_att.get("destination")
+                            arrow_label = dct_att.get("label")
+                            arrow_form_view_ref = dct_att.get("form_view_ref")
+                            if not arrow_object:
+                                _logger.warning(
+                                    "Missing diagram arrow object for"
+                                    f" model {self.var_model}"
+                                )
+                                find_arrow = False
+                            if not arrow_source:
+                                _logger.warning(
+                                    "Missing diagram arrow source for"
+                                    f" model {self.var_model}"
+                                )
+                                find_arrow = False
+                            if not arrow_destination:
+                                _logger.warning(
+                                    "Missing diagram arrow"
+                                    " destination for model"
+                                    f" {self.var_model}"
+                                )
+                                find_arrow = False
+                            if not arrow_label:
+                                _logger.warning(
+                                    "Missing diagram arrow label for"
+                                    f" model {self.var_model}"
+                                )
+                                find_arrow = False
+                            if not arrow_form_view_ref:
+                                _logger.warning(
+                                    "Missing diagram arrow"
+                                    " form_view_ref for model"
+                                    f" {self.var_model}"
                                 )
-                                if not node_object:
-                                    _logger.warning(
-                                        "Missing diagram node object for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_node = False
-                                if not node_xpos:
-                                    _logger.warning(
-                                        "Missing diagram node xpos for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_node = False
-                                if not node_ypos:
-                                    _logger.warning(
-                                        "Missing diagram node ypos for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_node = False
-                                if not node_shape:
-                                    _logger.warning(
-                                        "Missing diagram node shape for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_node = False
-                                if not node_form_view_ref:
-                                    _logger.warning(
-                                        "Missing diagram node"
-                                        " form_view_ref for model"
-                                        f" {self.var_model}"
-                                    )
-                                    find_node = False
-                            if child_div.nodeName == "arrow":
-                                find_arrow = True
-                                arrow_object = dct_att.get("object")
-                                arrow_source = dct_att.get("source")
-                                arrow_destination = dct_att.get("destination")
-                                arrow_label = dct_att.get("label")
-                                arrow_form_view_ref = dct_att.get(
-                                    "form_view_ref"
+                                find_arrow = False
+                        if child_div.tag == "label":
+                            find_label = True
+                            diagram_label_string = dct_att.get("string")
+                            if not diagram_label_string:
+                                _logger.warning(
+                                    "Missing diagram label string"
+                                    f" for model {self.var_model}"
                                 )
-                                if not arrow_object:
-                                    _logger.warning(
-                                        "Missing diagram arrow object for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_arrow = False
-                                if not arrow_source:
-                                    _logger.warning(
-                                        "Missing diagram arrow source for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_arrow = False
-                                if not arrow_destination:
-                                    _logger.warning(
-                                        "Missing diagram arrow"
-                                        " destination for model"
-                                        f" {self.var_model}"
-                                    )
-                                    find_arrow = False
-                                if not arrow_label:
-                                    _logger.warning(
-                                        "Missing diagram arrow label for"
-                                        f" model {self.var_model}"
-                                    )
-                                    find_arrow = False
-                                if not arrow_form_view_ref:
-                                    _logger.warning(
-                                        "Missing diagram arrow"
-                                        " form_view_ref for model"
-                                        f" {self.var_model}"
-                                    )
-                                    find_arrow = False
-                            if child_div.nodeName == "label":
-                                find_label = True
-                                diagram_label_string = dct_att.get("string")
-                                if not diagram_label_string:
-                                    _logger.warning(
-                                        "Missing diagram label string"
-                                        f" for model {self.var_model}"
-                                    )
-                                    find_label = False
+                                find_label = False
                     if find_node and find_arrow:
                         self.model_id.diagram_node_object = node_object
                         self.model_id.diagram_node_xpos_field = node_xpos
@@ -444,30 +485,24 @@ class ExtractorView:
                             )
 
             # Search oe_chatter activity message_ids or message_follower_ids
-            lst_div_xml = mydoc.getElementsByTagName("div")
+            lst_div_xml = dct_element["div"]
             if lst_div_xml:
                 for div_xml in lst_div_xml:
-                    if (
-                        "class",
-                        "oe_chatter",
-                    ) in div_xml.attributes.items():
-                        for child_div in div_xml.childNodes:
-                            if child_div.nodeType is Node.ELEMENT_NODE:
-                                lst_value = dict(
-                                    child_div.attributes.items()
-                                ).values()
-                                if (
-                                    "activity_ids" in lst_value
-                                    or "message_ids" in lst_value
-                                    or "message_follower_ids" in lst_value
-                                ):
-                                    # self.model_id.write(
-                                    #     {"enable_activity": True}
-                                    # )
-                                    self.model_id.enable_activity = True
+                    if div_xml.get("class") == "oe_chatter":
+                        for child_div in div_xml.iterchildren(ET.Element):
+                            lst_value = child_div.attrib.values()
+                            if (
+                                "activity_ids" in lst_value
+                                or "message_ids" in lst_value
+                                or "message_follower_ids" in lst_value
+                            ):
+                                # self.model_id.write(
+                                #     {"enable_activity": True}
+                                # )
+                                self.model_id.enable_activity = True
 
             # Sheet
-            lst_sheet_xml = mydoc.getElementsByTagName("sheet")
+            lst_sheet_xml = dct_element["sheet"]
             has_body_sheet = bool(lst_sheet_xml)
             sheet_xml = lst_sheet_xml[0] if lst_sheet_xml else None
             if len(lst_sheet_xml) > 1:
@@ -476,17 +511,17 @@ class ExtractorView:
             # Search header
             header_xml = None
             no_sequence = 1
-            lst_header_xml = mydoc.getElementsByTagName("header")
+            lst_header_xml = dct_element["header"]
             if len(lst_header_xml) > 1:
                 _logger.warning("Cannot support multiple header.")
             for header_xml in lst_header_xml:
                 # TODO get inside attributes for header
-                for child_header in header_xml.childNodes:
-                    if child_header.nodeType is Node.TEXT_NODE:
-                        data = child_header.data.strip()
+                for child_header in self._iter_child_node(header_xml):
+                    if type(child_header) is str:
+                        data = child_header.strip()
                         if data:
                             _logger.warning("Not supported.")
-                    elif child_header.nodeType is Node.ELEMENT_NODE:
+                    else:
                         self._extract_child_xml(
                             child_header,
                             lst_view_item_id,
@@ -497,17 +532,17 @@ class ExtractorView:
             # Search footer
             footer_xml = None
             no_sequence = 1
-            lst_footer_xml = mydoc.getElementsByTagName("footer")
+            lst_footer_xml = dct_element["footer"]
             if len(lst_footer_xml) > 1:
                 _logger.warning("Cannot support multiple footer.")
             for footer_xml in lst_footer_xml:
                 # TODO get inside attributes for footer
-                for child_footer in footer_xml.childNodes:
-                    if child_footer.nodeType is Node.TEXT_NODE:
-                        data = child_footer.data.strip()
+                for child_footer in self._iter_child_node(footer_xml):
+                    if type(child_footer) is str:
+                        data = child_footer.strip()
                         if data:
                             _logger.warning("Not supported.")
-                    elif child_footer.nodeType is Node.ELEMENT_NODE:
+                    else:
                         self._extract_child_xml(
                             child_footer,
                             lst_view_item_id,
@@ -519,52 +554,47 @@ class ExtractorView:
             no_sequence = 1
             nb_oe_title = 0
             div_title = None
-            for div_xml in mydoc.getElementsByTagName("div"):
+            for div_xml in dct_element["div"]:
                 # Find oe_title class
                 # TODO what todo when multiple class? split by ,
-                for key, value in div_xml.attributes.items():
-                    if key == "class" and value == "oe_title":
-                        div_title = div_xml
-                        nb_oe_title += 1
-                        if nb_oe_title > 1:
-                            _logger.warning(
-                                "Cannot support multiple class oe_title."
-                            )
-                            continue
-                        # TODO support multiple element in title
-                        lst_field = div_xml.getElementsByTagName("field")
-                        if not lst_field:
-                            _logger.warning(
-                                "Not supported title without field, TODO."
-                            )
-                        elif len(lst_field) > 1:
-                            _logger.warning(
-                                "Not supported title without multiple"
-                                " field, TODO."
-                            )
-                        else:
-                            dct_field_attrs = dict(
-                                div_xml.getElementsByTagName("field")[
-                                    0
-                                ].attributes.items()
-                            )
-                            name = dct_field_attrs.get("name")
-                            if not name:
-                                _logger.warning(
-                                    "Cannot identify field type in title."
-                                )
-                            else:
-                                dct_attributes = {
-                                    "action_name": name,
-                                    "section_type": "title",
-                                    "item_type": "field",
-                                    "sequence": no_sequence,
-                                }
-                                view_item_id = self.env[
-                                    "code.generator.view.item"
-                                ].create(dct_attributes)
-                                lst_view_item_id.append(view_item_id.id)
-                                no_sequence += 1
+                if div_xml.get("class") != "oe_title":
+                    continue
+                div_title = div_xml
+                nb_oe_title += 1
+                if nb_oe_title > 1:
+                    _logger.warning(
+                        "Cannot support multiple class oe_title."
+                    )
+                    continue
+                # TODO support multiple element in title
+                lst_field = list(div_xml.iter("field"))
+                if not lst_field:
+                    _logger.warning(
+                        "Not supported title without field, TODO."
+                    )
+                elif len(lst_field) > 1:
+                    _logger.warning(
+                        "Not supported title without multiple"
+                        " field, TODO."
+                    )
+                else:
+                    name = lst_field[0].get("name")
+                    if not name:
+                        _logger.warning(
+                            "Cannot identify field type in title."
+                        )
+                    else:
+                        dct_attributes = {
+                            "action_name": name,
+                            "section_type": "title",
+                            "item_type": "field",
+                            "sequence": no_sequence,
+                        }
+                        view_item_id = self.env[
+                            "code.generator.view.item"
+                        ].create(dct_attributes)
+                        lst_view_item_id.append(view_item_id.id)
+                        no_sequence += 1
 
             lst_body_xml = []
             lst_tag_support = list(
@@ -575,17 +605,11 @@ class ExtractorView:
                 ).keys()
             )
             lst_tag_support_xpath = ["xpath"]
-            lst_content = [
-                b
-                for a in lst_tag_support
-                for b in mydoc.getElementsByTagName(a)
-            ]
+            lst_content = [b for a in lst_tag_support for b in dct_element[a]]
             lst_content_xpath = [
-                b
-                for a in lst_tag_support_xpath
-                for b in mydoc.getElementsByTagName(a)
+                b for a in lst_tag_support_xpath for b in dct_element[a]
             ]
-            has_content = any(lst_content + lst_content_xpath)
+            has_content = bool(lst_content or lst_content_xpath)
             if not has_content:
                 _logger.warning(
                     "Cannot find a xml type from list:"
@@ -597,12 +621,12 @@ class ExtractorView:
                 lst_body_xml = lst_content_xpath
             else:
                 form_xml = lst_content[0]
-                for child_form in form_xml.childNodes:
-                    if child_form.nodeType is Node.TEXT_NODE:
-                        data = child_form.data.strip()
+                for child_form in self._iter_child_node(form_xml):
+                    if type(child_form) is str:
+                        data = child_form.strip()
                         if data:
                             _logger.warning("Not supported.")
-                    elif child_form.nodeType is Node.ELEMENT_NODE:
+                    else:
                         if (
                             child_form == div_title
                             or child_form == header_xml
@@ -623,24 +647,19 @@ class ExtractorView:
 
             if lst_sheet_xml:
                 # TODO validate this, test with and without <sheet>
-                if type(lst_sheet_xml) is xml.dom.minicompat.NodeList:
-                    lst_body_xml = [
-                        a
-                        for a in lst_sheet_xml[0].childNodes
-                        if a != footer_xml
-                    ]
-                else:
-                    lst_body_xml = [
-                        a for a in lst_sheet_xml.childNodes if a != footer_xml
-                    ]
+                lst_body_xml = [
+                    a
+                    for a in self._iter_child_node(lst_sheet_xml[0])
+                    if a is not footer_xml
+                ]
             sequence = 1
             lst_node = []
             for body_xml in lst_body_xml:
-                if body_xml.nodeType is Node.TEXT_NODE:
-                    data = body_xml.data.strip()
+                if type(body_xml) is str:
+                    data = body_xml.strip()
                     if data:
                         _logger.warning(f"Not supported : {data}.")
-                elif body_xml.nodeType is Node.ELEMENT_NODE:
+                else:
                     status = self._extract_child_xml(
                         body_xml,
                         lst_view_item_id,
@@ -752,11 +771,11 @@ class ExtractorView:
         }
         dct_attributes = {
             "section_type": section_type,
-            "item_type": node.nodeName,
+            "item_type": node.tag,
             "sequence": sequence,
         }
 
-        for key, value in node.attributes.items():
+        for key, value in node.items():
             if key == "t-name":
                 dct_attributes["t_name"] = value
             elif key == "t-attf-class":
@@ -785,7 +804,7 @@ class ExtractorView:
         if parent:
             dct_attributes["parent_id"] = parent.id
 
-        if node.nodeName in (
+        if node.tag in (
             "group",
             "div",
             "templates",
@@ -799,45 +818,44 @@ class ExtractorView:
                 # Check cached of nodes
                 # maybe help node
                 for cached_node in lst_node:
-                    # TODO need to check nodeName == "separator" ?
-                    for key, value in cached_node.attributes.items():
+                    # TODO need to check tag == "separator" ?
+                    for key, value in cached_node.items():
                         if key == "string" and value == "Help":
                             dct_attributes["is_help"] = True
                         elif key == "colspan" and value != 1:
                             dct_attributes["colspan"] = value
+                node_xml = self._get_xml_like_minidom(node)
                 dct_attributes["label"] = "\n".join(
-                    [a.strip() for a in node.toxml().split("\n")[1:-1]]
+                    [a.strip() for a in node_xml.split("\n")[1:-1]]
                 )
                 dct_attributes["item_type"] = "html"
             else:
-                for key, value in node.attributes.items():
+                for key, value in node.items():
                     if key == "class":
                         if value in lst_key_html_class:
                             # not a real div, it's an html part
                             dct_attributes["item_type"] = "html"
                             dct_attributes["background_type"] = value
                             text_html = ""
-                            for child in node.childNodes:
+                            for child in self._iter_child_node(node):
                                 # ignore element, only get text
-                                if child.nodeType is Node.TEXT_NODE:
-                                    data = child.data.strip()
+                                if type(child) is str:
+                                    data = child.strip()
                                     if data:
                                         text_html += data
-                                elif child.nodeType is Node.ELEMENT_NODE:
-                                    continue
                             dct_attributes["label"] = text_html
 
-        elif node.nodeName == "button":
+        elif node.tag == "button":
             dct_key_keep["class"] = "button_type"
-            for key, value in node.attributes.items():
+            for key, value in node.items():
                 if key == "icon":
                     dct_attributes["icon"] = value
-        elif node.nodeName in ("field", "filter"):
-            for key, value in node.attributes.items():
+        elif node.tag in ("field", "filter"):
+            for key, value in node.items():
                 if key == "password":
                     dct_attributes["password"] = value
                 elif key == "widget":
-                    field_name = dict(node.attributes.items()).get("name")
+                    field_name = node.get("name")
                     # TODO update dict instead of overwrite it
                     self.module_attr[self.var_model][field_name] = {
                         "force_widget": value
@@ -848,27 +866,27 @@ class ExtractorView:
                     dct_attributes["name"] = value
                 elif key == "type":
                     dct_attributes["type"] = value
-        elif node.nodeName in ("xpath",):
-            for key, value in node.attributes.items():
+        elif node.tag in ("xpath",):
+            for key, value in node.items():
                 if key == "expr":
                     dct_attributes["expr"] = value
                 elif key == "position":
                     dct_attributes["position"] = value
-        elif node.nodeName == "separator":
+        elif node.tag == "separator":
             # Accumulate nodes
             return True
-        elif node.nodeName == "templates":
+        elif node.tag == "templates":
             _logger.warning(f"Node template is not supported, ignore it.")
             return
-        elif node.nodeName in ("node", "arrow", "label"):
+        elif node.tag in ("node", "arrow", "label"):
             # Ignore it, this is the diagram, it's supported somewhere else
             return
         else:
-            _logger.warning(f"Unknown this case '{node.nodeName}'.")
+            _logger.warning(f"Unknown this case '{node.tag}'.")
             return
 
-        # TODO use external function to get attributes items to remove duplicate code, search "node.attributes.items()"
-        for key, value in node.attributes.items():
+        # TODO use external function to get attributes items to remove duplicate code, search "node.items()"
+        for key, value in node.items():
             attributes_name = dct_key_keep.get(key)
             if attributes_name:
                 dct_attributes[attributes_name] = value
@@ -896,12 +914,12 @@ class ExtractorView:
         # Child, except HTML
         if dct_attributes["item_type"] != "html":
             child_sequence = 1
-            for child in node.childNodes:
-                if child.nodeType is Node.TEXT_NODE:
-                    data = child.data.strip()
+            for child in self._iter_child_node(node):
+                if type(child) is str:
+                    data = child.strip()
                     if data:
                         _logger.warning(f"Not supported : {data}.")
-                elif child.nodeType is Node.ELEMENT_NODE:
+                else:
                     self._extract_child_xml(
                         child,
                         lst_view_item_id,
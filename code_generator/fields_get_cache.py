@@ -0,0 +1,28 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FieldsGetCache:
+    """
+    Per-generation cache of fields_get, the description of all fields of a
+    model is computed once and shared by all writers.
+    """
+
+    def __init__(self, env):
+        self._env = env
+        # model name -> dict field name -> description
+        self._dct_model = {}
+
+    def get(self, model_name, field_name):
+        """
+        Get description of a field, like fields_get(field_name)
+        :param model_name:
+        :param field_name:
+        :return: dict, None when field is missing
+        """
+        dct_field = self._dct_model.get(model_name)
+        if dct_field is None:
+            dct_field = self._env[model_name].fields_get()
+            self._dct_model[model_name] = dct_field
+        return dct_field.get(field_name)
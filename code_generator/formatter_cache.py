@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_AGE = 30 * 24 * 3600
+DEFAULT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+# Seconds between two prune of the cache directory
+PRUNE_INTERVAL = 24 * 3600
+PRUNE_STAMP_FILENAME = ".last_prune"
+
+
+class FormatterCache:
+    """
+    On-disk cache of formatted content, keyed by a hash of the unformatted
+    content and the formatter configuration. An entry starts with the hash
+    of its content on the first line, to reject a partial entry.
+    """
+
+    def __init__(
+        self,
+        cache_path=None,
+        max_age=DEFAULT_CACHE_MAX_AGE,
+        max_size=DEFAULT_CACHE_MAX_SIZE,
+    ):
+        """
+        :param cache_path: default is $XDG_CACHE_HOME/code_generator/formatter
+        :param max_age: seconds before removing an unused entry
+        :param max_size: bytes of the cache directory, oldest entries are
+            removed over it
+        """
+        if not cache_path:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+                os.path.expanduser("~"), ".cache"
+            )
+            cache_path = os.path.join(
+                cache_home, "code_generator", "formatter"
+            )
+        self._cache_path = cache_path
+        self._max_age = max_age
+        self._max_size = max_size
+
+    @staticmethod
+    def get_key(source, config_signature):
+        """
+        Util function to get the key of a content
+        :param source: str unformatted content
+        :param config_signature: str of the formatter configuration
+        :return:
+        """
+        sha = hashlib.sha256(config_signature.encode("utf-8"))
+        sha.update(b"\0")
+        sha.update(source.encode("utf-8"))
+        return sha.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self._cache_path, key[:2], key)
+
+    def get(self, key):
+        """
+        :param key:
+        :return: formatted str, None if missing
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as file:
+                content_hash, _, content = file.read().partition(b"\n")
+            if hashlib.sha256(content).hexdigest().encode() != content_hash:
+                _logger.debug(f"Ignore corrupted formatter cache '{path}'.")
+                return None
+            formatted = content.decode("utf-8")
+            # Keep used entries at prune
+            os.utime(path)
+        except (OSError, UnicodeDecodeError):
+            return None
+        return formatted
+
+    def set(self, key, formatted):
+        path = self._get_path(key)
+        content = formatted.encode("utf-8")
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique by thread, formatters can run in a ThreadPoolExecutor
+            fd, tmp_path = tempfile.mkstemp(
+                suffix=".tmp", dir=os.path.dirname(path)
+            )
+            with os.fdopen(fd, "wb") as file:
+                file.write(hashlib.sha256(content).hexdigest().encode())
+                file.write(b"\n")
+                file.write(content)
+            # Atomic, many workers can share the cache
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _logger.warning(f"Cannot write formatter cache '{path}': {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self, force=False):
+        """
+        Remove entries unused since max_age and the oldest entries when the
+        cache is bigger than max_size. Done once by PRUNE_INTERVAL, shared by
+        all workers with a stamp file.
+        :param force: ignore PRUNE_INTERVAL
+        :return: number of removed entries
+        """
+        stamp_path = os.path.join(self._cache_path, PRUNE_STAMP_FILENAME)
+        now = time.time()
+        try:
+            last_prune = os.path.getmtime(stamp_path)
+        except OSError:
+            # No stamp, never pruned or missing cache
+            last_prune = 0
+        if not force and now - last_prune < PRUNE_INTERVAL:
+            return 0
+        try:
+            os.makedirs(self._cache_path, exist_ok=True)
+            with open(stamp_path, "wb"):
+                pass
+        except OSError as e:
+            _logger.warning(f"Cannot prune formatter cache: {e}")
+            return 0
+
+        lst_entry = []
+        for root, dirs, files in os.walk(self._cache_path):
+            for file in files:
+                if file == PRUNE_STAMP_FILENAME:
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                lst_entry.append((stat.st_mtime, stat.st_size, path))
+        # Oldest first
+        lst_entry.sort()
+        total_size = sum([a[1] for a in lst_entry])
+        nb_remove = 0
+        for mtime, size, path in lst_entry:
+            if now - mtime < self._max_age and total_size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            nb_remove += 1
+        if nb_remove:
+            _logger.info(f"Remove {nb_remove} entries of formatter cache.")
+        return nb_remove
@@ -0,0 +1,559 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import black
+except ImportError:
+    black = None
+
+try:
+    import isort
+except ImportError:
+    isort = None
+
+DEFAULT_MAX_WORKER = min(4, os.cpu_count() or 1)
+
+PYTHON_CONFIG = "python"
+# Name of configuration: (prettier API options, same options for command)
+DCT_PRETTIER_CONFIG = {
+    "js": ({"tabWidth": 4}, ["--tab-width", "4"]),
+    "default": ({}, []),
+    "xml": (
+        {
+            "plugins": ["@prettier/plugin-xml"],
+            "xmlWhitespaceSensitivity": "ignore",
+            "proseWrap": "always",
+            "tabWidth": 4,
+            "bracketSpacing": False,
+            "printWidth": 120,
+        },
+        [
+            "--xml-whitespace-sensitivity",
+            "ignore",
+            "--prose-wrap",
+            "always",
+            "--tab-width",
+            "4",
+            "--no-bracket-spacing",
+            "--print-width",
+            "120",
+        ],
+    ),
+    # Super size print width, because wrapping data break information for
+    # translation and visual data
+    "xml_data": (
+        {
+            "plugins": ["@prettier/plugin-xml"],
+            "xmlWhitespaceSensitivity": "ignore",
+            "proseWrap": "always",
+            "tabWidth": 4,
+            "bracketSpacing": False,
+            "printWidth": 999999999,
+        },
+        [
+            "--xml-whitespace-sensitivity",
+            "ignore",
+            "--prose-wrap",
+            "always",
+            "--tab-width",
+            "4",
+            "--no-bracket-spacing",
+            "--print-width",
+            "999999999",
+        ],
+    ),
+}
+
+# Long-lived node process, read a JSON request by line on stdin and answer
+# a JSON line on stdout
+PRETTIER_WORKER_JS = """
+const readline = require("readline");
+let prettier;
+try {
+    prettier = require("prettier");
+} catch (e) {
+    process.stdout.write(JSON.stringify({ ready: false, error: String(e) }) + "\\n");
+    process.exit(1);
+}
+process.stdout.write(JSON.stringify({ ready: true }) + "\\n");
+const rl = readline.createInterface({ input: process.stdin });
+rl.on("line", async (line) => {
+    const request = JSON.parse(line);
+    let response;
+    try {
+        const formatted = await prettier.format(request.source, request.options);
+        response = { formatted: formatted };
+    } catch (e) {
+        response = { error: String(e) };
+    }
+    process.stdout.write(JSON.stringify(response) + "\\n");
+});
+"""
+
+
+class PrettierWorker:
+    """
+    Persistent node process running prettier, fed over stdin
+    """
+
+    def __init__(self, node_path):
+        env = dict(os.environ)
+        if node_path:
+            env["NODE_PATH"] = node_path
+        self._process = subprocess.Popen(
+            ["node", "-e", PRETTIER_WORKER_JS],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        status = json.loads(self._process.stdout.readline() or "{}")
+        if not status.get("ready"):
+            self.close()
+            raise RuntimeError(
+                f"Cannot start prettier worker: {status.get('error')}"
+            )
+
+    def format(self, source, options):
+        self._process.stdin.write(
+            json.dumps({"source": source, "options": options}) + "\n"
+        )
+        self._process.stdin.flush()
+        line = self._process.stdout.readline()
+        if not line:
+            raise RuntimeError("Prettier worker is dead.")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["formatted"]
+
+    def is_alive(self):
+        return self._process.poll() is None
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+
+class FormatterService:
+    """
+    Format content of generated files, keep prettier workers alive across
+    generations. Black and isort are called in-process with their Python API.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_worker=DEFAULT_MAX_WORKER):
+        self._max_worker = max(1, max_worker)
+        self._queue_worker = queue.Queue()
+        self._lst_worker = []
+        self._lock = threading.Lock()
+        self._use_prettier_worker = True
+        self._node_path = None
+        # tuple of command -> output of its version, empty when missing
+        self._dct_tool_version = {}
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.close)
+            return cls._instance
+
+    def close(self):
+        with self._lock:
+            for worker in self._lst_worker:
+                worker.close()
+            self._lst_worker = []
+            self._queue_worker = queue.Queue()
+
+    def _get_node_path(self):
+        if self._node_path is None:
+            try:
+                self._node_path = subprocess.check_output(
+                    ["npm", "root", "-g"], universal_newlines=True
+                ).strip()
+            except (OSError, subprocess.CalledProcessError):
+                self._node_path = ""
+        return self._node_path
+
+    def _get_tool_version(self, lst_command):
+        """
+        Get the version of a formatter once by process
+        :param lst_command: command printing the version
+        :return: str, empty when the command is missing
+        """
+        key = tuple(lst_command)
+        version = self._dct_tool_version.get(key)
+        if version is None:
+            try:
+                version = subprocess.check_output(
+                    lst_command,
+                    stderr=subprocess.STDOUT,
+                    universal_newlines=True,
+                ).strip()
+            except (OSError, subprocess.CalledProcessError):
+                version = ""
+            self._dct_tool_version[key] = version
+        return version
+
+    def _get_prettier_plugin_version(self, plugin_name):
+        """
+        Read version of a prettier plugin in its package.json
+        :param plugin_name:
+        :return: str, empty when missing
+        """
+        key = ("package.json", plugin_name)
+        version = self._dct_tool_version.get(key)
+        if version is None:
+            package_path = os.path.join(
+                self._get_node_path(), plugin_name, "package.json"
+            )
+            try:
+                with open(package_path, "r") as file:
+                    version = json.load(file).get("version", "")
+            except (OSError, ValueError):
+                version = ""
+            self._dct_tool_version[key] = version
+        return version
+
+    def _acquire_worker(self):
+        """
+        Get an idle prettier worker, start it if under max_worker
+        :return: worker, None when worker is not supported
+        """
+        while True:
+            with self._lock:
+                if not self._use_prettier_worker:
+                    return None
+                if self._queue_worker.empty() and (
+                    len(self._lst_worker) < self._max_worker
+                ):
+                    try:
+                        worker = PrettierWorker(self._get_node_path())
+                    except (OSError, RuntimeError, ValueError) as e:
+                        _logger.warning(
+                            f"{e} Fallback on prettier command by"
+                            " configuration."
+                        )
+                        self._use_prettier_worker = False
+                        return None
+                    self._lst_worker.append(worker)
+                    return worker
+            try:
+                # Timeout to restart a worker if one is dead
+                return self._queue_worker.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _release_worker(self, worker):
+        if worker.is_alive():
+            self._queue_worker.put(worker)
+        else:
+            with self._lock:
+                self._lst_worker.remove(worker)
+
+    @staticmethod
+    def _format_prettier_command(lst_source, lst_argument):
+        """
+        Fallback without worker, one prettier command for all files of the
+        same configuration.
+        :param lst_source: list of tuple (path_file, source)
+        :param lst_argument: options of the prettier command
+        :return: list of formatted str, None when error
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lst_tmp_path = []
+            for i, (path_file, source) in enumerate(lst_source):
+                # Keep the extension, prettier infers the parser with it
+                tmp_path = os.path.join(
+                    tmp_dir, f"{i}_{os.path.basename(path_file)}"
+                )
+                with open(tmp_path, "w") as file:
+                    file.write(source)
+                lst_tmp_path.append(tmp_path)
+            try:
+                process = subprocess.run(
+                    ["prettier", "--write"] + lst_argument + lst_tmp_path,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    universal_newlines=True,
+                )
+            except OSError as e:
+                _logger.error(f"prettier {e}")
+                return [None] * len(lst_source)
+            if process.returncode:
+                _logger.error(f"prettier {process.stderr}")
+                return [None] * len(lst_source)
+            lst_result = []
+            for tmp_path in lst_tmp_path:
+                with open(tmp_path, "r") as file:
+                    lst_result.append(file.read())
+        return lst_result
+
+    def format_prettier(self, source, path_file, config_name):
+        """
+        Format with a prettier worker
+        :param source: str content
+        :param path_file: path to infer the parser
+        :param config_name: key of DCT_PRETTIER_CONFIG
+        :return: formatted str, None when no worker is available
+        """
+        worker = self._acquire_worker()
+        if worker is None:
+            return None
+        options = DCT_PRETTIER_CONFIG[config_name][0]
+        try:
+            return worker.format(source, dict(options, filepath=path_file))
+        finally:
+            self._release_worker(worker)
+
+    @staticmethod
+    def format_python(
+        source,
+        line_length,
+        use_isort=True,
+        use_black=True,
+        workspace_path=None,
+    ):
+        """
+        Sort import with isort and format with black
+        :param source: str content
+        :param line_length:
+        :param use_isort:
+        :param use_black:
+        :param workspace_path: when the Python API is missing, run the
+            commands of its .venv with its configuration
+        :return: formatted str
+        """
+        if use_isort:
+            if isort is not None:
+                source = isort.code(
+                    source, profile="black", line_length=line_length
+                )
+            else:
+                source = FormatterService._format_python_command(
+                    [
+                        FormatterService._get_venv_bin(
+                            workspace_path, "isort"
+                        ),
+                        "--profile",
+                        "black",
+                        "-l",
+                        str(line_length),
+                        "-",
+                    ],
+                    source,
+                    workspace_path,
+                )
+        if use_black:
+            if black is not None:
+                mode = black.Mode(
+                    line_length=line_length,
+                    target_versions={black.TargetVersion.PY37},
+                    preview=True,
+                )
+                source = black.format_str(source, mode=mode)
+            else:
+                source = FormatterService._format_python_command(
+                    [
+                        FormatterService._get_venv_bin(
+                            workspace_path, "black"
+                        ),
+                        "-q",
+                        "-l",
+                        str(line_length),
+                        "--preview",
+                        "-t",
+                        "py37",
+                        "-",
+                    ],
+                    source,
+                    workspace_path,
+                )
+        return source
+
+    @staticmethod
+    def _get_venv_bin(workspace_path, name):
+        """
+        Util function to get a command of the workspace .venv
+        :param workspace_path: None to search the command in PATH
+        :param name:
+        :return: str
+        """
+        if not workspace_path:
+            return name
+        return os.path.join(workspace_path, ".venv", "bin", name)
+
+    @staticmethod
+    def _format_python_command(lst_command, source, workspace_path=None):
+        # Run from the workspace, like before, to apply its configuration
+        try:
+            process = subprocess.run(
+                lst_command,
+                input=source,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                cwd=workspace_path or None,
+            )
+        except OSError as e:
+            raise ValueError(f"Cannot run {lst_command[0]}: {e}")
+        if process.returncode:
+            raise ValueError(process.stderr)
+        return process.stdout
+
+    def get_config_signature(
+        self,
+        config_name,
+        line_length=79,
+        use_isort=True,
+        use_black=True,
+        workspace_path=None,
+    ):
+        """
+        Util function to describe a formatter configuration, used as cache
+        key. Versions of formatters are included, an upgrade invalidates
+        the cache.
+        :param config_name: PYTHON_CONFIG or key of DCT_PRETTIER_CONFIG
+        :param line_length:
+        :param use_isort:
+        :param use_black:
+        :param workspace_path: path of the workspace with .venv, for python
+            formatter commands
+        :return: str
+        """
+        if config_name == PYTHON_CONFIG:
+            value = {
+                "line_length": line_length,
+                "isort": False,
+                "black": False,
+            }
+            if use_isort:
+                if isort is not None:
+                    value["isort"] = isort.__version__
+                else:
+                    value["isort"] = self._get_tool_version(
+                        [
+                            self._get_venv_bin(workspace_path, "isort"),
+                            "--version",
+                        ]
+                    )
+            if use_black:
+                if black is not None:
+                    value["black"] = black.__version__
+                else:
+                    value["black"] = self._get_tool_version(
+                        [
+                            self._get_venv_bin(workspace_path, "black"),
+                            "--version",
+                        ]
+                    )
+        else:
+            options = DCT_PRETTIER_CONFIG[config_name]
+            value = {
+                "options": options,
+                "prettier": self._get_tool_version(["prettier", "--version"]),
+                "plugins": {
+                    a: self._get_prettier_plugin_version(a)
+                    for a in options[0].get("plugins", [])
+                },
+            }
+        return f"{config_name}:{json.dumps(value, sort_keys=True)}"
+
+    def format_batch(
+        self,
+        lst_job,
+        line_length=79,
+        use_isort=True,
+        use_black=True,
+        workspace_path=None,
+    ):
+        """
+        Format many files, batched by formatter configuration. Prettier
+        files are dispatched on max_worker workers.
+        :param lst_job: list of tuple (path_file, source, config_name),
+            config_name is PYTHON_CONFIG or key of DCT_PRETTIER_CONFIG
+        :param line_length: python line length
+        :param use_isort:
+        :param use_black:
+        :param workspace_path: path of the workspace with .venv, for python
+            formatter commands
+        :return: dict path_file -> formatted str, None when error
+        """
+        dct_result = {}
+        dct_config_job = defaultdict(list)
+        for path_file, source, config_name in lst_job:
+            dct_config_job[config_name].append((path_file, source))
+
+        def format_one(config_name, path_file, source):
+            start = time.time()
+            try:
+                if config_name == PYTHON_CONFIG:
+                    result = self.format_python(
+                        source,
+                        line_length,
+                        use_isort=use_isort,
+                        use_black=use_black,
+                        workspace_path=workspace_path,
+                    )
+                else:
+                    result = self.format_prettier(
+                        source, path_file, config_name
+                    )
+                    if result is None:
+                        # No worker, keep it for the batch command
+                        return
+            except Exception as e:
+                _logger.error(f"Cannot format '{path_file}': {e}")
+                result = None
+            dct_result[path_file] = result
+            _logger.info(
+                f"Format {path_file} in {(time.time() - start) * 1000:.0f} ms"
+            )
+
+        with ThreadPoolExecutor(max_workers=self._max_worker) as executor:
+            for config_name, lst_source in dct_config_job.items():
+                if config_name == PYTHON_CONFIG:
+                    # In-process, the GIL doesn't help parallelism
+                    for path_file, source in lst_source:
+                        format_one(config_name, path_file, source)
+                    continue
+                list(
+                    executor.map(
+                        lambda a: format_one(config_name, *a), lst_source
+                    )
+                )
+                lst_source_missing = [
+                    a for a in lst_source if a[0] not in dct_result
+                ]
+                if lst_source_missing:
+                    start = time.time()
+                    lst_formatted = self._format_prettier_command(
+                        lst_source_missing, DCT_PRETTIER_CONFIG[config_name][1]
+                    )
+                    for (path_file, source), formatted in zip(
+                        lst_source_missing, lst_formatted
+                    ):
+                        dct_result[path_file] = formatted
+                    _logger.info(
+                        f"Format {len(lst_source_missing)} files with"
+                        f" prettier configuration '{config_name}' in"
+                        f" {(time.time() - start) * 1000:.0f} ms"
+                    )
+        return dct_result
@@ -424,6 +424,26 @@ class CodeGeneratorModule(models.Model):
         dct_field=None,
         dct_model=None,
         lst_depend_model=None,
+    ):
+        # Setup registry once for all created fields
+        with self.env["ir.model.fields"].batch_setup_models() as env:
+            model_id = self.with_env(env)._add_update_model(
+                model_model,
+                model_name=model_name,
+                dct_field=dct_field,
+                dct_model=dct_model,
+                lst_depend_model=lst_depend_model,
+            )
+        return model_id.with_env(self.env)
+
+    @api.model
+    def _add_update_model(
+        self,
+        model_model,
+        model_name=None,
+        dct_field=None,
+        dct_model=None,
+        lst_depend_model=None,
     ):
         # When this is called, all field is in whitelist
         if dct_field:
@@ -9,6 +9,7 @@ import shutil
 import tempfile
 import uuid
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import unidecode
 from code_writer import CodeWriter
@@ -21,10 +22,25 @@ from odoo.models import MAGIC_COLUMNS
 from odoo.tools.misc import mute_logger
 
 from ..code_generator_data import CodeGeneratorData
+from ..code_generator_storage import (
+    FileSystemStorage,
+    MemoryStorage,
+    storage_registry,
+)
 from ..extractor_controller import ExtractorController
 from ..extractor_module import ExtractorModule
+from ..extractor_module_index import ExtractorModuleIndex
 from ..extractor_view import ExtractorView
+from ..fields_get_cache import FieldsGetCache
+from ..module_snapshot import (
+    AccessSnapshot,
+    GroupSnapshot,
+    ModelSnapshot,
+    ModuleSnapshot,
+    RuleSnapshot,
+)
 from ..python_controller_writer import PythonControllerWriter
+from ..xml_id_resolver import XmlIdResolver
 
 _logger = logging.getLogger(__name__)
 
@@ -52,6 +68,8 @@ FROM_ODOO_IMPORTS_SUPERUSER = [
     "from odoo import _, api, models, fields, SUPERUSER_ID"
 ]
 MODEL_SUPERUSER_HEAD = FROM_ODOO_IMPORTS_SUPERUSER + BREAK_LINE
+# Records read and serialized at once when exporting data
+XML_DATA_BATCH_SIZE = 1000
 
 
 class CodeGeneratorWriter(models.Model):
@@ -72,6 +90,11 @@ class CodeGeneratorWriter(models.Model):
 
     rootdir = fields.Char(string="Root dir")
 
+    sync_code_report = fields.Text(
+        string="Sync code report",
+        help="Files added, modified and removed by the sync code.",
+    )
+
     @staticmethod
     def _fmt_underscores(word):
         return word.lower().replace(".", "_")
@@ -736,6 +759,28 @@ class CodeGeneratorWriter(models.Model):
             return ir_model_data[0].name
         return f"{ir_model_data[0].module}.{ir_model_data[0].name}"
 
+    def _get_xml_id_resolver(self):
+        """
+        Get the xml_id resolver of actual generation, create it if missing
+        :return:
+        """
+        xml_id_resolver = getattr(self, "xml_id_resolver", None)
+        if xml_id_resolver is None:
+            xml_id_resolver = XmlIdResolver(self.env)
+            self.xml_id_resolver = xml_id_resolver
+        return xml_id_resolver
+
+    def _get_fields_get_cache(self):
+        """
+        Get the fields_get cache of actual generation, create it if missing
+        :return:
+        """
+        fields_get_cache = getattr(self, "fields_get_cache", None)
+        if fields_get_cache is None:
+            fields_get_cache = FieldsGetCache(self.env)
+            self.fields_get_cache = fields_get_cache
+        return fields_get_cache
+
     def _get_ir_model_data(
         self,
         record,
@@ -751,20 +796,14 @@ class CodeGeneratorWriter(models.Model):
         :return:
         """
 
-        ir_model_data = self.env["ir.model.data"].search(
-            [
-                # TODO: Opción por valorar
-                # ('module', '!=', '__export__'),
-                ("model", "=", record._name),
-                ("res_id", "=", record.id),
-            ]
-        )
+        xml_id_resolver = self._get_xml_id_resolver()
+        ir_model_data = xml_id_resolver.get(record)
 
         if ir_model_data:
-            if module_name and module_name == ir_model_data[0].module:
-                result = ir_model_data[0].name
+            if module_name and module_name == ir_model_data[0]:
+                result = ir_model_data[1]
             else:
-                result = f"{ir_model_data[0].module}.{ir_model_data[0].name}"
+                result = f"{ir_model_data[0]}.{ir_model_data[1]}"
         elif give_a_default:
             if force_field_name:
                 name_v = getattr(record, force_field_name)
@@ -776,32 +815,12 @@ class CodeGeneratorWriter(models.Model):
                 second = self._lower_replace(rec_name_v)
             else:
                 second = uuid.uuid1().int
-            result = self._set_limit_4xmlid(
-                f"{self._get_model_model(record._name)}_{second}"
-            )
-            # Check if name already exist
-            model_data_exist = self.env["ir.model.data"].search(
-                [("name", "=", result)]
+            prefix = f"{self._get_model_model(record._name)}_"
+            result = self._set_limit_4xmlid(f"{prefix}{second}")
+            # Check if name already exist, ir.model.data is created in batch
+            result = xml_id_resolver.reserve(
+                record, result, module_name, prefix=prefix
             )
-            new_result = result
-            i = 0
-            while model_data_exist:
-                i += 1
-                new_result = f"{result}_{i}"
-                model_data_exist = self.env["ir.model.data"].search(
-                    [("name", "=", new_result)]
-                )
-
-            self.env["ir.model.data"].create(
-                {
-                    "name": new_result,
-                    "model": record._name,
-                    "module": module_name,
-                    "res_id": record.id,
-                    "noupdate": True,  # If it's False, target record (res_id) will be removed while module update
-                }
-            )
-            result = new_result
         else:
             result = False
 
@@ -827,10 +846,8 @@ class CodeGeneratorWriter(models.Model):
         :return:
         """
 
-        return (
-            self._get_ir_model_data(group)
-            if self._get_ir_model_data(group)
-            else self._lower_replace(group.name.replace(" /", ""))
+        return self._get_ir_model_data(group) or self._lower_replace(
+            group.name.replace(" /", "")
         )
 
     def _get_model_data_name(self, model, module_name=""):
@@ -840,11 +857,9 @@ class CodeGeneratorWriter(models.Model):
         :return:
         """
 
-        return (
-            self._get_ir_model_data(model, module_name=module_name)
-            if self._get_ir_model_data(model, module_name=module_name)
-            else "model_%s" % self._get_model_model(model.model)
-        )
+        return self._get_ir_model_data(
+            model, module_name=module_name
+        ) or "model_%s" % self._get_model_model(model.model)
 
     def _get_view_data_name(self, view):
         """
@@ -853,10 +868,9 @@ class CodeGeneratorWriter(models.Model):
         :return:
         """
 
-        return (
-            self._get_ir_model_data(view)
-            if self._get_ir_model_data(view)
-            else "%s_%sview" % (self._get_model_model(view.model), view.type)
+        return self._get_ir_model_data(view) or "%s_%sview" % (
+            self._get_model_model(view.model),
+            view.type,
         )
 
     def _get_action_data_name(
@@ -870,12 +884,12 @@ class CodeGeneratorWriter(models.Model):
         :return:
         """
 
-        if not creating and self._get_ir_model_data(
-            action, module_name=module.name
-        ):
-            action_name = self._get_ir_model_data(
-                action, module_name=module.name
-            )
+        action_name = (
+            self._get_ir_model_data(action, module_name=module.name)
+            if not creating
+            else False
+        )
+        if action_name:
             if not module or "." not in action_name:
                 return action_name
             lst_action = action_name.split(".")
@@ -983,244 +997,92 @@ class CodeGeneratorWriter(models.Model):
                         new_nomenclator_data_list
                     )
 
+        xml_id_resolver = self._get_xml_id_resolver()
+        lst_field_plan = self._get_model_xmldata_field_plan(model)
+        lst_field_name = [a[0] for a in lst_field_plan]
+        # Relation fields, to resolve xml_id of a batch in few queries
+        lst_field_relation = [
+            (a[0], a[3])
+            for a in lst_field_plan
+            if a[1] in ("many2one", "many2many")
+        ]
+        env = nomenclador_data.env
+
+        # Attachment is updated by _compute_xml_data_file before writing, keep
+        # its nodes. Other models are streamed, only the bytes are kept.
+        keep_data_xml = model_model == "ir_attachment"
+        buffer = io.BytesIO()
         lst_data_xml = []
         lst_id = []
         lst_depend = []
-        lst_field_id_blacklist = [
-            a.m2o_fields.id
-            for a in model.m2o_module.o2m_nomenclator_blacklist_fields
-        ]
-        lst_field_id_whitelist = [
-            a.m2o_fields.id
-            for a in model.m2o_module.o2m_nomenclator_whitelist_fields
-        ]
         lst_record = []
         lst_new_data_to_write = []
         dct_search_and_replace_in_file = defaultdict(list)
         lst_scss_process_hook = []
-        for record in nomenclador_data:
-            add_scss_hook = False
-            new_data_to_write = None
-            force_field_name_xml_id = None
-            f2exports = model.field_id.filtered(
-                lambda field: field.name not in MAGIC_FIELDS
-            ).with_context(lang=None)
-            lst_field = []
-            lst_end_field = []
-            lst_ignore_field_name = []
-            for rfield in f2exports:
-                # whitelist check
-                if (
-                    lst_field_id_whitelist
-                    and rfield.id not in lst_field_id_whitelist
-                ):
-                    continue
-                # blacklist check
-                if rfield.id in lst_field_id_blacklist:
-                    continue
-                if rfield.name in lst_ignore_field_name:
-                    continue
-                record_value = getattr(record, rfield.name)
-                child = None
-                if record_value or (
-                    not record_value
-                    and rfield.ttype == "boolean"
-                    and rfield.default == "True"
-                ):
-                    delete_node = False
-                    if rfield.ttype == "many2one":
-                        ref = self._get_ir_model_data(
-                            record_value,
-                            give_a_default=True,
-                            module_name=module.name,
-                        )
-                        if not ref:
-                            # This will cause an error at installation
-                            _logger.error(
-                                "Cannot find reference for field"
-                                f" {rfield.name} model {model_model}"
-                            )
-                            continue
-                        child = E.field({"name": rfield.name, "ref": ref})
-
-                        if "." not in ref:
-                            lst_depend.append(ref)
-
-                    elif rfield.ttype == "one2many":
-                        # TODO do we need to export one2many relation data, it's better to export many2one
-                        # TODO maybe check if many2one is exported or export this one
-                        continue
-                        # field_eval = ", ".join(
-                        #     record_value.mapped(
-                        #         lambda rvalue: "(4, ref('%s'))"
-                        #         % self._get_ir_model_data(
-                        #             rvalue, give_a_default=True, module_name=module.name
-                        #         )
-                        #     )
-                        # )
-                        # child = E.field(
-                        #     {"name": rfield.name, "eval": f"[{field_eval}]"}
-                        # )
-
-                    elif rfield.ttype == "many2many":
-                        # TODO add dependencies id in lst_depend
-                        field_eval = ", ".join(
-                            record_value.mapped(
-                                lambda rvalue: "ref(%s)"
-                                % self._get_ir_model_data(
-                                    rvalue,
-                                    give_a_default=True,
-                                    module_name=module.name,
-                                )
-                            )
+        with ET.xmlfile(buffer) as xml_file:
+            with xml_file.element("data", {"noupdate": "1"}):
+                for i in range(0, len(nomenclador_data), XML_DATA_BATCH_SIZE):
+                    batch = nomenclador_data[i : i + XML_DATA_BATCH_SIZE]
+                    lst_value = batch.read(
+                        lst_field_name, load="_classic_write"
+                    )
+                    lst_record_to_prefetch = [batch]
+                    for field_name, relation in lst_field_relation:
+                        set_relation_id = set()
+                        for value in lst_value:
+                            relation_id = value[field_name]
+                            if type(relation_id) is list:
+                                set_relation_id.update(relation_id)
+                            elif relation_id:
+                                set_relation_id.add(relation_id)
+                        lst_record_to_prefetch.append(
+                            env[relation].browse(list(set_relation_id))
                         )
-                        child = E.field(
-                            {
-                                "name": rfield.name,
-                                "eval": f"[(6,0, [{field_eval}])]",
-                            }
+                    xml_id_resolver.prefetch(lst_record_to_prefetch)
+
+                    for record, dct_value in zip(batch, lst_value):
+                        (
+                            record_xml,
+                            id_record,
+                            new_data_to_write,
+                            add_scss_hook,
+                        ) = self._get_record_xmldata(
+                            module,
+                            model,
+                            model_model,
+                            lst_field_plan,
+                            record,
+                            dct_value,
+                            lst_depend,
+                            dct_search_and_replace_in_file,
                         )
-
-                    elif rfield.ttype == "binary":
-                        add_in_search_and_replace_file = False
-                        manage_scss = False
-                        sub_dir = "img"
-                        # Create file if image, else create binary
-                        if record.index_content == "image":
-                            manage_scss = True
-                        elif record.mimetype in ["text/css", "text/scss"]:
-                            force_field_name_xml_id = "datas_fname"
-                            manage_scss = True
-                            sub_dir = "scss"
-                        elif (
-                            record.mimetype in ["application/octet-stream"]
-                            and ".custom." in record.name
-                            and record.name.endswith(".scss")
-                        ):
-                            manage_scss = True
-                            add_scss_hook = True
-                            add_in_search_and_replace_file = True
-                            sub_dir = "scss"
-                        # Check record.index_content or record.mimetype
-                        if manage_scss:
-                            new_filename = (
-                                record.datas_fname
-                                if not add_scss_hook
-                                else record.name.rsplit("/", maxsplit=1)[1]
-                            )
-                            url_path_file_module = os.path.join(
-                                "static",
-                                "src",
-                                sub_dir,
-                                new_filename,
-                            )
-                            url_path_file = os.path.join(
-                                "/",
-                                module.name,
-                                "static",
-                                "src",
-                                sub_dir,
-                                new_filename,
-                            )
-                            child_end = E.field({"name": "type"}, "url")
-                            lst_end_field.append(child_end)
-                            lst_ignore_field_name.append("type")
-
-                            child_end = E.field({"name": "url"}, url_path_file)
-                            lst_end_field.append(child_end)
-                            lst_ignore_field_name.append("url")
-
-                            new_data_to_write = [
-                                record_value,
-                                url_path_file_module,
-                            ]
-                            # decode_record = base64.b64decode(record_value)
-                            # self.code_generator_data.write_file_binary(
-                            #     url_path_file_module,
-                            #     decode_record,
-                            # )
-                            if add_in_search_and_replace_file:
-                                pattern_str = (
-                                    '<attribute name="href">%s</attribute>'
-                                )
-                                str_to_search = pattern_str % record.name
-                                str_to_replace = pattern_str % url_path_file
-                                dct_search_and_replace_in_file[
-                                    "data/ir_ui_view.xml"
-                                ].append((str_to_search, str_to_replace))
+                        lst_id.append(id_record)
+                        if keep_data_xml:
+                            lst_data_xml.append(record_xml)
                         else:
-                            # Transform binary in string and remove b''
-                            child = E.field(
-                                {"name": rfield.name},
-                                str(record_value)[2:-1],
-                            )
-                    elif rfield.ttype == "boolean":
-                        # Don't show boolean if same value of default
-                        if str(record_value) != rfield.default:
-                            child = E.field(
-                                {"name": rfield.name},
-                                str(record_value),
-                            )
-                        else:
-                            delete_node = True
-                    elif rfield.related == "view_id.arch" or (
-                        rfield.name == "arch" and rfield.model == "ir.ui.view"
-                    ):
-                        root = ET.fromstring(record_value)
-                        child = E.field(
-                            {"name": rfield.name, "type": "xml"}, root
-                        )
+                            xml_file.write(record_xml)
+                        lst_record.append(record)
+                        lst_new_data_to_write.append(new_data_to_write)
 
-                    else:
-                        child = E.field(
-                            {"name": rfield.name}, str(record_value)
-                        )
+                        if add_scss_hook:
+                            lst_scss_process_hook.append(id_record)
+                    # Memory stay bounded by the batch size
+                    batch.invalidate_cache(ids=batch.ids)
 
-                    if not delete_node and child is not None:
-                        lst_field.append(child)
-
-            # TODO delete this comment, check why no need anymore rec_name
-            # rec_name_v = self._get_from_rec_name(record, model)
-            # if rec_name_v:
-            #     rec_name_v = self._lower_replace(rec_name_v)
-            #     id_record = self._set_limit_4xmlid(f"{model_model}_{rec_name_v}")
-            # else:
-            #     rec_name_v = uuid.uuid1().int
-            id_record = self._get_ir_model_data(
-                record,
-                give_a_default=True,
-                module_name=module.name,
-                force_field_name=force_field_name_xml_id,
-            )
-            lst_id.append(id_record)
-            lst_total_field = lst_field + lst_end_field
-            record_xml = E.record(
-                {"id": id_record, "model": model.model}, *lst_total_field
-            )
-            lst_data_xml.append(record_xml)
-            lst_record.append(record)
-            lst_new_data_to_write.append(new_data_to_write)
-
-            if add_scss_hook:
-                lst_scss_process_hook.append(id_record)
+        # Create all new xml_id of this model in one batch
+        xml_id_resolver.flush()
 
         # Do xml update for attachment later
-        if model_model == "ir_attachment":
+        if keep_data_xml:
             result = ""
         else:
             # TODO find when is noupdate and not noupdate
             # <data noupdate="1">
-            # xml_no_update = E.data({"noupdate": "1"}, *lst_data_xml)
-            # module_file = E.odoo({}, xml_no_update)
-            #
-            # result = XML_VERSION_HEADER.encode("utf-8") + ET.tostring(
-            #     module_file, pretty_print=True
-            # )
             # TODO bug some character is missing, check code_generator_demo_website_attachments_data, use this method instead
             result = (
                 XML_VERSION_HEADER.encode("utf-8")
                 + b"<odoo>\n"
-                + ET.tostring(E.data({"noupdate": "1"}, *lst_data_xml))
+                + buffer.getvalue()
                 + b"\n</odoo>\n"
             )
 
@@ -1237,6 +1099,233 @@ class CodeGeneratorWriter(models.Model):
             ]
         }
 
+    @staticmethod
+    def _get_model_xmldata_field_plan(model):
+        """
+        Util function to get exported fields of a model, computed once by
+        model instead of once by record
+        :param model:
+        :return: list of tuple (name, ttype, default, relation, is_arch)
+        """
+        set_field_id_blacklist = set(
+            model.m2o_module.o2m_nomenclator_blacklist_fields.mapped(
+                "m2o_fields"
+            ).ids
+        )
+        set_field_id_whitelist = set(
+            model.m2o_module.o2m_nomenclator_whitelist_fields.mapped(
+                "m2o_fields"
+            ).ids
+        )
+        lst_field_plan = []
+        for rfield in model.field_id.with_context(lang=None):
+            if rfield.name in MAGIC_FIELDS:
+                continue
+            # whitelist check
+            if (
+                set_field_id_whitelist
+                and rfield.id not in set_field_id_whitelist
+            ):
+                continue
+            # blacklist check
+            if rfield.id in set_field_id_blacklist:
+                continue
+            if rfield.ttype == "one2many":
+                # TODO do we need to export one2many relation data, it's better to export many2one
+                # TODO maybe check if many2one is exported or export this one
+                continue
+            is_arch = rfield.related == "view_id.arch" or (
+                rfield.name == "arch" and rfield.model == "ir.ui.view"
+            )
+            lst_field_plan.append(
+                (
+                    rfield.name,
+                    rfield.ttype,
+                    rfield.default,
+                    rfield.relation,
+                    is_arch,
+                )
+            )
+        return lst_field_plan
+
+    def _get_record_xmldata(
+        self,
+        module,
+        model,
+        model_model,
+        lst_field_plan,
+        record,
+        dct_value,
+        lst_depend,
+        dct_search_and_replace_in_file,
+    ):
+        """
+        Function to build the xml node of a record
+        :param module:
+        :param model:
+        :param model_model:
+        :param lst_field_plan: result of _get_model_xmldata_field_plan
+        :param record:
+        :param dct_value: values of record from read with _classic_write
+        :param lst_depend: list to fill with dependencies xml_id
+        :param dct_search_and_replace_in_file: dict to fill with text to
+            replace in other data files
+        :return: tuple (record_xml, id_record, new_data_to_write,
+            add_scss_hook)
+        """
+        env = record.env
+        add_scss_hook = False
+        new_data_to_write = None
+        force_field_name_xml_id = None
+        lst_field = []
+        lst_end_field = []
+        set_ignore_field_name = set()
+        for field_name, ttype, default, relation, is_arch in lst_field_plan:
+            if field_name in set_ignore_field_name:
+                continue
+            if ttype in ("binary", "reference"):
+                # Keep the value of the record, read() convert it
+                record_value = record[field_name]
+            else:
+                record_value = dct_value[field_name]
+            child = None
+            if not record_value and not (
+                ttype == "boolean" and default == "True"
+            ):
+                continue
+            if ttype == "many2one":
+                ref = self._get_ir_model_data(
+                    env[relation].browse(record_value),
+                    give_a_default=True,
+                    module_name=module.name,
+                )
+                if not ref:
+                    # This will cause an error at installation
+                    _logger.error(
+                        "Cannot find reference for field"
+                        f" {field_name} model {model_model}"
+                    )
+                    continue
+                child = E.field({"name": field_name, "ref": ref})
+
+                if "." not in ref:
+                    lst_depend.append(ref)
+
+            elif ttype == "many2many":
+                # TODO add dependencies id in lst_depend
+                field_eval = ", ".join(
+                    env[relation]
+                    .browse(record_value)
+                    .mapped(
+                        lambda rvalue: "ref(%s)"
+                        % self._get_ir_model_data(
+                            rvalue,
+                            give_a_default=True,
+                            module_name=module.name,
+                        )
+                    )
+                )
+                child = E.field(
+                    {
+                        "name": field_name,
+                        "eval": f"[(6,0, [{field_eval}])]",
+                    }
+                )
+
+            elif ttype == "binary":
+                add_in_search_and_replace_file = False
+                manage_scss = False
+                sub_dir = "img"
+                # Create file if image, else create binary
+                if record.index_content == "image":
+                    manage_scss = True
+                elif record.mimetype in ["text/css", "text/scss"]:
+                    force_field_name_xml_id = "datas_fname"
+                    manage_scss = True
+                    sub_dir = "scss"
+                elif (
+                    record.mimetype in ["application/octet-stream"]
+                    and ".custom." in record.name
+                    and record.name.endswith(".scss")
+                ):
+                    manage_scss = True
+                    add_scss_hook = True
+                    add_in_search_and_replace_file = True
+                    sub_dir = "scss"
+                # Check record.index_content or record.mimetype
+                if manage_scss:
+                    new_filename = (
+                        record.datas_fname
+                        if not add_scss_hook
+                        else record.name.rsplit("/", maxsplit=1)[1]
+                    )
+                    url_path_file_module = os.path.join(
+                        "static",
+                        "src",
+                        sub_dir,
+                        new_filename,
+                    )
+                    url_path_file = os.path.join(
+                        "/",
+                        module.name,
+                        "static",
+                        "src",
+                        sub_dir,
+                        new_filename,
+                    )
+                    child_end = E.field({"name": "type"}, "url")
+                    lst_end_field.append(child_end)
+                    set_ignore_field_name.add("type")
+
+                    child_end = E.field({"name": "url"}, url_path_file)
+                    lst_end_field.append(child_end)
+                    set_ignore_field_name.add("url")
+
+                    new_data_to_write = [
+                        record_value,
+                        url_path_file_module,
+                    ]
+                    if add_in_search_and_replace_file:
+                        pattern_str = '<attribute name="href">%s</attribute>'
+                        str_to_search = pattern_str % record.name
+                        str_to_replace = pattern_str % url_path_file
+                        dct_search_and_replace_in_file[
+                            "data/ir_ui_view.xml"
+                        ].append((str_to_search, str_to_replace))
+                else:
+                    # Transform binary in string and remove b''
+                    child = E.field(
+                        {"name": field_name},
+                        str(record_value)[2:-1],
+                    )
+            elif ttype == "boolean":
+                # Don't show boolean if same value of default
+                if str(record_value) != default:
+                    child = E.field(
+                        {"name": field_name},
+                        str(record_value),
+                    )
+            elif is_arch:
+                root = ET.fromstring(record_value)
+                child = E.field({"name": field_name, "type": "xml"}, root)
+
+            else:
+                child = E.field({"name": field_name}, str(record_value))
+
+            if child is not None:
+                lst_field.append(child)
+
+        id_record = self._get_ir_model_data(
+            record,
+            give_a_default=True,
+            module_name=module.name,
+            force_field_name=force_field_name_xml_id,
+        )
+        record_xml = E.record(
+            {"id": id_record, "model": model.model}, *lst_field, *lst_end_field
+        )
+        return record_xml, id_record, new_data_to_write, add_scss_hook
+
     def _compute_xml_data_file(self, module, dct_result):
         if "ir_attachment" in dct_result.keys():
             dct_ir_attachment = dct_result.get("ir_attachment")
@@ -1259,8 +1348,8 @@ _logger = logging.getLogger(__name__)"""
             return
         # lst_attach_image_index_keep = []
         dct_replace_view = {}
-        lst_attachment_id_to_keep = []
-        lst_attachment_id_check = []
+        set_attachment_id_to_keep = set()
+        set_attachment_id_check = set()
         result_view = dct_result.get("ir_ui_view")[0]
         lst_view_id = dct_result.get("ir_ui_view")[4]
         lst_ele_attach_xml = dct_ir_attachment[1]
@@ -1269,76 +1358,71 @@ _logger = logging.getLogger(__name__)"""
         lst_new_data_to_write = dct_ir_attachment[5]
         dct_associate_duplicate_attach_id = {}  # ref to master
         dct_associate_duplicate_attach_id_index = {}  # ref to master
-        lst_attachment_id_index_has_rename = []
 
-        # TODO do algorithme to detect duplicate image reference. To test it, upload 2 same image and add it in html
         # Detect duplicate and create association with master
         if module.export_website_optimize_binary_image:
-            i = -1
-            for attach_id in lst_attach_id:
-                i += 1
-                for i_attach, attach_id_iter in enumerate(lst_attach_id):
-                    if i_attach == i:
-                        # same file...
-                        continue
-
+            dct_name_index = defaultdict(list)
+            for i, attach_id in enumerate(lst_attach_id):
+                dct_name_index[attach_id.datas_fname].append(i)
+            for lst_index in dct_name_index.values():
+                if len(lst_index) < 2:
+                    continue
+                # The first attachment of a content is the master
+                dct_content_master_index = {}
+                dct_master_index = {}  # index -> index of master
+                for i in lst_index:
+                    master_i = dct_content_master_index.setdefault(
+                        self._get_attachment_content_key(lst_attach_id[i]), i
+                    )
+                    dct_master_index[i] = master_i
+                    if master_i != i:
+                        dct_associate_duplicate_attach_id[
+                            lst_attach_id[i].id
+                        ] = lst_attach_id[master_i].id
+                        dct_associate_duplicate_attach_id_index[i] = master_i
+                lst_master_index = list(dct_content_master_index.values())
+                if len(lst_master_index) < 2:
+                    continue
+                # Support rename for picture, the name is the same, but it's a different picture
+                for i_attach in lst_index:
+                    new_data_to_write = lst_new_data_to_write[i_attach]
                     if (
-                        i not in dct_associate_duplicate_attach_id_index.keys()
-                        and attach_id.datas_fname == attach_id_iter.datas_fname
+                        not new_data_to_write
+                        or lst_attach_id[i_attach].index_content != "image"
                     ):
-                        if attach_id.datas == attach_id_iter.datas:
-                            dct_associate_duplicate_attach_id[
-                                attach_id_iter.id
-                            ] = attach_id.id
-                            dct_associate_duplicate_attach_id_index[
-                                i_attach
-                            ] = i
-                        else:
-                            # Support rename for picture, the name is the same, but it's a different picture
-                            new_data_to_write = lst_new_data_to_write[i_attach]
-                            if (
-                                new_data_to_write
-                                and attach_id_iter.index_content == "image"
-                                and i_attach
-                                not in lst_attachment_id_index_has_rename
-                            ):
-                                (
-                                    record_value,
-                                    url_path_file_module,
-                                ) = new_data_to_write
-                                unique_str = hashlib.md5(
-                                    str(i_attach).encode("utf-8")
-                                ).hexdigest()[:6]
-
-                                new_data_to_write[
-                                    1
-                                ] = self.rename_filename_with_uuid(
-                                    url_path_file_module, unique_str
-                                )
-
-                                element = ET.tostring(
-                                    lst_ele_attach_xml[i_attach]
-                                ).decode("utf-8")
-                                new_name = self.rename_filename_with_uuid(
-                                    attach_id.name, unique_str
-                                )
-                                new_datas_fname = (
-                                    self.rename_filename_with_uuid(
-                                        attach_id.datas_fname, unique_str
-                                    )
-                                )
-                                new_element = element.replace(
-                                    attach_id.name, new_name
-                                ).replace(
-                                    attach_id.datas_fname, new_datas_fname
-                                )
-                                lst_ele_attach_xml[i_attach] = ET.fromstring(
-                                    new_element
-                                )
-                                lst_attachment_id_index_has_rename.append(
-                                    i_attach
-                                )
+                        continue
+                    # First master with a different content
+                    attach_id = lst_attach_id[
+                        next(
+                            a
+                            for a in lst_master_index
+                            if a != dct_master_index[i_attach]
+                        )
+                    ]
+                    record_value, url_path_file_module = new_data_to_write
+                    unique_str = hashlib.md5(
+                        str(i_attach).encode("utf-8")
+                    ).hexdigest()[:6]
+
+                    new_data_to_write[1] = self.rename_filename_with_uuid(
+                        url_path_file_module, unique_str
+                    )
+
+                    element = ET.tostring(lst_ele_attach_xml[i_attach]).decode(
+                        "utf-8"
+                    )
+                    new_name = self.rename_filename_with_uuid(
+                        attach_id.name, unique_str
+                    )
+                    new_datas_fname = self.rename_filename_with_uuid(
+                        attach_id.datas_fname, unique_str
+                    )
+                    new_element = element.replace(
+                        attach_id.name, new_name
+                    ).replace(attach_id.datas_fname, new_datas_fname)
+                    lst_ele_attach_xml[i_attach] = ET.fromstring(new_element)
 
+        dct_attach_index = {a.id: i for i, a in enumerate(lst_attach_id)}
         # Detect /web/image/ in views, change attachment_id.id to his xml_id
         for view_id in lst_view_id:
             str_view = view_id.arch
@@ -1383,17 +1467,12 @@ _logger = logging.getLogger(__name__)"""
                     _logger.warning(f"Ignore attach_link '{attach_link}'")
                     continue
                 # Ignore processing if already got this information
-                if i_attach_id in lst_attachment_id_check:
+                if i_attach_id in set_attachment_id_check:
                     continue
-                lst_attachment_id_check.append(i_attach_id)
+                set_attachment_id_check.add(i_attach_id)
                 # Search this picture if exist
-                i = -1
-                for attach_id in lst_attach_id:
-                    i += 1
-                    if attach_id.id == i_attach_id:
-                        # lst_attach_image_index_keep.append(i)
-                        break
-                else:
+                i = dct_attach_index.get(i_attach_id)
+                if i is None:
                     _logger.warning(
                         f"Not found attachment for attach_link '{attach_link}'"
                         f" into {view_id.name}"
@@ -1418,8 +1497,7 @@ _logger = logging.getLogger(__name__)"""
                 new_lst_attach[3] = xml_id_link
                 new_attach_link = "/".join(new_lst_attach)
                 dct_replace_view[attach_link] = new_attach_link
-                if new_i_attach_id not in lst_attachment_id_to_keep:
-                    lst_attachment_id_to_keep.append(new_i_attach_id)
+                set_attachment_id_to_keep.add(new_i_attach_id)
 
         # Replace all link
         if dct_replace_view:
@@ -1432,22 +1510,15 @@ _logger = logging.getLogger(__name__)"""
 
         # Remove unused image, missing from /web/image/ link
         if module.export_website_optimize_binary_image:
-            lst_index_to_delete = []
-            i = -1
-            for attach_id in lst_attach_id:
-                i += 1
-                if (
-                    attach_id.id in lst_attachment_id_to_keep
-                    or attach_id.index_content != "image"
-                ):
-                    continue
-                lst_index_to_delete.append(i)
+            set_index_to_delete = {
+                i
+                for i, attach_id in enumerate(lst_attach_id)
+                if attach_id.id not in set_attachment_id_to_keep
+                and attach_id.index_content == "image"
+            }
             # Add slave attachment in the list
-            for slave_index in dct_associate_duplicate_attach_id_index:
-                if slave_index not in lst_index_to_delete:
-                    lst_index_to_delete.append(slave_index)
-            lst_index_to_delete.sort(reverse=True)
-            for index_to_delete in lst_index_to_delete:
+            set_index_to_delete.update(dct_associate_duplicate_attach_id_index)
+            for index_to_delete in sorted(set_index_to_delete, reverse=True):
                 attach_id = lst_attach_id[index_to_delete]
                 attach_xml_id = lst_attach_xml_id[index_to_delete]
                 _logger.info(
@@ -1460,6 +1531,17 @@ _logger = logging.getLogger(__name__)"""
                 dct_ir_attachment[4].pop(index_to_delete)
                 dct_ir_attachment[5].pop(index_to_delete)
 
+    @staticmethod
+    def _get_attachment_content_key(attachment):
+        """
+        Util function to compare content of attachments, the payload is
+        hashed once instead of compared by pair
+        :param attachment:
+        :return: tuple (size, sha256)
+        """
+        datas = attachment.datas or b""
+        return len(datas), hashlib.sha256(datas).hexdigest()
+
     @staticmethod
     def findall(p, s):
         """Yields all the positions of
@@ -2540,10 +2622,146 @@ _logger = logging.getLogger(__name__)"""
 
         return model_file_path
 
-    def _set_module_security(self, module, l_model_rules, l_model_csv_access):
+    def _get_module_snapshot(self, module):
         """
-        Function to set the module security file
+        Load groups, accesses and rules of a module with a fixed number of
+        grouped read, the security is rendered from it without query
         :param module:
+        :return: ModuleSnapshot
+        """
+        env = self.env
+        lst_model_value = module.o2m_models.read(
+            ["model", "access_ids", "rule_ids"]
+        )
+        lst_group_value = module.o2m_groups.read(
+            ["name", "comment", "implied_ids"], load="_classic_write"
+        )
+        lst_access_value = (
+            env["ir.model.access"]
+            .browse([b for a in lst_model_value for b in a["access_ids"]])
+            .read(
+                [
+                    "name",
+                    "model_id",
+                    "group_id",
+                    "perm_read",
+                    "perm_create",
+                    "perm_write",
+                    "perm_unlink",
+                ],
+                load="_classic_write",
+            )
+        )
+        lst_rule_value = (
+            env["ir.rule"]
+            .browse([b for a in lst_model_value for b in a["rule_ids"]])
+            .read(
+                [
+                    "name",
+                    "model_id",
+                    "domain_force",
+                    "active",
+                    "groups",
+                    "perm_read",
+                    "perm_create",
+                    "perm_write",
+                    "perm_unlink",
+                ],
+                load="_classic_write",
+            )
+        )
+
+        # Resolve xml_id of all groups and models in few queries
+        set_group_id = set(module.o2m_groups.ids)
+        for value in lst_group_value:
+            set_group_id.update(value["implied_ids"])
+        for value in lst_rule_value:
+            set_group_id.update(value["groups"])
+        set_group_id.update(
+            [a["group_id"] for a in lst_access_value if a["group_id"]]
+        )
+        groups = env["res.groups"].browse(list(set_group_id))
+        ir_models = env["ir.model"].browse(
+            list({a["model_id"] for a in lst_access_value + lst_rule_value})
+        )
+        self._get_xml_id_resolver().prefetch([groups, ir_models])
+        dct_group_xml_id = {a.id: self._get_group_data_name(a) for a in groups}
+        dct_model_name = {a.id: a.model for a in ir_models}
+        dct_model_xml_id = {
+            a.id: self._get_model_data_name(a, module_name=module.name)
+            for a in ir_models
+        }
+        dct_access_xml_id = {}
+        for value in env["ir.model.data"].search_read(
+            [
+                ("module", "=", module.name),
+                ("model", "=", "ir.model.access"),
+                ("res_id", "in", [a["id"] for a in lst_access_value]),
+            ],
+            ["name", "res_id"],
+        ):
+            dct_access_xml_id.setdefault(value["res_id"], value["name"])
+
+        dct_access = {
+            a["id"]: AccessSnapshot(
+                name=a["name"],
+                xml_id=dct_access_xml_id.get(a["id"])
+                or self._lower_replace(a["name"]),
+                model=dct_model_name[a["model_id"]],
+                group_xml_id=dct_group_xml_id.get(a["group_id"]),
+                perm_read=a["perm_read"],
+                perm_create=a["perm_create"],
+                perm_write=a["perm_write"],
+                perm_unlink=a["perm_unlink"],
+            )
+            for a in lst_access_value
+        }
+        dct_rule = {
+            a["id"]: RuleSnapshot(
+                id=a["id"],
+                name=a["name"],
+                model_xml_id=dct_model_xml_id[a["model_id"]],
+                domain_force=a["domain_force"],
+                active=a["active"],
+                lst_group_xml_id=tuple(
+                    dct_group_xml_id[b] for b in a["groups"]
+                ),
+                perm_read=a["perm_read"],
+                perm_create=a["perm_create"],
+                perm_write=a["perm_write"],
+                perm_unlink=a["perm_unlink"],
+            )
+            for a in lst_rule_value
+        }
+        return ModuleSnapshot(
+            name=module.name,
+            lst_group=tuple(
+                GroupSnapshot(
+                    name=a["name"],
+                    comment=a["comment"],
+                    xml_id=dct_group_xml_id[a["id"]],
+                    lst_implied_xml_id=tuple(
+                        dct_group_xml_id[b] for b in a["implied_ids"]
+                    ),
+                )
+                for a in lst_group_value
+            ),
+            lst_model=tuple(
+                ModelSnapshot(
+                    model=a["model"],
+                    lst_access=tuple(dct_access[b] for b in a["access_ids"]),
+                    lst_rule=tuple(dct_rule[b] for b in a["rule_ids"]),
+                )
+                for a in lst_model_value
+            ),
+        )
+
+    def _set_module_security(
+        self, module_snapshot, l_model_rules, l_model_csv_access
+    ):
+        """
+        Function to set the module security file
+        :param module_snapshot: ModuleSnapshot
         :param l_model_rules:
         :param l_model_csv_access:
         :return:
@@ -2553,14 +2771,13 @@ _logger = logging.getLogger(__name__)"""
             "id,name,model_id:id,group_id:id,perm_read,perm_write,perm_create,perm_unlink",
         )
 
-        if module.o2m_groups or l_model_rules:
+        if module_snapshot.lst_group or l_model_rules:
             l_module_security = ["<data>\n"]
 
-            for group in module.o2m_groups:
+            for group in module_snapshot.lst_group:
 
                 l_module_security += [
-                    '<record model="res.groups" id="%s">'
-                    % self._get_group_data_name(group)
+                    '<record model="res.groups" id="%s">' % group.xml_id
                 ]
                 l_module_security += [
                     '<field name="name">%s</field>' % group.name
@@ -2571,14 +2788,12 @@ _logger = logging.getLogger(__name__)"""
                         '<field name="comment">%s</field>' % group.comment
                     ]
 
-                if group.implied_ids:
+                if group.lst_implied_xml_id:
                     l_module_security += [
                         '<field name="implied_ids" eval="[%s]"/>'
                         % ", ".join(
-                            group.implied_ids.mapped(
-                                lambda g: "(4, ref('%s'))"
-                                % self._get_group_data_name(g)
-                            )
+                            "(4, ref('%s'))" % a
+                            for a in group.lst_implied_xml_id
                         )
                     ]
 
@@ -2588,7 +2803,7 @@ _logger = logging.getLogger(__name__)"""
 
             l_module_security += ["</data>"]
 
-            module_name = module.name.lower().strip()
+            module_name = module_snapshot.name.lower().strip()
             security_file_path = os.path.join(
                 self.code_generator_data.security_path, f"{module_name}.xml"
             )
@@ -2610,39 +2825,19 @@ _logger = logging.getLogger(__name__)"""
                 insert_first=True,
             )
 
-    def _get_model_access(self, module, model):
+    def _get_model_access(self, model):
         """
         Function to obtain the model access
-        :param model:
+        :param model: ModelSnapshot
         :return:
         """
 
         l_model_csv_access = []
 
-        for access in model.access_ids:
-            access_name = access.name
+        for access in model.lst_access:
+            access_model = self._get_model_model(access.model)
 
-            access_model_data = self.env["ir.model.data"].search(
-                [
-                    ("module", "=", module.name),
-                    ("model", "=", "ir.model.access"),
-                    ("res_id", "=", access.id),
-                ]
-            )
-
-            access_id = (
-                access_model_data[0].name
-                if access_model_data
-                else self._lower_replace(access_name)
-            )
-
-            access_model = self._get_model_model(access.model_id.model)
-
-            access_group = (
-                self._get_group_data_name(access.group_id)
-                if access.group_id
-                else ""
-            )
+            access_group = access.group_xml_id or ""
 
             access_read, access_create, access_write, access_unlink = (
                 1 if access.perm_read else 0,
@@ -2654,8 +2849,8 @@ _logger = logging.getLogger(__name__)"""
             l_model_csv_access.append(
                 "%s,%s,model_%s,%s,%s,%s,%s,%s"
                 % (
-                    access_id,
-                    access_name,
+                    access.xml_id,
+                    access.name,
                     access_model,
                     access_group,
                     access_read,
@@ -2667,16 +2862,16 @@ _logger = logging.getLogger(__name__)"""
 
         return l_model_csv_access
 
-    def _get_model_rules(self, module, model):
+    def _get_model_rules(self, model):
         """
         Function to obtain the model rules
-        :param model:
+        :param model: ModelSnapshot
         :return:
         """
 
         l_model_rules = []
 
-        for rule in model.rule_ids:
+        for rule in model.lst_rule:
 
             if rule.name:
                 l_model_rules.append(
@@ -2690,19 +2885,11 @@ _logger = logging.getLogger(__name__)"""
             else:
                 l_model_rules.append(
                     '<record model="ir.rule" id="%s_rrule_%s">'
-                    % (
-                        self._get_model_data_name(
-                            rule.model_id, module_name=module.name
-                        ),
-                        rule.id,
-                    )
+                    % (rule.model_xml_id, rule.id)
                 )
 
             l_model_rules.append(
-                '<field name="model_id" ref="%s"/>'
-                % self._get_model_data_name(
-                    rule.model_id, module_name=module.name
-                )
+                '<field name="model_id" ref="%s"/>' % rule.model_xml_id
             )
 
             if rule.domain_force:
@@ -2713,8 +2900,11 @@ _logger = logging.getLogger(__name__)"""
             if not rule.active:
                 l_model_rules.append('<field name="active" eval="False" />')
 
-            if rule.groups:
-                l_model_rules.append(self._get_m2m_groups(rule.groups))
+            if rule.lst_group_xml_id:
+                l_model_rules.append(
+                    '<field name="groups_id" eval="[(6,0, [%s])]" />'
+                    % ", ".join("ref(%s)" % a for a in rule.lst_group_xml_id)
+                )
 
             if not rule.perm_read:
                 l_model_rules.append('<field name="perm_read" eval="False" />')
@@ -2778,10 +2968,8 @@ _logger = logging.getLogger(__name__)"""
         lst_field_attribute = []
         compute = None
         lst_last_field_attribute = []
-        extra_info = (
-            self.env[f2export.model]
-            .fields_get(f2export.name)
-            .get(f2export.name)
+        extra_info = self._get_fields_get_cache().get(
+            f2export.model, f2export.name
         )
         dct_field_attribute = {}
 
@@ -3413,11 +3601,72 @@ _logger = logging.getLogger(__name__)"""
         Create log of code generator writer
         :return:
         """
+        # Generated files of all vals share the same storage
+        storage = self._create_code_generator_storage()
+        self.code_generator_storage = storage
         new_list = []
         for vals in vals_list:
             new_list.append(self.generate_writer(vals))
 
-        return super(CodeGeneratorWriter, self).create(new_list)
+        result = super(CodeGeneratorWriter, self).create(new_list)
+        if type(storage) is MemoryStorage:
+            # Keep it for other recordsets of the writer, like browse
+            for writer_id in result.ids:
+                storage_registry.register(
+                    (self.env.cr.dbname, writer_id), storage
+                )
+        return result
+
+    def _create_code_generator_storage(self):
+        """
+        Util function to create the storage from configuration
+        :return:
+        """
+        s_storage = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("code_generator.s_storage", default="disk")
+        )
+        if s_storage == "memory":
+            return MemoryStorage()
+        return FileSystemStorage()
+
+    def get_code_generator_storage(self):
+        """
+        Storage of generated files. During the generation, it's the storage
+        of the creation, after, the storage registered for the writer.
+        :return:
+        """
+        storage = getattr(self, "code_generator_storage", None)
+        if storage is not None:
+            return storage
+        if self.ids:
+            self.ensure_one()
+            storage = storage_registry.get((self.env.cr.dbname, self.id))
+            if storage is not None:
+                return storage
+        # Generated files are on disk
+        return FileSystemStorage()
+
+    def release_code_generator_storage(self):
+        """
+        Forget storages of these writers, free generated files in memory
+        :return:
+        """
+        for writer_id in self.ids:
+            storage_registry.release((self.env.cr.dbname, writer_id))
+
+    def _get_extractor_module_index(self):
+        """
+        Util function to share python files parsed of template modules during
+        the generation
+        :return: ExtractorModuleIndex
+        """
+        module_index = getattr(self, "extractor_module_index", None)
+        if module_index is None:
+            module_index = ExtractorModuleIndex()
+            self.extractor_module_index = module_index
+        return module_index
 
     def get_lst_file_generate(self, module, python_controller_writer):
         l_model_csv_access = []
@@ -3442,7 +3691,10 @@ _logger = logging.getLogger(__name__)"""
                         module, model, i
                     )
                     module.module_file_sync[model] = ExtractorModule(
-                        module, model, module.view_file_sync[model]
+                        module,
+                        model,
+                        module.view_file_sync[model],
+                        module_index=self._get_extractor_module_index(),
                     )
                     # TODO no need to keep memory
                     ExtractorController(
@@ -3474,19 +3726,22 @@ _logger = logging.getLogger(__name__)"""
                 if dct_result_xmldata:
                     dct_model_model_xmldata.update(dct_result_xmldata)
 
-            if not module.nomenclator_only:
-                l_model_csv_access += self._get_model_access(module, model)
-
-                l_model_rules += self._get_model_rules(module, model)
-
-        l_model_csv_access = sorted(
-            list(set(l_model_csv_access)),
-            key=lambda x: x,
-        )
         self._compute_xml_data_file(module, dct_model_model_xmldata)
         self._write_xml_data_file(dct_model_model_xmldata)
 
         if not module.nomenclator_only:
+            # After export of data, xml_id of data are reserved
+            module_snapshot = self._get_module_snapshot(module)
+            for model_snapshot in module_snapshot.lst_model:
+                l_model_csv_access += self._get_model_access(model_snapshot)
+
+                l_model_rules += self._get_model_rules(model_snapshot)
+
+            l_model_csv_access = sorted(
+                list(set(l_model_csv_access)),
+                key=lambda x: x,
+            )
+
             application_icon = self._set_module_menus(module)
 
             self.set_xml_data_file(module)
@@ -3498,7 +3753,7 @@ _logger = logging.getLogger(__name__)"""
             self.set_module_css_file(module)
 
             self._set_module_security(
-                module, l_model_rules, l_model_csv_access
+                module_snapshot, l_model_rules, l_model_csv_access
             )
 
             self._set_static_description_file(module, application_icon)
@@ -3518,11 +3773,6 @@ _logger = logging.getLogger(__name__)"""
 
         self.code_generator_data.generate_python_init_file(module)
 
-        self.code_generator_data.auto_format()
-        if module.enable_pylint_check:
-            # self.code_generator_data.flake8_check()
-            self.code_generator_data.pylint_check()
-
     def set_xml_data_file(self, module):
         pass
 
@@ -3593,6 +3843,27 @@ _logger = logging.getLogger(__name__)"""
                 )
                 cw.emit('ir_attach_id.write({"datas": datas})')
 
+    @staticmethod
+    def _format_and_sync_module(
+        code_generator_data, enable_pylint_check, path_sync_code, module_name
+    ):
+        """
+        Format generated files and sync code of a module.
+        No ORM access, it can run in a worker thread.
+        :param code_generator_data:
+        :param enable_pylint_check:
+        :param path_sync_code: False to ignore sync code
+        :param module_name:
+        :return: report of sync code, None when ignored
+        """
+        code_generator_data.auto_format()
+        if enable_pylint_check:
+            # code_generator_data.flake8_check()
+            code_generator_data.pylint_check()
+
+        if path_sync_code:
+            return code_generator_data.sync_code(path_sync_code, module_name)
+
     @api.multi
     def generate_writer(self, vals):
         modules = self.env["code.generator.module"].browse(
@@ -3622,19 +3893,75 @@ _logger = logging.getLogger(__name__)"""
         )
         vals["rootdir"] = rootdir
 
-        for module in modules:
-            # TODO refactor this to share variable in another class,
-            #  like that, self.code_generator_data will be associate to a class of generation of module
-            self.code_generator_data = CodeGeneratorData(module, path)
-            python_controller_writer = PythonControllerWriter(
-                module, self.code_generator_data
-            )
-            self.get_lst_file_generate(module, python_controller_writer)
+        # Extraction need the ORM and stay in this thread, the format of
+        # module N is done in a worker while module N+1 is extracted.
+        max_worker_format = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("code_generator.max_worker_format", default=0)
+        )
+        executor = (
+            ThreadPoolExecutor(max_workers=max_worker_format)
+            if max_worker_format > 0 and morethanone
+            else None
+        )
+        lst_future = []
+        lst_sync_report = []
+        self.extractor_module_index = ExtractorModuleIndex()
+        self.fields_get_cache = FieldsGetCache(self.env)
+        try:
+            for module in modules:
+                # TODO refactor this to share variable in another class,
+                #  like that, self.code_generator_data will be associate to a class of generation of module
+                self.code_generator_data = CodeGeneratorData(
+                    module, path, storage=self.get_code_generator_storage()
+                )
+                self.xml_id_resolver = XmlIdResolver(self.env)
+                python_controller_writer = PythonControllerWriter(
+                    module, self.code_generator_data
+                )
+                self.get_lst_file_generate(module, python_controller_writer)
+                self.xml_id_resolver.flush()
+
+                args_format = (
+                    self.code_generator_data,
+                    module.enable_pylint_check,
+                    module.path_sync_code if module.enable_sync_code else False,
+                    module.name,
+                )
+                if not executor:
+                    sync_report = self._format_and_sync_module(*args_format)
+                    lst_sync_report.append((module.name, sync_report))
+                    continue
 
-            if module.enable_sync_code:
-                self.code_generator_data.sync_code(
-                    module.path_sync_code, module.name
+                # Bound the number of module waiting in memory
+                lst_future_pending = [
+                    a for _, a in lst_future if not a.done()
+                ]
+                if len(lst_future_pending) >= max_worker_format:
+                    wait(lst_future_pending, return_when=FIRST_COMPLETED)
+                lst_future.append(
+                    (
+                        module.name,
+                        executor.submit(
+                            self._format_and_sync_module, *args_format
+                        ),
+                    )
                 )
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+        # Raise exception of worker
+        for module_name, future in lst_future:
+            lst_sync_report.append((module_name, future.result()))
+
+        vals["sync_code_report"] = self._get_sync_code_report(lst_sync_report)
+        if self.extractor_module_index.nb_parse:
+            _logger.info(
+                "Template python files parsed"
+                f" {self.extractor_module_index.nb_parse} times, reused"
+                f" {self.extractor_module_index.nb_hit} times."
+            )
 
         vals["list_path_file"] = ";".join(
             self.code_generator_data.lst_path_file
@@ -3642,5 +3969,30 @@ _logger = logging.getLogger(__name__)"""
 
         return vals
 
+    @staticmethod
+    def _get_sync_code_report(lst_sync_report):
+        """
+        Util function to format report of sync code
+        :param lst_sync_report: list of tuple (module_name, report)
+        :return: str, False when no module is synced
+        """
+        lst_line = []
+        for module_name, dct_report in lst_sync_report:
+            if dct_report is None:
+                continue
+            lst_line.append(
+                f"{module_name}: {len(dct_report['added'])} added,"
+                f" {len(dct_report['modified'])} modified,"
+                f" {len(dct_report['removed'])} removed"
+            )
+            for key, symbol in (
+                ("added", "+"),
+                ("modified", "~"),
+                ("removed", "-"),
+            ):
+                for relative_path in sorted(dct_report[key]):
+                    lst_line.append(f"{symbol} {relative_path}")
+        return "\n".join(lst_line) if lst_line else False
+
     def get_list_path_file(self):
         return self.list_path_file.split(";")
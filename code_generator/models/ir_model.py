@@ -5,6 +5,8 @@ from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 from odoo.models import MAGIC_COLUMNS
 
+from .ir_model_fields import BATCH_SETUP_MODELS_KEY
+
 _logger = logging.getLogger(__name__)
 
 MAGIC_FIELDS = MAGIC_COLUMNS + [
@@ -225,6 +227,22 @@ class IrModel(models.Model):
             )
         )
 
+    @api.model
+    def create(self, vals):
+        # Same as base create, registry setup can wait end of
+        # batch_setup_models
+        res = super(models.Model, self).create(vals)
+        if vals.get("state", "manual") == "manual":
+            set_model_batch = self._context.get(BATCH_SETUP_MODELS_KEY)
+            if set_model_batch is not None:
+                # Wait end of batch_setup_models
+                set_model_batch.add(vals["model"])
+            else:
+                self.env["ir.model.fields"]._setup_models_registry(
+                    [vals["model"]]
+                )
+        return res
+
     @api.constrains("model")
     def _check_model_name(self):
         for model in self:
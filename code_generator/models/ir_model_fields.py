@@ -2,6 +2,7 @@ import ast
 import inspect
 import logging
 import types
+from contextlib import contextmanager
 
 import astor
 
@@ -10,6 +11,9 @@ from odoo.exceptions import UserError, ValidationError
 
 _logger = logging.getLogger(__name__)
 
+# Context key of the set of models waiting a registry setup
+BATCH_SETUP_MODELS_KEY = "code_generator_batch_setup_models"
+
 FORCE_WIDGET_TYPES = [
     ("barcode_handler", "Barcode handler"),
     ("handle", "Handle"),
@@ -569,16 +573,58 @@ class IrModelFields(models.Model):
             self.clear_caches()  # for _existing_field_data()
 
             if vals["model"] in self.pool:
-                # setup models; this re-initializes model in registry
-                self.pool.setup_models(self._cr)
-                # update database schema of model and its descendant models
-                descendants = self.pool.descendants(
-                    [vals["model"]], "_inherits"
-                )
-                self.pool.init_models(
-                    self._cr,
-                    descendants,
-                    dict(self._context, update_custom_fields=True),
-                )
+                set_model_batch = self._context.get(BATCH_SETUP_MODELS_KEY)
+                if set_model_batch is not None:
+                    # Wait end of batch_setup_models
+                    set_model_batch.add(vals["model"])
+                else:
+                    self._setup_models_registry([vals["model"]])
 
         return res
+
+    @api.model
+    def _setup_models_registry(self, lst_model):
+        """
+        Re-initialize models in registry and update database schema
+        :param lst_model: list of model name
+        :return:
+        """
+        if not lst_model:
+            return
+        # setup models; this re-initializes model in registry
+        self.pool.setup_models(self._cr)
+        # New manual models are in registry after the setup
+        lst_model = [a for a in lst_model if a in self.pool]
+        if not lst_model:
+            return
+        # update database schema of model and its descendant models
+        descendants = self.pool.descendants(lst_model, "_inherits")
+        self.pool.init_models(
+            self._cr,
+            descendants,
+            dict(self._context, update_custom_fields=True),
+        )
+
+    @contextmanager
+    def batch_setup_models(self):
+        """
+        Defer registry setup when creating many manual models and fields,
+        all touched models are setup once at the end of the batch.
+        Usage:
+            with self.env["ir.model.fields"].batch_setup_models() as env:
+                env["ir.model.fields"].create(lst_value)
+        :return: environment to use in the batch
+        """
+        if self._context.get(BATCH_SETUP_MODELS_KEY) is not None:
+            # Already in a batch, the first one will setup models
+            yield self.env
+            return
+        set_model_batch = set()
+        yield self.with_context(
+            **{BATCH_SETUP_MODELS_KEY: set_model_batch}
+        ).env
+        if set_model_batch:
+            _logger.info(
+                f"Setup registry for {len(set_model_batch)} models in batch."
+            )
+            self._setup_models_registry(list(set_model_batch))
@@ -0,0 +1,71 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """
+    Immutable plain-Python description of records, rendered without query.
+    xml_id are resolved at load, values of relation are tuple.
+    Can be pickled.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            object.__setattr__(self, key, kwargs[key])
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __getstate__(self):
+        return tuple(getattr(self, a) for a in self.__slots__)
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            object.__setattr__(self, key, value)
+
+    def __repr__(self):
+        values = ", ".join(f"{a}={getattr(self, a)!r}" for a in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class GroupSnapshot(Snapshot):
+    __slots__ = ("name", "comment", "xml_id", "lst_implied_xml_id")
+
+
+class AccessSnapshot(Snapshot):
+    __slots__ = (
+        "name",
+        "xml_id",
+        "model",
+        "group_xml_id",
+        "perm_read",
+        "perm_create",
+        "perm_write",
+        "perm_unlink",
+    )
+
+
+class RuleSnapshot(Snapshot):
+    __slots__ = (
+        "id",
+        "name",
+        "model_xml_id",
+        "domain_force",
+        "active",
+        "lst_group_xml_id",
+        "perm_read",
+        "perm_create",
+        "perm_write",
+        "perm_unlink",
+    )
+
+
+class ModelSnapshot(Snapshot):
+    __slots__ = ("model", "lst_access", "lst_rule")
+
+
+class ModuleSnapshot(Snapshot):
+    __slots__ = ("name", "lst_group", "lst_model")
@@ -0,0 +1,2 @@
+from . import test_code_generator_data
+from . import test_extractor_view
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from odoo.tests import common
+
+from ..code_generator_data import CodeGeneratorData
+
+
+class TestCodeGeneratorData(common.TransactionCase):
+    def _reorder(self, lst_file, dct_depend):
+        """
+        Util function to reorder data files, each file declares the xml_id
+        of its name
+        :param lst_file: list of file name, original order
+        :param dct_depend: file name -> list of file name it depends on
+        :return: list of file name
+        """
+        cg_data = CodeGeneratorData(
+            SimpleNamespace(name="test_module", icon=False), "/tmp"
+        )
+        cg_data._lst_manifest_data_files = list(lst_file)
+        for file_name in lst_file:
+            cg_data.dct_data_metadata_file[file_name].append(f"id_{file_name}")
+        for file_name, lst_depend in dct_depend.items():
+            cg_data.dct_data_depend[file_name].extend(
+                [f"id_{a}" for a in lst_depend]
+            )
+        cg_data.reorder_manifest_data_files()
+        return cg_data.lst_manifest_data_files
+
+    def test_reorder_keep_valid_order(self):
+        self.assertEqual(
+            self._reorder(["b", "x", "y"], {"x": ["b"], "y": ["b"]}),
+            ["b", "x", "y"],
+        )
+
+    def test_reorder_siblings_keep_original_order(self):
+        self.assertEqual(
+            self._reorder(["x", "y", "b"], {"x": ["b"], "y": ["b"]}),
+            ["b", "x", "y"],
+        )
+        self.assertEqual(
+            self._reorder(["x", "a", "y", "b"], {"x": ["b"], "y": ["b"]}),
+            ["a", "b", "x", "y"],
+        )
+
+    def test_reorder_chain(self):
+        self.assertEqual(
+            self._reorder(
+                ["c", "a", "b", "d"], {"c": ["b"], "b": ["a"], "a": ["a"]}
+            ),
+            ["a", "b", "c", "d"],
+        )
+
+    def test_reorder_cycle_append_blocked_files(self):
+        self.assertEqual(
+            self._reorder(
+                ["x", "a", "y", "b"], {"x": ["y"], "y": ["x"], "b": ["x"]}
+            ),
+            ["a", "x", "y", "b"],
+        )
@@ -0,0 +1,151 @@
+import os
+from collections import defaultdict
+from types import SimpleNamespace
+
+from odoo.tests import common
+
+from ..extractor_view import ExtractorView
+
+# Items extracted from data/template_view.xml by the minidom extractor,
+# parent is the index of the parent item
+LST_EXPECTED_ITEM = [
+    {
+        "action_name": "action_a",
+        "button_type": "btn-primary",
+        "class_attr": "btn-primary oe_x",
+        "item_type": "button",
+        "label": "A",
+        "name": "action_a",
+        "section_type": "header",
+        "sequence": 1,
+    },
+    {
+        "action_name": "state",
+        "item_type": "field",
+        "name": "state",
+        "section_type": "header",
+        "sequence": 1,
+        "widget": "statusbar",
+    },
+    {
+        "action_name": "name",
+        "item_type": "field",
+        "section_type": "title",
+        "sequence": 1,
+    },
+    {
+        "class_attr": "oe_title",
+        "item_type": "div",
+        "section_type": "body",
+        "sequence": 1,
+    },
+    {
+        "item_type": "group",
+        "label": "Group",
+        "section_type": "body",
+        "sequence": 2,
+    },
+    {
+        "action_name": "a",
+        "item_type": "field",
+        "name": "a",
+        "parent": 4,
+        "password": True,
+        "section_type": "body",
+        "sequence": 1,
+    },
+    {
+        "action_name": "b",
+        "item_type": "field",
+        "name": "b",
+        "parent": 4,
+        "section_type": "body",
+        "sequence": 2,
+        "widget": "many2many_tags",
+    },
+    {
+        "class_attr": "x",
+        "colspan": 2,
+        "is_help": True,
+        "item_type": "html",
+        "label": 's">text <b>bold</b> tail\n<p>second &lt; line</p>',
+        "section_type": "body",
+        "sequence": 4,
+        "title": 'q&"r\ns',
+    },
+    {
+        "background_type": "bg-info",
+        "class_attr": "bg-info",
+        "item_type": "html",
+        "label": "Infomoreend",
+        "section_type": "body",
+        "sequence": 5,
+    },
+]
+
+
+class TestExtractorView(common.TransactionCase):
+    def test_extract_template_view(self):
+        path_view = os.path.join(
+            os.path.dirname(__file__), "data", "template_view.xml"
+        )
+        with open(path_view) as file:
+            arch_base = file.read()
+        code_generator_id = self.env["code.generator.module"].create(
+            {"name": "test_extractor_view", "shortdesc": "Test"}
+        )
+
+        extractor = ExtractorView.__new__(ExtractorView)
+        extractor.env = self.env
+        extractor.code_generator_id = code_generator_id
+        extractor.model_id = SimpleNamespace(field_id=[])
+        extractor.dct_model = defaultdict(dict)
+        extractor.dct_field = defaultdict(dict)
+        extractor.module_attr = defaultdict(dict)
+        extractor.var_model = "x.model"
+        extractor.view_ids = [
+            SimpleNamespace(
+                arch_base=arch_base,
+                name="template_view",
+                type="form",
+                model="x.model",
+                inherit_id=False,
+                model_data_id=SimpleNamespace(name="view_template_form"),
+            )
+        ]
+        extractor._parse_view_ids()
+
+        view = self.env["code.generator.view"].search(
+            [("code_generator_id", "=", code_generator_id.id)]
+        )
+        self.assertEqual(len(view), 1)
+        self.assertEqual(view.view_type, "form")
+        self.assertEqual(view.view_attr_string, "Template")
+        self.assertEqual(view.view_attr_class, "o_template")
+        self.assertEqual(view.id_name, "view_template_form")
+        self.assertTrue(view.has_body_sheet)
+
+        lst_item = view.view_item_ids.sorted("id")
+        self.assertEqual(len(lst_item), len(LST_EXPECTED_ITEM))
+        for item, dct_expected in zip(lst_item, LST_EXPECTED_ITEM):
+            dct_expected = dict(dct_expected)
+            parent = dct_expected.pop("parent", None)
+            if parent is None:
+                self.assertFalse(item.parent_id)
+            else:
+                self.assertEqual(item.parent_id, lst_item[parent])
+            for key, value in dct_expected.items():
+                self.assertEqual(item[key], value, f"Field {key}")
+
+        self.assertEqual(
+            extractor.module_attr["x.model"],
+            {
+                "b": {"force_widget": "many2many_tags"},
+                "state": {"force_widget": "statusbar"},
+            },
+        )
+        self.assertEqual(
+            extractor.dct_model["x.model"]["activity_ids"],
+            {"code_generator_form_simple_view_sequence": 15},
+        )
+        self.assertTrue(extractor.model_id.enable_activity)
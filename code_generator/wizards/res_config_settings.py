@@ -21,3 +21,55 @@ class ResConfigSettings(models.TransientModel):
         config_parameter="code_generator.s_data2export",
         help="Model data to export",
     )
+
+    max_worker_format = fields.Integer(
+        string="Max worker format",
+        default=0,
+        config_parameter="code_generator.max_worker_format",
+        help=(
+            "Number of modules formatted in parallel while the next module"
+            " is extracted, when generating many modules. 0 to format"
+            " sequentially."
+        ),
+    )
+
+    s_storage = fields.Selection(
+        selection=[
+            ("disk", "Write generated files in a temporary directory."),
+            (
+                "memory",
+                "Keep generated files in memory, only formatters use the"
+                " disk.",
+            ),
+        ],
+        string="Storage of generated files",
+        default="disk",
+        config_parameter="code_generator.s_storage",
+        help="Storage of generated files",
+    )
+
+    # Selection, an Integer parameter at 0 is deleted by set_values
+    s_zip_compress_level = fields.Selection(
+        selection=[
+            ("0", "0 - Store only, fast for LAN download"),
+            ("1", "1 - Fastest"),
+            ("2", "2"),
+            ("3", "3"),
+            ("4", "4"),
+            ("5", "5"),
+            ("6", "6 - Default"),
+            ("7", "7"),
+            ("8", "8"),
+            ("9", "9 - Smallest"),
+        ],
+        string="Zip compression level",
+        default="6",
+        config_parameter="code_generator.zip_compress_level",
+        help="Compression level of the downloaded zip",
+    )
+
+    zip_debug_testzip = fields.Boolean(
+        string="Check zip",
+        config_parameter="code_generator.zip_debug_testzip",
+        help="Debug, check the CRC of all files of the downloaded zip.",
+    )
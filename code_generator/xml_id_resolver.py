@@ -0,0 +1,112 @@
+import logging
+from collections import defaultdict
+
+_logger = logging.getLogger(__name__)
+
+
+class XmlIdResolver:
+    """
+    Per-generation cache of ir.model.data, resolve (model, res_id) -> xml_id
+    without a search by record. New xml_id are reserved in memory and
+    created in batch with flush().
+    """
+
+    def __init__(self, env):
+        self._env = env
+        # (model, res_id) -> (module, name), missing xml_id are not cached,
+        # they can be created outside the resolver, like in views wizard
+        self._dct_xml_id = {}
+        self._set_name_taken = set()
+        self._set_prefix_loaded = set()
+        self._lst_pending_value = []
+
+    def prefetch(self, records):
+        """
+        Load xml_id of all records in one query by model
+        :param records: recordset or list of recordset
+        :return:
+        """
+        if not isinstance(records, (list, tuple)):
+            records = [records]
+        dct_model_ids = defaultdict(set)
+        for record in records:
+            if not record:
+                continue
+            for res_id in record.ids:
+                if (record._name, res_id) not in self._dct_xml_id:
+                    dct_model_ids[record._name].add(res_id)
+
+        for model, set_ids in dct_model_ids.items():
+            lst_data = self._env["ir.model.data"].search_read(
+                [("model", "=", model), ("res_id", "in", list(set_ids))],
+                ["module", "name", "res_id"],
+                order="id",
+            )
+            for data in lst_data:
+                key = (model, data["res_id"])
+                # Keep the first one, like search()[0]
+                if key not in self._dct_xml_id:
+                    self._dct_xml_id[key] = (data["module"], data["name"])
+
+    def get(self, record):
+        """
+        Get xml_id of a record
+        :param record:
+        :return: tuple (module, name) or None
+        """
+        key = (record._name, record.id)
+        if key not in self._dct_xml_id:
+            # Search again when missing, don't trust a previous negative
+            self.prefetch(record)
+        return self._dct_xml_id.get(key)
+
+    def _load_name_prefix(self, prefix):
+        if prefix in self._set_prefix_loaded:
+            return
+        self._set_prefix_loaded.add(prefix)
+        lst_data = self._env["ir.model.data"].search_read(
+            [("name", "=like", f"{prefix}%")], ["name"]
+        )
+        self._set_name_taken.update([a["name"] for a in lst_data])
+
+    def reserve(self, record, name, module_name, prefix=""):
+        """
+        Reserve a free name for the record, the ir.model.data is created at
+        flush().
+        :param record:
+        :param name: wanted name, add suffix _1, _2 when it already exist
+        :param module_name:
+        :param prefix: common prefix of name, to load existing name by group
+        :return: the reserved name
+        """
+        self._load_name_prefix(prefix if prefix else name)
+        new_name = name
+        i = 0
+        while new_name in self._set_name_taken:
+            i += 1
+            new_name = f"{name}_{i}"
+        self._set_name_taken.add(new_name)
+        self._dct_xml_id[(record._name, record.id)] = (module_name, new_name)
+        self._lst_pending_value.append(
+            {
+                "name": new_name,
+                "model": record._name,
+                "module": module_name,
+                "res_id": record.id,
+                "noupdate": True,  # If it's False, target record (res_id) will be removed while module update
+            }
+        )
+        return new_name
+
+    def flush(self):
+        """
+        Create all reserved ir.model.data in one batch
+        :return:
+        """
+        if not self._lst_pending_value:
+            return
+        _logger.info(
+            f"Create {len(self._lst_pending_value)} ir.model.data in batch."
+        )
+        self._env["ir.model.data"].create(self._lst_pending_value)
+        self._lst_pending_value = []
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_POOL_IDLE_TIMEOUT = 300
+ACQUIRE_TIMEOUT = 60
+
+
+class DbConnectionPool:
+    """
+    Pool of connections to an external database. Idle connections are
+    closed after idle_timeout seconds, or with close_idle().
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size=DEFAULT_POOL_SIZE,
+        idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+    ):
+        """
+        :param connect: function without argument returning a new connection
+        :param max_size: max connections open at the same time
+        :param idle_timeout: seconds before closing an idle connection
+        """
+        self.connect = connect
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        # list of tuple (connection, time of release)
+        self._lst_idle = []
+        self._nb_used = 0
+        self._condition = threading.Condition()
+        # Odoo cursor -> True, while its commit or rollback is awaited. Weak,
+        # a cursor closed without hook is forgotten.
+        self._dct_transaction = weakref.WeakKeyDictionary()
+
+    def acquire(self):
+        """
+        Get an idle connection, open a new one when under max_size
+        :return: connection
+        """
+        self.close_idle(self.idle_timeout)
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._lst_idle or self._nb_used < self.max_size,
+                timeout=ACQUIRE_TIMEOUT,
+            ):
+                raise RuntimeError(
+                    f"No connection available in pool after"
+                    f" {ACQUIRE_TIMEOUT} seconds, all {self.max_size}"
+                    " connections are used."
+                )
+            self._nb_used += 1
+            if self._lst_idle:
+                return self._lst_idle.pop()[0]
+        try:
+            return self.connect()
+        except Exception:
+            with self._condition:
+                self._nb_used -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """
+        Give back the connection, the external transaction is rollback
+        :param connection:
+        :return:
+        """
+        try:
+            connection.rollback()
+        except Exception as e:
+            _logger.warning(f"Close broken connection: {e}")
+            self._close(connection)
+            connection = None
+        with self._condition:
+            self._nb_used -= 1
+            if connection is not None:
+                self._lst_idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager of acquire and release
+        :return:
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_idle(self, idle_timeout=0):
+        """
+        Close idle connections released since more than idle_timeout
+        :param idle_timeout: seconds, 0 to close all idle connections
+        :return:
+        """
+        limit = time.monotonic() - idle_timeout
+        with self._condition:
+            lst_close = [a for a, t in self._lst_idle if t <= limit]
+            self._lst_idle = [a for a in self._lst_idle if a[1] > limit]
+        for connection in lst_close:
+            self._close(connection)
+
+    def close_idle_at_end_of_transaction(self, cr):
+        """
+        Close all idle connections at commit or rollback of the Odoo cursor
+        :param cr: Odoo cursor
+        :return:
+        """
+        with self._condition:
+            if cr in self._dct_transaction:
+                return
+            self._dct_transaction[cr] = True
+        cr_ref = weakref.ref(cr)
+
+        def close_idle():
+            with self._condition:
+                cr_hook = cr_ref()
+                if cr_hook is not None:
+                    self._dct_transaction.pop(cr_hook, None)
+            self.close_idle()
+
+        # Handlers of both events are removed when one is called
+        cr.after("commit", close_idle)
+        cr.after("rollback", close_idle)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception as e:
+            _logger.warning(f"Cannot close connection: {e}")
@@ -1,10 +1,22 @@
+import functools
 import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
 
 import psycopg2
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
 
+from ..db_connection_pool import (
+    DEFAULT_POOL_IDLE_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DbConnectionPool,
+)
+
 _logger = logging.getLogger(__name__)
 
 INVALIDPORT = "The specify port is invalid."
@@ -14,6 +26,14 @@ PYMSSQLUNINSTALLED = "Verify that the pymssql package is installed."
 CONNECTIONPROBLEM = "A connection problem occur."
 CREATEDBPROBLEM = "An error occur creating the database."
 
+# Schema of external databases, by process,
+# (dbname, code.generator.db id) -> (time of read, dict)
+_dct_db_schema_cache = {}
+DEFAULT_DB_SCHEMA_CACHE_TTL = 300
+# Connection pools, (sgdb, host, port, database, user) -> DbConnectionPool
+_dct_db_pool = {}
+_db_pool_lock = threading.Lock()
+
 
 class CodeGeneratorDbType(models.Model):
     _name = "code.generator.db.type"
@@ -63,6 +83,59 @@ class CodeGeneratorDb(models.Model):
         default=False,
     )
 
+    data_chunk_size = fields.Integer(
+        string="Data chunk size",
+        help=(
+            "Number of rows read and created by chunk when migrating data,"
+            " with a server-side cursor. 0 read all rows at once."
+        ),
+    )
+
+    pool_size = fields.Integer(
+        string="Pool size",
+        default=DEFAULT_POOL_SIZE,
+        help="Max connections open at the same time to this database.",
+    )
+
+    pool_idle_timeout = fields.Integer(
+        string="Pool idle timeout",
+        default=DEFAULT_POOL_IDLE_TIMEOUT,
+        help="Seconds before closing an unused connection.",
+    )
+
+    schema_cache_ttl = fields.Integer(
+        string="Schema cache duration",
+        default=DEFAULT_DB_SCHEMA_CACHE_TTL,
+        help=(
+            "Seconds before reading again the schema of the database, each"
+            " worker keeps its own copy. 0 to read it each time."
+        ),
+    )
+
+    data_max_worker = fields.Integer(
+        string="Migration workers",
+        help=(
+            "Number of tables read at the same time from this database when"
+            " migrating data, for tables without dependency between them."
+            " 0 or 1 migrate tables one by one."
+        ),
+    )
+
+    binary_max_memory_size = fields.Integer(
+        string="Binary max memory size (MB)",
+        help=(
+            "When migrating a binary column from file path, files bigger"
+            " than this size are copied straight in the filestore instead"
+            " of loaded in memory. Need a binary field stored in attachment."
+            " 0 load all files in memory."
+        ),
+    )
+
+    data_chunk_commit = fields.Boolean(
+        string="Commit by chunk",
+        help="Commit the transaction after each chunk of migrated data.",
+    )
+
     _sql_constraints = [
         (
             "unique_db",
@@ -84,40 +157,49 @@ class CodeGeneratorDb(models.Model):
                     .browse(value["m2o_dbtype"])
                     .name
                 )
-                cr = self.get_db_cr(
+                with self._borrow_db_cr(
                     sgdb=sgdb,
                     database=value["database"],
                     host=value["host"],
                     port=value["port"],
                     user=value["user"],
                     password=value["password"],
-                )
-
-                result = super(CodeGeneratorDb, self).create(value)
+                ) as cr:
+                    result = super(CodeGeneratorDb, self).create(value)
 
-                str_query_4_tables = self.get_db_query_4_tables(
-                    sgdb, value["schema"], value["database"]
-                )
-                cr.execute(str_query_4_tables)
-                for table_info in cr.fetchall():
+                    str_query_4_tables = self.get_db_query_4_tables(
+                        sgdb, value["schema"], value["database"]
+                    )
+                    cr.execute(str_query_4_tables)
+                    lst_table_info = cr.fetchall()
+                lst_dct_table = []
+                for table_info in lst_table_info:
                     table_name = table_info[0]
                     split_name = table_name.split("_", maxsplit=1)
                     if len(split_name) > 1:
                         module_name = split_name[0]
                     else:
                         module_name = ""
-                    dct_all_table = dict(
-                        m2o_db=result.id,
-                        name=table_name,
-                        table_type="view"
-                        if table_info[1] == "VIEW"
-                        else "table",
-                        module_name=module_name,
+                    lst_dct_table.append(
+                        dict(
+                            m2o_db=result.id,
+                            name=table_name,
+                            table_type="view"
+                            if table_info[1] == "VIEW"
+                            else "table",
+                            module_name=module_name,
+                        )
                     )
 
-                    self.env["code.generator.db.table"].sudo().create(
-                        dct_all_table
-                    )
+                before_time = time.time()
+                self.env["code.generator.db.table"].sudo().create(
+                    lst_dct_table
+                )
+                _logger.info(
+                    f"Register {len(lst_dct_table)} tables of database"
+                    f" {result.database} in"
+                    f" {time.time() - before_time:.3f} s"
+                )
 
             except Exception as e:
                 failure += 1
@@ -128,9 +210,254 @@ class CodeGeneratorDb(models.Model):
 
         return result
 
+    @api.multi
+    def write(self, vals):
+        self.clear_db_schema_cache()
+        return super(CodeGeneratorDb, self).write(vals)
+
+    @api.multi
+    def clear_db_schema_cache(self):
+        """
+        Forget the cached schema, used by the button Refresh schema after a
+        change on the external database
+        :return:
+        """
+        for db in self:
+            _dct_db_schema_cache.pop((self.env.cr.dbname, db.id), None)
+
+    @api.multi
+    def get_db_schema(self):
+        """
+        Read columns, primary keys and foreign keys of all tables in 3
+        queries, cached by record for schema_cache_ttl seconds.
+        :return: dict table_name -> dict with keys
+            columns: list of row of information_schema.columns,
+            primary_key: set of column name,
+            foreign_key: dict column name -> (table name, column name)
+        """
+        self.ensure_one()
+        key = (self.env.cr.dbname, self.id)
+        cache_value = _dct_db_schema_cache.get(key)
+        if cache_value is not None:
+            read_time, dct_schema = cache_value
+            if time.monotonic() - read_time < self.schema_cache_ttl:
+                return dct_schema
+
+        sgdb = self.m2o_dbtype.name
+        dct_schema = defaultdict(
+            lambda: {"columns": [], "primary_key": set(), "foreign_key": {}}
+        )
+        with self.get_cursor() as cr:
+            cr.execute(
+                self.get_db_query_4_schema_columns(
+                    sgdb, self.schema, self.database
+                )
+            )
+            lst_column_info = cr.fetchall()
+            cr.execute(self.get_q_4schema_constraints(self.database))
+            lst_primary_key = cr.fetchall()
+            cr.execute(
+                self.get_q_4schema_constraints(
+                    self.database, fkey=True, sgdb=sgdb
+                )
+            )
+            lst_foreign_key = cr.fetchall()
+
+        for column_info in lst_column_info:
+            dct_schema[column_info[2]]["columns"].append(column_info)
+
+        for table_name, column_name in lst_primary_key:
+            dct_schema[table_name]["primary_key"].add(column_name)
+
+        for (
+            table_name,
+            column_name,
+            relation_table_name,
+            relation_column_name,
+        ) in lst_foreign_key:
+            # Keep the first one, like fetchone()
+            dct_schema[table_name]["foreign_key"].setdefault(
+                column_name, (relation_table_name, relation_column_name)
+            )
+
+        dct_schema = dict(dct_schema)
+        _logger.info(
+            f"Read schema of {len(dct_schema)} tables from database"
+            f" {self.database}."
+        )
+        _dct_db_schema_cache[key] = (time.monotonic(), dct_schema)
+        return dct_schema
+
+    @api.multi
+    def get_cursor(self, stream=False):
+        """
+        Context manager of a cursor on this database, from the pool
+        :param stream: unbuffered cursor, rows are read from the server
+            with fetchmany
+        :return:
+        """
+        self.ensure_one()
+        return self._borrow_db_cr(
+            sgdb=self.m2o_dbtype.name,
+            database=self.database,
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            stream=stream,
+            pool_size=self.pool_size,
+            pool_idle_timeout=self.pool_idle_timeout,
+        )
+
     def get_db_cr(self, sgdb, database, host, port, user, password):
         """
-        Util function to obtain an specific database cursor
+        Util function to obtain an specific database cursor, on a new
+        connection out of the pool. Prefer get_cursor.
+        :param sgdb:
+        :param database:
+        :param host:
+        :param port:
+        :param user:
+        :param password:
+        :return:
+        """
+        conn = self._connect_db(
+            sgdb, database, host, self.get_port(port), user, password
+        )
+        return conn.cursor()
+
+    @contextmanager
+    def _borrow_db_cr(
+        self,
+        sgdb,
+        database,
+        host,
+        port,
+        user,
+        password,
+        stream=False,
+        pool_size=DEFAULT_POOL_SIZE,
+        pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+    ):
+        """
+        Context manager to obtain an specific database cursor. The
+        connection is taken from a pool and given back at exit, idle
+        connections are closed at the end of the Odoo transaction.
+        :param sgdb:
+        :param database:
+        :param host:
+        :param port:
+        :param user:
+        :param password:
+        :param stream: unbuffered cursor, rows are read from the server
+            with fetchmany
+        :param pool_size: max connections open at the same time
+        :param pool_idle_timeout: seconds before closing an idle connection
+        :return:
+        """
+
+        pool = self._get_db_pool(
+            sgdb,
+            database,
+            host,
+            port,
+            user,
+            password,
+            pool_size=pool_size,
+            pool_idle_timeout=pool_idle_timeout,
+        )
+        with pool.connection() as conn:
+            if not stream:
+                cr = conn.cursor()
+            elif sgdb == "PostgreSQL":
+                # Named cursor is a server-side cursor
+                cr = conn.cursor(name=f"code_generator_{uuid.uuid4().hex}")
+            elif sgdb == "MySQL":
+                import pymysql
+
+                cr = conn.cursor(pymysql.cursors.SSCursor)
+            else:
+                # pymssql read rows from the server while fetching
+                cr = conn.cursor()
+            try:
+                yield cr
+            finally:
+                cr.close()
+
+    @api.multi
+    def get_pool(self):
+        """
+        Get the connection pool of this database
+        :return: DbConnectionPool
+        """
+        self.ensure_one()
+        return self._get_db_pool(
+            sgdb=self.m2o_dbtype.name,
+            database=self.database,
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            pool_size=self.pool_size,
+            pool_idle_timeout=self.pool_idle_timeout,
+        )
+
+    def _get_db_pool(
+        self,
+        sgdb,
+        database,
+        host,
+        port,
+        user,
+        password,
+        pool_size=DEFAULT_POOL_SIZE,
+        pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+    ):
+        """
+        Get or create the connection pool, idle connections are closed at
+        the end of the Odoo transaction.
+        :param sgdb:
+        :param database:
+        :param host:
+        :param port:
+        :param user:
+        :param password:
+        :param pool_size: max connections open at the same time
+        :param pool_idle_timeout: seconds before closing an idle connection
+        :return: DbConnectionPool
+        """
+        port = self.get_port(port)
+        key = (sgdb, host, port, database, user)
+        # Static function, the pool must not keep the environment
+        connect = functools.partial(
+            CodeGeneratorDb._connect_db,
+            sgdb,
+            database,
+            host,
+            port,
+            user,
+            password,
+        )
+        pool_size = pool_size or DEFAULT_POOL_SIZE
+        with _db_pool_lock:
+            pool = _dct_db_pool.get(key)
+            if pool is None:
+                pool = DbConnectionPool(
+                    connect, max_size=pool_size, idle_timeout=pool_idle_timeout
+                )
+                _dct_db_pool[key] = pool
+            else:
+                # Configuration can change between calls
+                pool.connect = connect
+                pool.max_size = pool_size
+                pool.idle_timeout = pool_idle_timeout
+        pool.close_idle_at_end_of_transaction(self.env.cr)
+        return pool
+
+    @staticmethod
+    def _connect_db(sgdb, database, host, port, user, password):
+        """
+        Util function to open a new connection
         :param sgdb:
         :param database:
         :param host:
@@ -140,7 +467,7 @@ class CodeGeneratorDb(models.Model):
         :return:
         """
 
-        conn, port = None, self.get_port(port)
+        conn = None
         if sgdb == "PostgreSQL":
 
             try:
@@ -188,7 +515,7 @@ class CodeGeneratorDb(models.Model):
                 raise ValidationError(PYMSSQLUNINSTALLED)
 
         if conn:
-            return conn.cursor()
+            return conn
 
         else:
             raise ValidationError(CONNECTIONPROBLEM)
@@ -216,6 +543,53 @@ class CodeGeneratorDb(models.Model):
 
         return query + """ ORDER BY table_name """
 
+    @staticmethod
+    def get_db_query_4_schema_columns(sgdb, schema, database):
+        """
+        Function to obtain the SELECT query for columns of all tables
+        :param sgdb:
+        :param schema:
+        :param database:
+        :return:
+        """
+
+        query = " SELECT * FROM information_schema.columns "
+
+        if sgdb != "SQLServer":
+            query += (
+                " WHERE table_schema ="
+                f" '{schema if sgdb == 'PostgreSQL' else database}' "
+            )
+
+        return query + " ORDER BY table_name, ordinal_position "
+
+    @staticmethod
+    def get_q_4schema_constraints(database, fkey=False, sgdb=None):
+        """
+        Function to obtain the SELECT query for constraints of all tables
+        :param database:
+        :param fkey: foreign key, else primary key
+        :param sgdb:
+        :return:
+        """
+
+        if fkey:
+            if sgdb != "MySQL":
+                return f""" SELECT tc.table_name, kcu.column_name, ccu.table_name, ccu.column_name FROM information_schema.table_constraints AS tc
+                JOIN information_schema.key_column_usage AS kcu ON tc.constraint_name = kcu.constraint_name
+                JOIN information_schema.constraint_column_usage AS ccu ON ccu.constraint_name = tc.constraint_name
+                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = '{database}' """
+
+            else:
+                return f""" SELECT tc.table_name, kcu.column_name, kcu.referenced_table_name, kcu.referenced_column_name FROM information_schema.table_constraints AS tc
+                JOIN information_schema.key_column_usage AS kcu ON tc.constraint_name = kcu.constraint_name
+                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = '{database}' """
+
+        else:
+            return f""" SELECT tc.table_name, kcu.column_name FROM information_schema.table_constraints AS tc
+            JOIN information_schema.key_column_usage AS kcu ON tc.constraint_name = kcu.constraint_name
+            WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_schema = '{database}' """
+
     @staticmethod
     def get_port(port):
         """
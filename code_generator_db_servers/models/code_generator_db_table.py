@@ -1,9 +1,13 @@
 import base64
+import hashlib
 import logging
+import mimetypes
 import os
 import re
+import shutil
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 import psycopg2
 import unidecode
@@ -25,6 +29,9 @@ TABLEFIELDPROBLEM = (
     "A connection problem occur trying to obtain a table fields."
 )
 TABLEDATAPROBLEM = "A connection problem occur trying to obtain a table data."
+# Threads reading files of binary column
+BINARY_MAX_WORKER = 4
+BINARY_BLOCK_SIZE = 1024 * 1024
 
 
 class CodeGeneratorDbTable(models.Model):
@@ -205,8 +212,10 @@ class CodeGeneratorDbTable(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        for value in vals_list:
-            result = super(CodeGeneratorDbTable, self).create(value)
+        results = super(CodeGeneratorDbTable, self).create(vals_list)
+        # The schema is read once by database, columns are created in batch
+        lst_column_value = []
+        for result in results:
             lst_fields = self.get_table_fields(
                 result.name, result.m2o_db, mark_temporary_field=True
             )
@@ -228,25 +237,9 @@ class CodeGeneratorDbTable(models.Model):
                     column_value["relation_column"] = dct_field.get(
                         "relation_column"
                     )
-                self.env["code.generator.db.column"].create(column_value)
-
-    @api.model
-    def _conform_model_created_data(self, model_created_fields):
-        """
-        Function to conform the data for a created model
-        :param model_created_fields:
-        :return:
-        """
-
-        def _inner_conform(t_data):
-            d_data = dict()
-            pos = 0
-            for model_created_field in model_created_fields:
-                d_data[model_created_field] = t_data[pos]
-                pos += 1
-            return d_data
-
-        return _inner_conform
+                lst_column_value.append(column_value)
+        self.env["code.generator.db.column"].create(lst_column_value)
+        return results
 
     @api.multi
     def generate_module(self, code_generator_id=None):
@@ -287,10 +280,20 @@ class CodeGeneratorDbTable(models.Model):
             lst_module.append(module)
 
         before_time = time.process_time()
+        dct_models_created = {}
+        # Setup registry once for all models of all modules
+        with self.env["ir.model.fields"].batch_setup_models() as env:
+            for module_name, lst_table in dct_module_table.items():
+                table_ids = self.browse([a.id for a in lst_table])
+                dct_models_created[module_name] = self.with_env(
+                    env
+                )._create_table_models(dct_module.get(module_name), table_ids)
         for module_name, lst_table in dct_module_table.items():
             table_ids = self.browse([a.id for a in lst_table])
-            self._compute_table(
-                dct_module.get(module_name), module_name, table_ids
+            self._migrate_table_data(
+                module_name,
+                table_ids,
+                dct_models_created[module_name].with_env(self.env),
             )
         after_time = time.process_time()
         _logger.info(
@@ -299,7 +302,13 @@ class CodeGeneratorDbTable(models.Model):
         )
         return lst_module
 
-    def _compute_table(self, cg_module_id, module_name, table_ids):
+    def _create_table_models(self, cg_module_id, table_ids):
+        """
+        Create models and fields of tables, call it in batch_setup_models
+        :param cg_module_id: code.generator module
+        :param table_ids: code.generator.db.table
+        :return: created ir.model
+        """
         # Not supported
         # Double link
         # Double data link
@@ -318,30 +327,44 @@ class CodeGeneratorDbTable(models.Model):
         self.add_one2many(table_ids, lst_model_dct)
 
         _logger.info("Creating all ir.model...")
+        return self.env["ir.model"].create(lst_model_dct)
 
-        models_created = self.env["ir.model"].create(lst_model_dct)
-
-        # Migrate data
-        table_nomenclator_ids = table_ids.filtered("nomenclator").sorted(
-            key=lambda a: a.order_extract_data
+    def _migrate_table_data(self, module_name, table_ids, models_created):
+        """
+        Migrate data of tables, then delete fields marked to delete
+        :param module_name:
+        :param table_ids: code.generator.db.table
+        :param models_created: result of _create_table_models
+        :return:
+        """
+        # Migrate data, level by level of many2one dependency
+        table_nomenclator_ids = table_ids.filtered("nomenclator")
+        max_worker = max(
+            table_nomenclator_ids.mapped("m2o_db.data_max_worker") or [0]
         )
-        for seq, table_id in enumerate(table_nomenclator_ids):
-            _logger.info(f"Parse #{seq} - {table_id.name}")
-            self.generate_data(table_id)
+        dct_level_table = defaultdict(list)
+        for table_id in table_nomenclator_ids:
+            dct_level_table[table_id.order_extract_data].append(table_id)
+        for level in sorted(dct_level_table):
+            lst_table = dct_level_table[level]
+            _logger.info(
+                f"Migrate data level {level}, {len(lst_table)} tables."
+            )
+            self._generate_data_level(lst_table, max_worker)
 
         # Delete field, after compute stuff
         _logger.info("Delete fields after compute with it.")
         before_time = time.process_time()
 
-        for model_id in models_created:
-            field_ids = model_id.field_id.filtered(
-                lambda x: x.db_columns_ids.delete
-            )
-            field_ids.unlink()
+        # Unlink in one call, the registry is setup only once
+        field_ids = models_created.mapped("field_id").filtered(
+            lambda x: x.db_columns_ids.delete
+        )
+        field_ids.unlink()
 
         after_time = time.process_time()
         _logger.info(
-            "DEBUG time execution _compute_table unlinks"
+            "DEBUG time execution _migrate_table_data unlinks"
             f" {after_time - before_time}"
         )
         _logger.info(f"End of migration for module {module_name}")
@@ -431,7 +454,13 @@ class CodeGeneratorDbTable(models.Model):
             dct_model["description"] = table.new_description
         return dct_model
 
-    def generate_data(self, table_id):
+    def _get_migration_plan(self, table_id):
+        """
+        Prepare the migration of a table, all ORM access are done here.
+        The plan is used by _transform_data, it can run in a worker thread.
+        :param table_id:
+        :return: dict
+        """
         # Get columns to fetch data
         column_nomenclator_ids = table_id.o2m_columns.filtered(
             lambda a: not a.ignore_field
@@ -465,156 +494,477 @@ class CodeGeneratorDbTable(models.Model):
             )
         ]
 
-        # Fetch all data
-        l_foreign_table_data = self.get_table_data(
-            table_id.name,
-            table_id.m2o_db,
-            lst_column_name,
-            lst_query_replace=lst_query_replace,
-        )
+        return {
+            "table_name": table_id.name,
+            "lst_column_name": lst_column_name,
+            "lst_field_name": lst_field_name,
+            "lst_query_replace": lst_query_replace,
+            "column_many2one_ids": column_many2one_ids,
+            "pipeline": self._get_transform_pipeline(
+                column_compute_ids,
+                column_selection_ids,
+                column_binary_char_ids,
+            ),
+        }
 
-        lst_data = list(
-            map(
-                self._conform_model_created_data(lst_field_name),
-                l_foreign_table_data,
+    def generate_data(self, table_id):
+        plan = self._get_migration_plan(table_id)
+
+        m2o_db = table_id.m2o_db
+        chunk_size = m2o_db.data_chunk_size
+        if chunk_size > 0:
+            # Stream data by chunk, memory stay flat with big table
+            iter_table_data = self.iter_table_data(
+                table_id.name,
+                m2o_db,
+                plan["lst_column_name"],
+                chunk_size,
+                lst_query_replace=plan["lst_query_replace"],
             )
+        else:
+            # Fetch all data
+            iter_table_data = [
+                self.get_table_data(
+                    table_id.name,
+                    m2o_db,
+                    plan["lst_column_name"],
+                    lst_query_replace=plan["lst_query_replace"],
+                )
+            ]
+
+        nb_row = 0
+        for seq, l_foreign_table_data in enumerate(iter_table_data):
+            lst_data = self._transform_data(plan, l_foreign_table_data)
+            self._create_data(table_id, plan, lst_data)
+            nb_row += len(lst_data)
+            if chunk_size > 0:
+                if m2o_db.data_chunk_commit:
+                    self.env.cr.commit()
+                # Free the cache of created records
+                self.env[table_id.new_model_name].invalidate_cache()
+                _logger.info(
+                    f"Migrate chunk #{seq} of table `{table_id.name}`,"
+                    f" {nb_row} rows done."
+                )
+
+    def _generate_data_level(self, lst_table, max_worker):
+        """
+        Migrate data of tables without dependency between them. Tables are
+        extracted and transformed in a thread pool, the ORM creates are done
+        in this thread in order.
+        :param lst_table: list of code.generator.db.table
+        :param max_worker: 0 or 1 to migrate sequentially
+        :return:
+        """
+        if max_worker <= 1 or len(lst_table) == 1:
+            for table_id in lst_table:
+                _logger.info(f"Parse {table_id.name}")
+                self.generate_data(table_id)
+            return
+
+        # More worker than connection only wait for the pool
+        max_worker = min(
+            [max_worker]
+            + [a.m2o_db.pool_size for a in lst_table if a.m2o_db.pool_size]
         )
+        with ThreadPoolExecutor(max_workers=max_worker) as executor:
+            lst_future = []
+            for table_id in lst_table:
+                if table_id.m2o_db.data_chunk_size > 0:
+                    # Streamed by chunk in this thread
+                    lst_future.append((table_id, None, None))
+                    continue
+                plan = self._get_migration_plan(table_id)
+                query = self.get_table_data_query(
+                    table_id.name,
+                    plan["lst_column_name"],
+                    lst_query_replace=plan["lst_query_replace"],
+                )
+                future = executor.submit(
+                    self._extract_data, table_id.m2o_db.get_pool(), query, plan
+                )
+                lst_future.append((table_id, plan, future))
 
-        # Compute data before create it
-        if (
-            column_compute_ids
-            or column_binary_char_ids
-            or column_many2one_ids
-            or column_selection_ids
+            for table_id, plan, future in lst_future:
+                _logger.info(f"Parse {table_id.name}")
+                if future is None:
+                    self.generate_data(table_id)
+                else:
+                    self._create_data(table_id, plan, future.result())
+
+    @staticmethod
+    def _extract_data(pool, query, plan):
+        """
+        Read and transform data of a table, no ORM access
+        :param pool: DbConnectionPool of the external database
+        :param query:
+        :param plan: result of _get_migration_plan
+        :return: list of dict field name -> value
+        """
+        try:
+            with pool.connection() as conn:
+                cr = conn.cursor()
+                try:
+                    cr.execute(query)
+                    l_foreign_table_data = cr.fetchall()
+                finally:
+                    cr.close()
+        except psycopg2.OperationalError:
+            raise ValidationError(TABLEDATAPROBLEM)
+        return CodeGeneratorDbTable._transform_data(plan, l_foreign_table_data)
+
+    def _create_data(self, table_id, plan, lst_data):
+        """
+        Resolve many2one and create data of a table
+        :param table_id:
+        :param plan: result of _get_migration_plan
+        :param lst_data: list of dict field name -> value
+        :return:
+        """
+        if not lst_data:
+            return
+        self._resolve_many2one(table_id, lst_data, plan["column_many2one_ids"])
+        lst_large_file = self._load_binary_data(table_id, plan, lst_data)
+        records = self.env[table_id.new_model_name].sudo().create(lst_data)
+        if lst_large_file:
+            self._store_binary_attachment(records, lst_large_file)
+
+    def _load_binary_data(self, table_id, plan, lst_data):
+        """
+        Read files of char path to transform in binary, with a bounded thread
+        pool. Files bigger than binary_max_memory_size are not loaded, they
+        are copied in the filestore after the create.
+        :param table_id:
+        :param plan: result of _get_migration_plan
+        :param lst_data: list of dict field name -> value, updated in place
+        :return: list of tuple (index of data, field name, path file) of
+            large files
+        """
+        if not plan["pipeline"]["binary"]:
+            return []
+        model_table = self.env[table_id.new_model_name]
+        max_size = table_id.m2o_db.binary_max_memory_size * 1024 * 1024
+        is_filestore = self.env["ir.attachment"]._storage() == "file"
+
+        lst_job = []
+        for field_name, path_binary, model in plan["pipeline"]["binary"]:
+            # Only field stored in attachment can skip the memory
+            max_size_field = (
+                max_size
+                if is_filestore and model_table._fields[field_name].attachment
+                else 0
+            )
+            for i, data in enumerate(lst_data):
+                value = data.get(field_name)
+                if value:
+                    # import path in binary
+                    path_file = os.path.join(path_binary, value)
+                    lst_job.append(
+                        (i, field_name, path_file, model, max_size_field)
+                    )
+
+        def load_binary(job):
+            i, field_name, path_file, model, max_size_field = job
+            if not os.path.isfile(path_file):
+                _logger.error(
+                    f"Cannot add file path `{path_file}` for"
+                    f" model `{model}` and field `{field_name}`"
+                )
+                return None
+            if max_size_field and os.path.getsize(path_file) > max_size_field:
+                lst_data[i][field_name] = False
+                return i, field_name, path_file
+            with open(path_file, "rb") as file:
+                lst_data[i][field_name] = base64.b64encode(file.read())
+            return None
+
+        with ThreadPoolExecutor(max_workers=BINARY_MAX_WORKER) as executor:
+            lst_large_file = [
+                a for a in executor.map(load_binary, lst_job) if a
+            ]
+        return lst_large_file
+
+    def _store_binary_attachment(self, records, lst_large_file):
+        """
+        Copy large files in the filestore and create their attachment,
+        without loading them in memory
+        :param records: created records, same order of data
+        :param lst_large_file: result of _load_binary_data
+        :return:
+        """
+        attachment_model = self.env["ir.attachment"].sudo()
+        lst_value = []
+        # list of tuple (checksum, file_size) by value
+        lst_stored_value = []
+        for i, field_name, path_file in lst_large_file:
+            sha1 = hashlib.sha1()
+            with open(path_file, "rb") as file:
+                for block in iter(lambda: file.read(BINARY_BLOCK_SIZE), b""):
+                    sha1.update(block)
+            checksum = sha1.hexdigest()
+            # bin_data is not used by _get_path, the checksum is enough
+            fname, full_path = attachment_model._get_path(b"", checksum)
+            if not os.path.isfile(full_path):
+                shutil.copyfile(path_file, full_path)
+            filename = os.path.basename(path_file)
+            lst_value.append(
+                {
+                    "name": filename,
+                    "datas_fname": filename,
+                    "type": "binary",
+                    "res_model": records._name,
+                    "res_field": field_name,
+                    "res_id": records[i].id,
+                    "store_fname": fname,
+                    "mimetype": mimetypes.guess_type(filename)[0]
+                    or "application/octet-stream",
+                }
+            )
+            lst_stored_value.append((checksum, os.path.getsize(path_file)))
+        _logger.info(f"Copy {len(lst_value)} large files in the filestore.")
+        attachments = attachment_model.create(lst_value)
+        # Without datas, create and write of ir.attachment drop checksum and
+        # file_size, they are computed from datas. Write them in SQL, the
+        # file is already hashed and datas would load it in memory.
+        for attachment, (checksum, file_size) in zip(
+            attachments, lst_stored_value
         ):
-            for data in lst_data:
-                # Compute data with a method call
+            self.env.cr.execute(
+                "UPDATE ir_attachment SET checksum = %s, file_size = %s"
+                " WHERE id = %s",
+                (checksum, file_size, attachment.id),
+            )
+        attachments.invalidate_cache(["checksum", "file_size"])
+
+    @staticmethod
+    def _get_transform_pipeline(
+        column_compute_ids, column_selection_ids, column_binary_char_ids
+    ):
+        """
+        Compile compute function and selection mapping once by table
+        :param column_compute_ids:
+        :param column_selection_ids:
+        :param column_binary_char_ids:
+        :return: dict with keys
+            compute: list of tuple (field name, function, code,
+            compile exception),
+            selection: list of tuple (field name, start at, list of
+            selection key, exception),
+            binary: list of tuple (field name, path binary, model)
+        """
+        lst_compute = []
+        for column_compute_id in column_compute_ids:
+            code, compile_error = None, None
+            try:
+                code = compile(
+                    column_compute_id.compute_data_function,
+                    f"<compute {column_compute_id.field_name}>",
+                    "eval",
+                )
+            except Exception as e:
+                compile_error = e
+            lst_compute.append(
+                (
+                    column_compute_id.field_name,
+                    column_compute_id.compute_data_function,
+                    code,
+                    compile_error,
+                )
+            )
+
+        lst_selection = []
+        for column_selection_id in column_selection_ids:
+            lst_selection_key, selection_error = None, None
+            try:
+                lst_selection_key = [
+                    a[0] for a in eval(column_selection_id.new_selection)
+                ]
+            except Exception as e:
+                selection_error = e
+            lst_selection.append(
+                (
+                    column_selection_id.field_name,
+                    column_selection_id.selection_migration_start_at,
+                    lst_selection_key,
+                    selection_error,
+                )
+            )
+
+        lst_binary = [
+            (a.field_name, a.path_binary, a.ir_model_field_id.model)
+            for a in column_binary_char_ids
+        ]
+        return {
+            "compute": lst_compute,
+            "selection": lst_selection,
+            "binary": lst_binary,
+        }
+
+    @staticmethod
+    def _transform_data(plan, l_foreign_table_data):
+        """
+        Compute data of a chunk before create it, without ORM access. Rows
+        are transformed column by column.
+        :param plan: result of _get_migration_plan
+        :param l_foreign_table_data: list of row
+        :return: list of dict field name -> value
+        """
+        lst_field_name = plan["lst_field_name"]
+        pipeline = plan["pipeline"]
+        lst_data = [dict(zip(lst_field_name, a)) for a in l_foreign_table_data]
+        if not lst_data:
+            return lst_data
+
+        # Compute data with a method call, an error skip next computing of
+        # the row
+        set_row_error = set()
+        for field_name, function, code, compile_error in pipeline["compute"]:
+            for i, data in enumerate(lst_data):
+                if i in set_row_error:
+                    continue
+                value = data.get(field_name)
+                if value is None:
+                    continue
                 try:
-                    for column_compute_id in column_compute_ids:
-                        value = data.get(column_compute_id.field_name)
-                        if value is None:
-                            continue
-                        new_value = eval(
-                            column_compute_id.compute_data_function,
-                            data.copy(),
-                        )
-                        if new_value != value:
-                            data[column_compute_id.field_name] = new_value
+                    if compile_error:
+                        raise compile_error
+                    new_value = eval(code, data.copy())
                 except Exception as e:
+                    set_row_error.add(i)
                     _logger.error(e)
                     _logger.error(
                         f"Last error for data {data} on table"
-                        f" `{table_id.name}`"
+                        f" `{plan['table_name']}`"
                     )
+                    _logger.error(f"Last computing: `{function}`")
+                    continue
+                if new_value != value:
+                    data[field_name] = new_value
+
+        # Selection, an error skip next selection of the row
+        set_row_error = set()
+        for (
+            field_name,
+            start_at,
+            lst_selection_key,
+            selection_error,
+        ) in pipeline["selection"]:
+            for i, data in enumerate(lst_data):
+                if not data or i in set_row_error:
+                    continue
+                value = data.get(field_name)
+                if value is None:
+                    value = start_at
+                if type(value) is not int:
+                    set_row_error.add(i)
                     _logger.error(
-                        "Last computing:"
-                        f" `{column_compute_id.compute_data_function}`"
+                        "Selection type support only database type"
+                        f" int, check column `{field_name}`"
                     )
+                    continue
+                if selection_error:
+                    raise selection_error
+                data[field_name] = lst_selection_key[value - start_at]
 
-                # Selection
-                for column_selection_id in column_selection_ids:
-                    if data:
-                        value = data.get(column_selection_id.field_name)
-                        if value is None:
-                            value = (
-                                column_selection_id.selection_migration_start_at
-                            )
-                        if type(value) is not int:
-                            _logger.error(
-                                "Selection type support only database type"
-                                " int, check column"
-                                f" `{column_selection_id.field_name}`"
-                            )
-                            break
-                        selection_value = eval(
-                            column_selection_id.new_selection
-                        )
-                        new_value = selection_value[
-                            value
-                            - column_selection_id.selection_migration_start_at
-                        ]
-                        data[column_selection_id.field_name] = new_value[0]
-                # Compute char path to transform in binary
-                for column_binary_char_id in column_binary_char_ids:
-                    if data:
-                        value = data.get(column_binary_char_id.field_name)
-                        if value:
-                            # import path in binary
-                            path_file = os.path.join(
-                                column_binary_char_id.path_binary,
-                                value,
-                            )
-                            if os.path.isfile(path_file):
-                                new_data_binary = open(
-                                    path_file,
-                                    "rb",
-                                ).read()
-                                data[
-                                    column_binary_char_id.field_name
-                                ] = base64.b64encode(new_data_binary)
-                            else:
-                                _logger.error(
-                                    f"Cannot add file path `{path_file}` for"
-                                    " model"
-                                    f" `{column_binary_char_id.ir_model_field_id.model}`"
-                                    " and field"
-                                    f" `{column_binary_char_id.field_name}`"
-                                )
-                for column_many2one_id in column_many2one_ids:
-                    value = data.get(column_many2one_id.field_name)
-                    # Update value with foreign key value
-                    # Support active_test, some field can be not active from migration
-                    new_id = (
-                        self.env[
-                            column_many2one_id.relation_table_id.model_name
-                        ]
-                        .with_context(active_test=False)
-                        .search(
-                            [
-                                (
-                                    column_many2one_id.relation_column_id.field_name,
-                                    "=",
-                                    value,
-                                )
-                            ]
-                        )
+        return lst_data
+
+    def _resolve_many2one(self, table_id, lst_data, column_many2one_ids):
+        """
+        Resolve foreign key with one query by many2one column, after
+        compute of data
+        :param table_id:
+        :param lst_data: list of dict field name -> value, updated in place
+        :param column_many2one_ids:
+        :return:
+        """
+        dct_many2one_mapping = {
+            a.id: self._get_many2one_mapping(
+                a, [data.get(a.field_name) for data in lst_data]
+            )
+            for a in column_many2one_ids
+        }
+        for data in lst_data:
+            for column_many2one_id in column_many2one_ids:
+                value = data.get(column_many2one_id.field_name)
+                # Update value with foreign key value
+                new_id = dct_many2one_mapping[column_many2one_id.id].get(
+                    self._get_many2one_mapping_key(value), []
+                )
+                if len(new_id) > 1:
+                    raise ValueError(
+                        "Model"
+                        f" `{column_many2one_id.ir_model_field_id.model}`"
+                        f" with field `{column_many2one_id.field_name}` is"
+                        " required, but cannot find relation"
+                        f" `{column_many2one_id.relation_table_id.model_name}`"
+                        " relation column"
+                        f" `{column_many2one_id.relation_column_id.field_name}`"
+                        f" of id `{value}`. Cannot associate multiple"
+                        " result, is your foreign configured correctly?"
                     )
-                    if len(new_id) > 1:
-                        raise ValueError(
-                            "Model"
-                            f" `{column_many2one_id.ir_model_field_id.model}`"
-                            f" with field `{column_many2one_id.field_name}` is"
-                            " required, but cannot find relation"
-                            f" `{column_many2one_id.relation_table_id.model_name}`"
-                            " relation column"
-                            f" `{column_many2one_id.relation_column_id.field_name}`"
-                            f" of id `{value}`. Cannot associate multiple"
-                            " result, is your foreign configured correctly?"
-                        )
-                    if value and not new_id:
-                        raise ValueError(
-                            f"Cannot find value `{value}` for column"
-                            f" `{column_many2one_id.relation_column_id.field_name}`"
-                            f" in table `{table_id.name}`"
-                        )
-                    int_new_id = new_id.id
-                    # TODO use real required
-                    if int_new_id is False and (
-                        column_many2one_id.field_required
-                    ):
-                        raise ValueError(
-                            "Model"
-                            f" `{column_many2one_id.ir_model_field_id.model}`"
-                            f" with field `{column_many2one_id.field_name}` is"
-                            " required, but cannot find relation"
-                            f" `{column_many2one_id.relation_table_id.model_name}`"
-                            " relation column"
-                            f" `{column_many2one_id.relation_column_id.field_name}`"
-                            f" of id `{value}`. Is it missing data?"
-                        )
-                    data[column_many2one_id.field_name] = int_new_id
+                if value and not new_id:
+                    raise ValueError(
+                        f"Cannot find value `{value}` for column"
+                        f" `{column_many2one_id.relation_column_id.field_name}`"
+                        f" in table `{table_id.name}`"
+                    )
+                int_new_id = new_id[0] if new_id else False
+                # TODO use real required
+                if int_new_id is False and (
+                    column_many2one_id.field_required
+                ):
+                    raise ValueError(
+                        "Model"
+                        f" `{column_many2one_id.ir_model_field_id.model}`"
+                        f" with field `{column_many2one_id.field_name}` is"
+                        " required, but cannot find relation"
+                        f" `{column_many2one_id.relation_table_id.model_name}`"
+                        " relation column"
+                        f" `{column_many2one_id.relation_column_id.field_name}`"
+                        f" of id `{value}`. Is it missing data?"
+                    )
+                data[column_many2one_id.field_name] = int_new_id
 
-        results = self.env[table_id.new_model_name].sudo().create(lst_data)
+    @staticmethod
+    def _get_many2one_mapping_key(value):
+        """
+        Util function to get the key of a legacy value, all empty value
+        are searched as False and keyed as None
+        :param value:
+        :return:
+        """
+        if value is None or value is False:
+            return None
+        if type(value) in (list, tuple):
+            # many2one value from read
+            return value[0]
+        return value
+
+    def _get_many2one_mapping(self, column_many2one_id, lst_value):
+        """
+        Load the mapping of legacy key to new id of the related model
+        :param column_many2one_id: code.generator.db.column of type many2one
+        :param lst_value: legacy values to resolve
+        :return: dict legacy key -> list of new id
+        """
+        relation_field_name = column_many2one_id.relation_column_id.field_name
+        # Support active_test, some field can be not active from migration
+        model_relation = self.env[
+            column_many2one_id.relation_table_id.model_name
+        ].with_context(active_test=False)
+        set_key = set([self._get_many2one_mapping_key(a) for a in lst_value])
+        dct_mapping = defaultdict(list)
+        if not set_key:
+            return dct_mapping
+        domain = [(relation_field_name, "in", list(set_key - {None}))]
+        if None in set_key:
+            domain = ["|", (relation_field_name, "=", False)] + domain
+        for data in model_relation.search_read(
+            domain, [relation_field_name], order="id"
+        ):
+            key = self._get_many2one_mapping_key(data[relation_field_name])
+            dct_mapping[key].append(data["id"])
+        return dct_mapping
 
     def update_relation_many2one(self, table_ids):
         for table_id in table_ids:
@@ -686,52 +1036,72 @@ class CodeGeneratorDbTable(models.Model):
 
     @staticmethod
     def reorder_many2one_dependency(table_ids):
+        """
+        Topological sort of tables by many2one dependency. The
+        order_extract_data is the level in the dependency graph, tables of
+        the same level don't depend on each other.
+        :param table_ids:
+        :return:
+        """
         table_to_reorder_ids = table_ids.filtered(
             lambda a: a.has_many2one_dependency
             and not a.has_looping_many2one_dependency
             and not a.order_extract_data
             and not a.delete
         )
-        pos_order = 1
-        max_loop = len(table_to_reorder_ids) + 1
-        i = 0
-        while table_to_reorder_ids and i < max_loop:
-            i += 1
-            pos_order += 1
-            table_ordered_ids = table_ids.filtered(
-                lambda a: a.order_extract_data
+        dct_order = {
+            a.id: a.order_extract_data
+            for a in table_ids
+            if a.order_extract_data
+        }
+        set_node = set(table_to_reorder_ids.ids)
+        dct_depend = {}
+        dct_in_degree = {}
+        dct_dependent = defaultdict(list)
+        queue_ready = deque()
+        for table_to_reorder_id in table_to_reorder_ids:
+            # TODO can we do many2many on same table? it's not working
+            set_depend = set(
+                table_to_reorder_id.o2m_columns.mapped("relation_table_id").ids
             )
-
-            for table_to_reorder_id in table_to_reorder_ids:
-                # TODO can we do many2many on same table? it's not working
-                lst_table_id_depend = []
-                column_ids = table_to_reorder_id.o2m_columns.filtered(
-                    lambda a: a.relation_table_id
-                )
-                for column_id in column_ids:
-                    lst_table_id_depend.append(column_id.relation_table_id.id)
-
-                # Check if in list
-                for table_id_int in set(lst_table_id_depend):
-                    if table_id_int not in table_ordered_ids.ids:
-                        break
-                else:
-                    table_to_reorder_id.order_extract_data = pos_order
-                    # Force next order
-                    break
-
-            table_to_reorder_ids = table_ids.filtered(
-                lambda a: a.has_many2one_dependency
-                and not a.has_looping_many2one_dependency
-                and not a.order_extract_data
-                and not a.delete
+            table_id_int = table_to_reorder_id.id
+            dct_depend[table_id_int] = set_depend
+            if set_depend - set_node - set(dct_order):
+                # Depend on a table never ordered, like a looping table
+                continue
+            dct_in_degree[table_id_int] = len(set_depend & set_node)
+            for depend_id in set_depend & set_node:
+                dct_dependent[depend_id].append(table_id_int)
+            if not dct_in_degree[table_id_int]:
+                queue_ready.append(table_id_int)
+
+        dct_level_ids = defaultdict(list)
+        while queue_ready:
+            table_id_int = queue_ready.popleft()
+            level = 1 + max(
+                [dct_order[a] for a in dct_depend[table_id_int]] or [0]
+            )
+            dct_order[table_id_int] = level
+            dct_level_ids[level].append(table_id_int)
+            for dependent_id in dct_dependent[table_id_int]:
+                if dependent_id not in dct_in_degree:
+                    continue
+                dct_in_degree[dependent_id] -= 1
+                if not dct_in_degree[dependent_id]:
+                    queue_ready.append(dependent_id)
+
+        for level, lst_table_id in dct_level_ids.items():
+            table_ids.browse(lst_table_id).write(
+                {"order_extract_data": level}
             )
 
+        table_to_reorder_ids = table_to_reorder_ids.filtered(
+            lambda a: not a.order_extract_data
+        )
         if table_to_reorder_ids:
             _logger.error(
-                "Stopping infinity loop, a bug occur when try to reorder"
-                f" model : {[a.name for a in table_to_reorder_ids]}. i={i},"
-                f" max_i={max_loop}"
+                "Cannot order by many2one dependency the model :"
+                f" {[a.name for a in table_to_reorder_ids]}."
             )
 
     @staticmethod
@@ -796,64 +1166,6 @@ class CodeGeneratorDbTable(models.Model):
                         tpl_field_one2many = (0, 0, dct_one2many)
                         dct_model.get("field_id").append(tpl_field_one2many)
 
-    def get_db_query_4_columns(self, m2o_db, table_name, schema, database):
-        """
-        Function to obtain the SELECT query for a table columns
-        :param m2o_db:
-        :param table_name:
-        :param schema:
-        :param database:
-        :return:
-        """
-
-        sgdb = m2o_db.m2o_dbtype.name
-
-        query = """ SELECT * FROM {t_from} WHERE """.format(
-            t_from="information_schema.columns"
-        )
-
-        if sgdb != "SQLServer":
-            query += (
-                " table_schema ="
-                f" '{schema if sgdb == 'PostgreSQL' else database}' AND "
-            )
-
-        return query + f" table_name = '{table_name}' "
-
-    @staticmethod
-    def get_q_4constraints(
-        table_name, column_name, database, fkey=False, sgdb=None
-    ):
-        """
-        Function to obtain the SELECT query for a table constraints
-        :param table_name:
-        :param column_name:
-        :param database:
-        :param fkey:
-        :param sgdb:
-        :return:
-        """
-
-        if fkey:
-            if sgdb != "MySQL":
-                return f""" SELECT ccu.table_name, ccu.COLUMN_NAME FROM {'information_schema.table_constraints'} AS tc
-                JOIN {'information_schema.key_column_usage'} AS kcu ON tc.constraint_name = kcu.constraint_name
-                JOIN {'information_schema.constraint_column_usage'} AS ccu ON ccu.constraint_name = tc.constraint_name
-                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_name = '{table_name}' AND tc.table_schema = '{database}'
-                AND kcu.column_name = '{column_name}' """
-
-            else:
-                return f""" SELECT kcu.referenced_table_name, kcu.REFERENCED_COLUMN_NAME FROM {'information_schema.table_constraints'} AS tc
-                JOIN {'information_schema.key_column_usage'} AS kcu ON tc.constraint_name = kcu.constraint_name
-                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_name = '{table_name}' AND tc.table_schema = '{database}'
-                AND kcu.column_name = '{column_name}' """
-
-        else:
-            return f""" SELECT * FROM {'information_schema.table_constraints'} AS tc
-            JOIN {'information_schema.key_column_usage'} AS kcu ON tc.constraint_name = kcu.constraint_name
-            WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_name = '{table_name}' AND tc.table_schema = '{database}'
-            AND kcu.column_name = '{column_name}' """
-
     @staticmethod
     def get_odoo_field_tuple_4insert(
         name, field_description, ttype, required=False, dct_new_info={}
@@ -935,25 +1247,15 @@ class CodeGeneratorDbTable(models.Model):
         """
 
         try:
-            sgdb = m2o_db.m2o_dbtype.name
-            database = m2o_db.database
-            cr = self.env["code.generator.db"].get_db_cr(
-                sgdb=sgdb,
-                database=database,
-                host=m2o_db.host,
-                port=m2o_db.port,
-                user=m2o_db.user,
-                password=m2o_db.password,
-            )
-            str_query_4_columns = self.get_db_query_4_columns(
-                m2o_db, origin_table_name, m2o_db.schema, database
+            dct_table_schema = m2o_db.get_db_schema().get(
+                origin_table_name, {}
             )
-            cr.execute(str_query_4_columns)
+            set_primary_key = dct_table_schema.get("primary_key", set())
+            dct_foreign_key = dct_table_schema.get("foreign_key", {})
 
             l_fields = []
             having_column_name = False
-            lst_column_info = cr.fetchall()
-            for column_info in lst_column_info:
+            for column_info in dct_table_schema.get("columns", []):
 
                 column_name = column_info[3]
 
@@ -968,23 +1270,11 @@ class CodeGeneratorDbTable(models.Model):
                 #     )
                 #     column_name = slice_column_name
 
-                str_query_4_constraints = self.get_q_4constraints(
-                    origin_table_name, column_name, database
-                )
-                cr.execute(str_query_4_constraints)
                 if (
-                    m2o_db.accept_primary_key or not cr.fetchone()
+                    m2o_db.accept_primary_key
+                    or column_name not in set_primary_key
                 ):  # if it is not a primary key
-
-                    str_query_4_constraints_fkey = self.get_q_4constraints(
-                        origin_table_name,
-                        column_name,
-                        database,
-                        fkey=True,
-                        sgdb=sgdb,
-                    )
-                    cr.execute(str_query_4_constraints_fkey)
-                    is_m2o = cr.fetchone()
+                    is_m2o = dct_foreign_key.get(column_name)
 
                     t_odoo_field_4insert = self.get_odoo_field_tuple_4insert(
                         column_name,
@@ -1036,6 +1326,30 @@ class CodeGeneratorDbTable(models.Model):
         except psycopg2.OperationalError:
             raise ValidationError(TABLEFIELDPROBLEM)
 
+    @staticmethod
+    def get_table_data_query(
+        table_name, lst_column_name, limit=None, lst_query_replace=[]
+    ):
+        """
+        Function to obtain the SELECT query of a table data
+        :param table_name:
+        :param lst_column_name:
+        :param limit: int max to get data
+        :param lst_query_replace: list of query to replace, tuple [0] string to replace, [1] new string
+        :return:
+        """
+        if False in lst_column_name:
+            raise ValueError(
+                f"One element is False in list of field {lst_column_name}"
+            )
+        query = f" SELECT {','.join(lst_column_name)} FROM {table_name} "
+        if limit:
+            query += f"LIMIT {limit} "
+
+        for str_search, str_replace in lst_query_replace:
+            query = query.replace(str_search, str_replace)
+        return query
+
     def get_table_data(
         self,
         table_name,
@@ -1057,30 +1371,57 @@ class CodeGeneratorDbTable(models.Model):
         if not table_name:
             raise ValueError(f"table name is empty.")
 
-        port = self.env["code.generator.db"].get_port(m2o_db.port)
         try:
-            cr = self.env["code.generator.db"].get_db_cr(
-                sgdb=m2o_db.m2o_dbtype.name,
-                database=m2o_db.database,
-                host=m2o_db.host,
-                port=port,
-                user=m2o_db.user,
-                password=m2o_db.password,
+            query = self.get_table_data_query(
+                table_name,
+                lst_column_name,
+                limit=limit,
+                lst_query_replace=lst_query_replace,
             )
-            if False in lst_column_name:
-                raise ValueError(
-                    f"One element is False in list of field {lst_column_name}"
-                )
-            query = f" SELECT {','.join(lst_column_name)} FROM {table_name} "
-            if limit:
-                query += f"LIMIT {limit} "
 
-            for str_search, str_replace in lst_query_replace:
-                query = query.replace(str_search, str_replace)
+            with m2o_db.get_cursor() as cr:
+                cr.execute(query)
+                return cr.fetchall()
 
-            cr.execute(query)
+        except psycopg2.OperationalError:
+            raise ValidationError(TABLEDATAPROBLEM)
 
-            return cr.fetchall()
+    def iter_table_data(
+        self,
+        table_name,
+        m2o_db,
+        lst_column_name,
+        chunk_size,
+        lst_query_replace=[],
+    ):
+        """
+        Generator of table data by chunk, read with a server-side cursor
+        :param table_name:
+        :param m2o_db:
+        :param lst_column_name:
+        :param chunk_size: number of rows by chunk
+        :param lst_query_replace: list of query to replace, tuple [0] string to replace, [1] new string
+        :return: list of rows by chunk
+        """
+
+        if not table_name:
+            raise ValueError(f"table name is empty.")
+
+        try:
+            query = self.get_table_data_query(
+                table_name,
+                lst_column_name,
+                lst_query_replace=lst_query_replace,
+            )
+
+            with m2o_db.get_cursor(stream=True) as cr:
+                cr.execute(query)
+
+                while True:
+                    lst_row = cr.fetchmany(chunk_size)
+                    if not lst_row:
+                        break
+                    yield lst_row
 
         except psycopg2.OperationalError:
             raise ValidationError(TABLEDATAPROBLEM)
@@ -1106,16 +1447,7 @@ class CodeGeneratorDbTable(models.Model):
         if not table_name:
             raise ValueError(f"table name is empty.")
 
-        port = self.env["code.generator.db"].get_port(m2o_db.port)
         try:
-            cr = self.env["code.generator.db"].get_db_cr(
-                sgdb=m2o_db.m2o_dbtype.name,
-                database=m2o_db.database,
-                host=m2o_db.host,
-                port=port,
-                user=m2o_db.user,
-                password=m2o_db.password,
-            )
             if False in model_created_fields:
                 raise ValueError(
                     "One element is False in list of field"
@@ -1130,9 +1462,9 @@ class CodeGeneratorDbTable(models.Model):
             for str_search, str_replace in lst_query_replace:
                 query = query.replace(str_search, str_replace)
 
-            cr.execute(query)
-
-            return cr.fetchall()
+            with m2o_db.get_cursor() as cr:
+                cr.execute(query)
+                return cr.fetchall()
 
         except psycopg2.OperationalError:
             raise ValidationError(TABLEDATAPROBLEM)
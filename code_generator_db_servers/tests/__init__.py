@@ -0,0 +1 @@
+from . import test_code_generator_db
@@ -0,0 +1,91 @@
+import logging
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo.tests import common, tagged
+
+_logger = logging.getLogger(__name__)
+
+NB_TABLE = 2000
+SCHEMA = "code_generator_bench"
+
+
+class CountCursor:
+    """
+    Cursor of the external database, count executed queries
+    """
+
+    def __init__(self, cr):
+        self._cr = cr
+        self.nb_query = 0
+
+    def execute(self, query, params=None):
+        self.nb_query += 1
+        return self._cr.execute(query, params)
+
+    def fetchall(self):
+        return self._cr.fetchall()
+
+
+@tagged("post_install", "-at_install")
+class TestCodeGeneratorDb(common.TransactionCase):
+    def setUp(self):
+        super(TestCodeGeneratorDb, self).setUp()
+        # Synthetic schema, the external database is the test database
+        lst_query = [f"CREATE SCHEMA {SCHEMA};"]
+        for i in range(NB_TABLE):
+            parent = (
+                f", parent_id integer REFERENCES {SCHEMA}.t_{i - 1:04}(id)"
+                if i
+                else ""
+            )
+            lst_query.append(
+                f"CREATE TABLE {SCHEMA}.t_{i:04} (id serial PRIMARY KEY,"
+                f" name varchar, value integer{parent});"
+            )
+        self.cr.execute("\n".join(lst_query))
+        self.external_cr = CountCursor(self.cr)
+
+    def test_register_tables_in_batch(self):
+        external_cr = self.external_cr
+
+        @contextmanager
+        def borrow_db_cr(db, *args, **kwargs):
+            yield external_cr
+
+        db_model = self.env["code.generator.db"]
+        before_time = time.time()
+        before_nb_query = self.cr.sql_log_count
+        with patch.object(type(db_model), "_borrow_db_cr", borrow_db_cr):
+            db = db_model.create(
+                {
+                    "m2o_dbtype": self.env.ref(
+                        "code_generator_db_servers.code_generator_db_type_pgsql"
+                    ).id,
+                    # Constraints of the schema are searched by database
+                    "database": SCHEMA,
+                    "schema": SCHEMA,
+                    "host": "localhost",
+                    "port": "5432",
+                    "user": "bench",
+                    "password": "bench",
+                }
+            )
+        elapsed_time = time.time() - before_time
+        _logger.info(
+            f"Register {NB_TABLE} tables in {elapsed_time:.3f} s,"
+            f" {self.cr.sql_log_count - before_nb_query} queries with"
+            f" {external_cr.nb_query} on the external database."
+        )
+
+        table_ids = self.env["code.generator.db.table"].search(
+            [("m2o_db", "=", db.id)]
+        )
+        self.assertEqual(len(table_ids), NB_TABLE)
+        self.assertEqual(
+            len(table_ids.mapped("o2m_columns")), NB_TABLE * 3 - 1
+        )
+        # List of tables, then columns, primary and foreign keys of the
+        # whole schema, not by table
+        self.assertEqual(external_cr.nb_query, 4)
@@ -1397,13 +1397,10 @@ class CodeGeneratorWriter(models.Model):
             ]
         f2exports = self.env["ir.model.fields"].search(lst_search)
 
+        fields_get_cache = self._get_fields_get_cache()
         dct_var_id_view = {}
         for field_id in f2exports:
-            extra_info = (
-                self.env[model_id.model]
-                .fields_get(field_id.name)
-                .get(field_id.name)
-            )
+            extra_info = fields_get_cache.get(model_id.model, field_id.name)
             dct_field_value = {}
             dct_field = {}
             var_id_view = f"field_{field_id.name}_id"
@@ -1530,10 +1527,8 @@ class CodeGeneratorWriter(models.Model):
                         f" many2one? Field '{field_id.relation_field}'"
                     )
             elif field_id.ttype == "selection":
-                field_selection = (
-                    self.env[model_id.model]
-                    .fields_get(field_id.name)
-                    .get(field_id.name)
+                field_selection = fields_get_cache.get(
+                    model_id.model, field_id.name
                 )
                 dct_field_value["selection"] = str(
                     field_selection.get("selection")